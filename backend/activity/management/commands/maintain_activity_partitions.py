@@ -0,0 +1,40 @@
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections, router
+
+from activity import partitions
+from activity.models import ActivityEvent
+
+
+class Command(BaseCommand):
+    help = 'إنشاء أقسام سجل النشاط للأشهر القادمة وحذف أقسام الأشهر الأقدم من مدة الاحتفاظ'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--ahead', type=int, default=getattr(settings, 'ACTIVITY_PARTITIONS_AHEAD', 2),
+            help='عدد الأشهر القادمة التي تُنشأ أقسامها'
+        )
+        parser.add_argument(
+            '--retention-months', type=int, default=getattr(settings, 'ACTIVITY_RETENTION_MONTHS', 12),
+            help='عدد الأشهر المحتفظ بها بما فيها الشهر الحالي'
+        )
+        parser.add_argument('--dry-run', action='store_true', help='عرض الأقسام التي ستُحذف دون حذفها')
+
+    def handle(self, *args, **options):
+        connection = connections[router.db_for_write(ActivityEvent)]
+        current = partitions.month_start(datetime.now(dt_timezone.utc))
+
+        if not options['dry_run']:
+            partitions.ensure_months(connection, [partitions.add_months(current, offset) for offset in range(options['ahead'] + 1)])
+
+        # حذف جدول الشهر كاملاً بدلاً من DELETE على الصفوف
+        keep_from = partitions.add_months(current, -(max(options['retention_months'], 1) - 1))
+        dropped = partitions.drop_before(connection, keep_from, dry_run=options['dry_run'])
+        for month in dropped:
+            verb = 'سيُحذف' if options['dry_run'] else 'تم حذف'
+            self.stdout.write(f'{verb} قسم {partitions.partition_name(month)}')
+
+        months = ', '.join(f'{month:%Y-%m}' for month in partitions.existing_partitions(connection))
+        self.stdout.write(self.style.SUCCESS(f'أقسام سجل النشاط: {months}'))
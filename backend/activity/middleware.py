@@ -0,0 +1,35 @@
+"""
+وسيط كتابة أحداث النشاط دفعة واحدة في نهاية كل طلب
+"""
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+
+from . import recorder
+
+
+class ActivityBatchMiddleware:
+    """
+    يجمع أحداث النشاط المسجلة أثناء الطلب ويكتبها بإدراج واحد بعد انتهائه
+    يعمل بالوضعين المتزامن وغير المتزامن
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        with recorder.batch():
+            return self.get_response(request)
+
+    async def __acall__(self, request):
+        token, events = recorder.start_batch()
+        try:
+            return await self.get_response(request)
+        finally:
+            recorder.end_batch(token)
+            if events:
+                await sync_to_async(recorder.write)(events)
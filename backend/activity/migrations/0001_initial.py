@@ -0,0 +1,45 @@
+# Generated by Django 4.2.7 on 2026-10-19 11:35
+
+from django.db import migrations, models
+
+
+def create_partitioned_table(apps, schema_editor):
+    from activity import partitions
+    partitions.install(schema_editor.connection)
+
+
+def drop_partitioned_table(apps, schema_editor):
+    from activity import partitions
+    partitions.uninstall(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('organizations', '0001_initial'),
+        ('projects', '0001_initial'),
+        ('users', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ActivityEvent',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('verb', models.CharField(max_length=50)),
+                ('target_type', models.CharField(max_length=30)),
+                ('target_id', models.BigIntegerField(blank=True, null=True)),
+                ('data', models.JSONField(default=dict)),
+                ('created_at', models.DateTimeField()),
+            ],
+            options={
+                'db_table': 'activity_activityevent',
+                'ordering': ['-id'],
+                'managed': False,
+            },
+        ),
+        # الجدول مقسم حسب الشهر ويُنشأ يدوياً (انظر activity/partitions.py)
+        migrations.RunPython(create_partitioned_table, drop_partitioned_table),
+    ]
@@ -0,0 +1,53 @@
+from django.db import models
+from organizations.models import Organization
+from projects.models import Project
+from users.models import User
+
+
+class ActivityEvent(models.Model):
+    """
+    سجل إلحاقي لنشاط المستخدمين (من غيّر ماذا)
+    الجدول مقسم حسب الشهر (انظر activity/partitions.py) ولا تديره ترحيلات Django:
+    - PostgreSQL: جدول أب مقسم بالنطاق على created_at وجدول فرعي لكل شهر
+    - غيره (SQLite): جدول لكل شهر وعرض (VIEW) يجمعها بـ UNION ALL
+    الكتابة تتم عبر activity.recorder فقط، والمعرف مرتب زمنياً (انظر recorder.make_id)
+    العلاقات بدون قيود على مستوى القاعدة حتى يبقى السجل بعد حذف المشاريع والمستخدمين
+    """
+    id = models.BigIntegerField(primary_key=True)
+    organization = models.ForeignKey(
+        Organization,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        related_name='+'
+    )
+    project = models.ForeignKey(
+        Project,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        null=True,
+        blank=True,
+        related_name='+'
+    )
+    actor = models.ForeignKey(
+        User,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        null=True,
+        blank=True,
+        related_name='+'
+    )
+    # مثل task.created أو task.status_changed أو project.deleted
+    verb = models.CharField(max_length=50)
+    target_type = models.CharField(max_length=30)
+    target_id = models.BigIntegerField(null=True, blank=True)
+    # ملخص صغير للهدف والتغيير (العنوان، الحالة السابقة والجديدة...)
+    data = models.JSONField(default=dict)
+    created_at = models.DateTimeField()
+
+    class Meta:
+        managed = False
+        db_table = 'activity_activityevent'
+        ordering = ['-id']
+
+    def __str__(self):
+        return f'{self.verb} {self.target_type}#{self.target_id} بواسطة {self.actor_id}'
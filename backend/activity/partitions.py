@@ -0,0 +1,187 @@
+"""
+تقسيم جدول النشاط حسب الشهر
+- PostgreSQL: جدول أب مقسم بالنطاق (PARTITION BY RANGE) على created_at، وجدول فرعي لكل شهر
+  الاستعلامات المقيدة بالوقت لا تمر إلا على أقسام الأشهر المعنية
+- غيره (SQLite): جدول مستقل لكل شهر، وعرض activity_activityevent يجمعها بـ UNION ALL
+  ويُعاد إنشاؤه عند إضافة أو حذف شهر
+- حذف البيانات القديمة يتم بحذف جدول الشهر كاملاً بدلاً من DELETE يمر على الصفوف
+الأشهر محسوبة بتوقيت UTC
+"""
+import re
+from datetime import datetime, timezone as dt_timezone
+
+TABLE = 'activity_activityevent'
+PARTITION_PATTERN = re.compile(rf'^{TABLE}_p(\d{{4}})(\d{{2}})$')
+
+COLUMNS = (
+    'id', 'organization_id', 'project_id', 'actor_id',
+    'verb', 'target_type', 'target_id', 'data', 'created_at',
+)
+
+# الأشهر التي تم التأكد من وجود أقسامها في هذه العملية {(اسم الاتصال, الشهر)}
+_known = set()
+
+
+def month_start(value):
+    """
+    بداية الشهر (UTC) لتاريخ أو وقت
+    """
+    if isinstance(value, datetime) and value.tzinfo is not None:
+        value = value.astimezone(dt_timezone.utc)
+    return datetime(value.year, value.month, 1, tzinfo=dt_timezone.utc)
+
+
+def add_months(month, count):
+    index = month.year * 12 + month.month - 1 + count
+    return datetime(index // 12, index % 12 + 1, 1, tzinfo=dt_timezone.utc)
+
+
+def partition_name(month):
+    return f'{TABLE}_p{month:%Y%m}'
+
+
+def _is_postgresql(connection):
+    return connection.vendor == 'postgresql'
+
+
+def existing_partitions(connection):
+    """
+    الأشهر التي لها أقسام حالياً، مرتبة تصاعدياً
+    """
+    with connection.cursor() as cursor:
+        names = connection.introspection.table_names(cursor)
+    months = []
+    for name in names:
+        match = PARTITION_PATTERN.match(name)
+        if match:
+            months.append(datetime(int(match.group(1)), int(match.group(2)), 1, tzinfo=dt_timezone.utc))
+    return sorted(months)
+
+
+def _rebuild_view(connection, months):
+    """
+    إعادة إنشاء عرض UNION ALL فوق جداول الأشهر (غير PostgreSQL)
+    """
+    columns = ', '.join(COLUMNS)
+    selects = ' UNION ALL '.join(f'SELECT {columns} FROM {partition_name(month)}' for month in months)
+    with connection.cursor() as cursor:
+        cursor.execute(f'DROP VIEW IF EXISTS {TABLE}')
+        cursor.execute(f'CREATE VIEW {TABLE} AS {selects}')
+
+
+def _create_month_table(connection, month):
+    name = partition_name(month)
+    with connection.cursor() as cursor:
+        cursor.execute(f'''
+            CREATE TABLE IF NOT EXISTS {name} (
+                id bigint NOT NULL PRIMARY KEY,
+                organization_id bigint NOT NULL,
+                project_id bigint NULL,
+                actor_id bigint NULL,
+                verb varchar(50) NOT NULL,
+                target_type varchar(30) NOT NULL,
+                target_id bigint NULL,
+                data text NOT NULL,
+                created_at datetime NOT NULL
+            )
+        ''')
+        cursor.execute(f'CREATE INDEX IF NOT EXISTS {name}_org_idx ON {name} (organization_id, id)')
+        cursor.execute(f'CREATE INDEX IF NOT EXISTS {name}_project_idx ON {name} (project_id, id)')
+
+
+def install(connection):
+    """
+    إنشاء الجدول (أو العرض) وأقسام الشهر الحالي والتالي
+    """
+    if _is_postgresql(connection):
+        with connection.cursor() as cursor:
+            # المفتاح الأساسي في الجداول المقسمة يجب أن يشمل عمود التقسيم
+            cursor.execute(f'''
+                CREATE TABLE IF NOT EXISTS {TABLE} (
+                    id bigint NOT NULL,
+                    organization_id bigint NOT NULL,
+                    project_id bigint NULL,
+                    actor_id bigint NULL,
+                    verb varchar(50) NOT NULL,
+                    target_type varchar(30) NOT NULL,
+                    target_id bigint NULL,
+                    data jsonb NOT NULL,
+                    created_at timestamp with time zone NOT NULL,
+                    PRIMARY KEY (id, created_at)
+                ) PARTITION BY RANGE (created_at)
+            ''')
+            # الفهارس على الجدول الأب تُنشأ تلقائياً في كل قسم
+            cursor.execute(f'CREATE INDEX IF NOT EXISTS {TABLE}_org_idx ON {TABLE} (organization_id, id)')
+            cursor.execute(f'CREATE INDEX IF NOT EXISTS {TABLE}_project_idx ON {TABLE} (project_id, id)')
+    current = month_start(datetime.now(dt_timezone.utc))
+    ensure_months(connection, [current, add_months(current, 1)])
+
+
+def uninstall(connection):
+    with connection.cursor() as cursor:
+        if _is_postgresql(connection):
+            cursor.execute(f'DROP TABLE IF EXISTS {TABLE} CASCADE')
+            return
+        cursor.execute(f'DROP VIEW IF EXISTS {TABLE}')
+    for month in existing_partitions(connection):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DROP TABLE IF EXISTS {partition_name(month)}')
+    _known.clear()
+
+
+def ensure_months(connection, months):
+    """
+    إنشاء أقسام الأشهر المطلوبة إذا لم تكن موجودة
+    """
+    missing = [month for month in months if (connection.alias, month) not in _known]
+    if not missing:
+        return
+    existing = set(existing_partitions(connection))
+    created = False
+    for month in missing:
+        if month not in existing:
+            if _is_postgresql(connection):
+                with connection.cursor() as cursor:
+                    cursor.execute(
+                        f'CREATE TABLE IF NOT EXISTS {partition_name(month)} PARTITION OF {TABLE} '
+                        f'FOR VALUES FROM (%s) TO (%s)',
+                        [month, add_months(month, 1)]
+                    )
+            else:
+                _create_month_table(connection, month)
+            existing.add(month)
+            created = True
+        _known.add((connection.alias, month))
+    if created and not _is_postgresql(connection):
+        _rebuild_view(connection, sorted(existing))
+
+
+def table_for(connection, month):
+    """
+    الجدول الذي تُكتب فيه أحداث الشهر: الجدول الأب في PostgreSQL (يوجه الصفوف بنفسه)
+    أو جدول الشهر مباشرة في غيره
+    """
+    ensure_months(connection, [month])
+    return TABLE if _is_postgresql(connection) else partition_name(month)
+
+
+def drop_before(connection, month, dry_run=False):
+    """
+    حذف أقسام الأشهر السابقة لـ month بالكامل، مع إبقاء قسم واحد على الأقل
+    """
+    existing = existing_partitions(connection)
+    expired = [partition for partition in existing if partition < month]
+    if len(expired) == len(existing):
+        expired = expired[:-1]
+    if dry_run or not expired:
+        return expired
+
+    remaining = [partition for partition in existing if partition not in expired]
+    if not _is_postgresql(connection):
+        # العرض يشير إلى الجداول، فيُعاد إنشاؤه قبل حذفها
+        _rebuild_view(connection, remaining)
+    with connection.cursor() as cursor:
+        for partition in expired:
+            cursor.execute(f'DROP TABLE IF EXISTS {partition_name(partition)}')
+            _known.discard((connection.alias, partition))
+    return expired
@@ -0,0 +1,206 @@
+"""
+تسجيل أحداث النشاط بالدفعات
+- record() لا يكتب فوراً: الحدث يُضاف بعد نجاح المعاملة الحالية (on_commit)،
+  فلا تُسجل تغييرات تم التراجع عنها
+- ActivityBatchMiddleware يفتح دفعة لكل طلب ويكتبها في نهايته بإدراج واحد لكل شهر
+- خارج الطلبات (الأوامر والمستهلكون) يُكتب الحدث فوراً ما لم تُفتح دفعة بـ batch()
+- فشل الكتابة لا يُفشل الطلب، ويُكتفى بتسجيل تحذير
+"""
+import itertools
+import os
+import secrets
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import IntegrityError, connections, router, transaction
+from django.utils import timezone
+
+from . import partitions
+from .models import ActivityEvent
+
+# أحداث الدفعة الحالية؛ ContextVar وليس threading.local حتى تصل الدفعة المفتوحة في الوسيط غير المتزامن
+# إلى العروض المتزامنة التي تعمل في خيط آخر (sync_to_async ينسخ السياق)
+_pending = ContextVar('activity_pending', default=None)
+
+# معرفات مرتبة زمنياً: 41 بت للوقت بالمللي ثانية منذ 2020 + 10 بت للعملية + 12 بت تسلسل
+# الترتيب بالمعرف وحده يعطي ترتيب الوقت، ويمكن استنتاج وقت الحدث من معرفه
+EPOCH_MS = 1_577_836_800_000
+
+
+def _reset_worker():
+    """
+    بتات العملية عشوائية (وليست رقم العملية الذي يتكرر بين الخوادم)، وتُولد من جديد في كل عملية ناتجة عن fork
+    """
+    global _worker, _sequence
+    _worker = secrets.randbelow(0x400)
+    _sequence = itertools.count(secrets.randbelow(0x1000))
+
+
+_reset_worker()
+os.register_at_fork(after_in_child=_reset_worker)
+
+
+def make_id(at):
+    milliseconds = int(at.timestamp() * 1000) - EPOCH_MS
+    return (milliseconds << 22) | (_worker << 12) | (next(_sequence) & 0xFFF)
+
+
+def id_time(event_id):
+    """
+    وقت إنشاء الحدث (بدقة المللي ثانية) من معرفه
+    """
+    at = datetime.fromtimestamp(((event_id >> 22) + EPOCH_MS) / 1000, tz=dt_timezone.utc)
+    # بدون USE_TZ تُخزن الأوقات بالتوقيت المحلي دون منطقة زمنية، مثل timezone.now()
+    return at if settings.USE_TZ else timezone.make_naive(at)
+
+
+def id_time_upper_bound(event_id):
+    # الأحداث في نفس المللي ثانية قد يكون وقتها بعد بدايتها بأجزاء منها
+    return id_time(event_id) + timedelta(milliseconds=1)
+
+
+def record(verb, *, organization_id, target_type, target_id=None, project_id=None, actor=None, data=None):
+    """
+    تسجيل حدث نشاط بعد نجاح المعاملة الحالية
+    """
+    if organization_id is None:
+        return
+    now = timezone.now()
+    event = ActivityEvent(
+        id=make_id(now),
+        organization_id=organization_id,
+        project_id=project_id,
+        actor_id=actor.id if actor is not None and actor.is_authenticated else None,
+        verb=verb,
+        target_type=target_type,
+        target_id=target_id,
+        data=data or {},
+        created_at=now,
+    )
+    transaction.on_commit(lambda: _enqueue(event))
+
+
+def record_task(verb, task, actor, **data):
+    record(
+        verb,
+        organization_id=task.organization_id,
+        project_id=task.project_id,
+        target_type='task',
+        target_id=task.id,
+        actor=actor,
+        data=dict({'title': task.title}, **data),
+    )
+
+
+def record_project(verb, project, actor, **data):
+    record(
+        verb,
+        organization_id=project.organization_id,
+        project_id=project.id,
+        target_type='project',
+        target_id=project.id,
+        actor=actor,
+        data=dict({'title': project.title}, **data),
+    )
+
+
+def _enqueue(event):
+    pending = _pending.get()
+    if pending is None:
+        write([event])
+        return
+    pending.append(event)
+    if len(pending) >= getattr(settings, 'ACTIVITY_BATCH_SIZE', 500):
+        events = pending[:]
+        del pending[:]
+        write(events)
+
+
+def write(events):
+    """
+    كتابة الأحداث بإدراج واحد لكل شهر
+    """
+    if not events:
+        return
+    connection = connections[router.db_for_write(ActivityEvent)]
+    by_column = {field.column: field for field in ActivityEvent._meta.concrete_fields}
+    fields = [by_column[column] for column in partitions.COLUMNS]
+    by_month = {}
+    for event in events:
+        by_month.setdefault(partitions.month_start(event.created_at), []).append(event)
+
+    try:
+        with transaction.atomic(using=connection.alias):
+            for month, month_events in by_month.items():
+                _insert(connection, fields, month, month_events)
+    except IntegrityError:
+        # تكرار معرف (نادر): تُكتب الأحداث واحداً واحداً حتى لا تضيع الدفعة كلها
+        _write_each(connection, fields, by_month)
+    except Exception as e:
+        print(f"WARNING: خطأ في تسجيل أحداث النشاط: {str(e)}")
+
+
+def _insert(connection, fields, month, events):
+    table = partitions.table_for(connection, month)
+    placeholders = ', '.join(['%s'] * len(fields))
+    rows = [
+        [field.get_db_prep_save(getattr(event, field.attname), connection) for field in fields]
+        for event in events
+    ]
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            f'INSERT INTO {table} ({", ".join(partitions.COLUMNS)}) VALUES ({placeholders})',
+            rows
+        )
+
+
+def _write_each(connection, fields, by_month):
+    """
+    كتابة كل حدث في معاملته، مع معرف جديد للحدث الذي تكرر معرفه
+    """
+    for month, month_events in by_month.items():
+        for event in month_events:
+            for attempt in range(2):
+                try:
+                    with transaction.atomic(using=connection.alias):
+                        _insert(connection, fields, month, [event])
+                    break
+                except IntegrityError as e:
+                    if attempt:
+                        print(f"WARNING: خطأ في تسجيل حدث النشاط {event.id}: {str(e)}")
+                    else:
+                        event.id = make_id(event.created_at)
+                except Exception as e:
+                    print(f"WARNING: خطأ في تسجيل حدث النشاط {event.id}: {str(e)}")
+                    break
+
+
+def start_batch():
+    """
+    فتح دفعة جديدة؛ يُعاد (رمز الإغلاق، قائمة الأحداث) أو (None, None) إذا كانت هناك دفعة مفتوحة
+    """
+    if _pending.get() is not None:
+        return None, None
+    events = []
+    return _pending.set(events), events
+
+
+def end_batch(token):
+    if token is not None:
+        _pending.reset(token)
+
+
+@contextmanager
+def batch():
+    """
+    تجميع الأحداث المسجلة داخل الكتلة وكتابتها مرة واحدة في نهايتها
+    """
+    token, events = start_batch()
+    try:
+        yield
+    finally:
+        end_batch(token)
+        if events:
+            write(events)
@@ -0,0 +1,21 @@
+from rest_framework import serializers
+from .models import ActivityEvent
+from users.serializers import UserSummarySerializer
+from trello_backend.fieldsets import SparseFieldsetMixin
+
+
+class ActivityEventSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    # المعرفات أكبر من 2^53 فتفقد دقتها كأرقام في JavaScript، لذلك تُرسل كنص
+    id = serializers.CharField(read_only=True)
+    actor_detail = UserSummarySerializer(source='actor', read_only=True)
+
+    class Meta:
+        model = ActivityEvent
+        fields = [
+            'id', 'verb', 'target_type', 'target_id',
+            'organization', 'project', 'actor', 'actor_detail',
+            'data', 'created_at'
+        ]
+        read_only_fields = fields
+        expandable_fields = ['actor_detail']
+        related_fields = {'actor_detail': ('actor',)}
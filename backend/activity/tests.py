@@ -0,0 +1,51 @@
+import os
+from unittest import skipUnless
+
+from django.test import TransactionTestCase
+from django.utils import timezone
+
+from organizations.models import Organization
+
+from . import recorder
+from .models import ActivityEvent
+
+
+class ActivityWriteTests(TransactionTestCase):
+
+    def event(self, organization, event_id=None):
+        now = timezone.now()
+        return ActivityEvent(
+            id=event_id or recorder.make_id(now),
+            organization_id=organization.id,
+            verb='task.created',
+            target_type='task',
+            target_id=1,
+            data={},
+            created_at=now,
+        )
+
+    def test_duplicate_id_does_not_drop_batch(self):
+        organization = Organization.objects.create(name='Org', slug='org')
+        first = self.event(organization)
+        recorder.write([first])
+        duplicate = self.event(organization, event_id=first.id)
+        other = self.event(organization)
+        recorder.write([duplicate, other])
+        self.assertEqual(ActivityEvent.objects.count(), 3)
+        self.assertNotEqual(duplicate.id, first.id)
+
+    @skipUnless(hasattr(os, 'fork'), 'يتطلب fork')
+    def test_forked_processes_get_new_worker_bits(self):
+        workers = set()
+        for _ in range(3):
+            read_end, write_end = os.pipe()
+            pid = os.fork()
+            if pid == 0:
+                os.write(write_end, str(recorder._worker).encode())
+                os._exit(0)
+            os.close(write_end)
+            workers.add(int(os.read(read_end, 16)))
+            os.close(read_end)
+            os.waitpid(pid, 0)
+        # احتمال تطابق الثلاثة مع العملية الأم ضئيل جداً (10 بت عشوائية لكل عملية)
+        self.assertNotEqual(workers, {recorder._worker})
@@ -0,0 +1,56 @@
+from rest_framework import mixins, permissions, viewsets
+from rest_framework.exceptions import PermissionDenied
+from .models import ActivityEvent
+from .serializers import ActivityEventSerializer
+from . import recorder
+from trello_backend.access import get_project_org_ids, can_access_org
+from trello_backend.pagination import NewestFirstCursorPagination
+
+
+class ActivityCursorPagination(NewestFirstCursorPagination):
+    """
+    ترقيم بالمؤشر على المعرف (المرتب زمنياً)
+    الصفحات التالية تُقيد بحد أعلى لوقت الإنشاء مستنتج من المؤشر، فتستبعد القاعدة أقسام الأشهر الأحدث
+    """
+    ordering = ('-id',)
+    page_size = 30
+
+    def paginate_queryset(self, queryset, request, view=None):
+        cursor = self.decode_cursor(request)
+        if cursor is not None and cursor.position is not None and not cursor.reverse:
+            queryset = queryset.filter(created_at__lte=recorder.id_time_upper_bound(int(cursor.position)))
+        return super().paginate_queryset(queryset, request, view)
+
+
+class ActivityFeedViewSet(mixins.ListModelMixin, viewsets.GenericViewSet):
+    """
+    سجل نشاط المؤسسة أو المشروع (الأحدث أولاً)
+    - ?project=<id>: نشاط مشروع واحد
+    - ?organization=<id>: نشاط مؤسسة أخرى (لمالك النظام فقط)
+    - بدونهما: نشاط مؤسسة المستخدم
+    """
+    serializer_class = ActivityEventSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = ActivityCursorPagination
+
+    def get_queryset(self):
+        user = self.request.user
+        params = self.request.query_params
+        queryset = ActivityEvent.objects.all()
+
+        if params.get('project'):
+            try:
+                project_id = int(params['project'])
+            except ValueError:
+                return ActivityEvent.objects.none()
+            if not can_access_org(user, get_project_org_ids([project_id]).get(project_id)):
+                raise PermissionDenied("لا يمكنك الوصول إلى نشاط مشروع من مؤسسة أخرى")
+            queryset = queryset.filter(project_id=project_id)
+        elif params.get('organization') and user.is_system_owner:
+            queryset = queryset.filter(organization_id=params['organization'])
+        elif user.organization_id:
+            queryset = queryset.filter(organization_id=user.organization_id)
+        else:
+            return ActivityEvent.objects.none()
+
+        return ActivityEventSerializer.prepare_queryset(queryset, self.request)
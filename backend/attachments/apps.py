@@ -0,0 +1,12 @@
+from django.apps import AppConfig
+
+
+class AttachmentsConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'attachments'
+
+    def ready(self):
+        """
+        تسجيل إشارات التطبيق عند بدء تشغيله
+        """
+        import attachments.signals
@@ -0,0 +1,30 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from attachments.models import Attachment
+
+
+class Command(BaseCommand):
+    help = 'حذف المرفقات التي بدأ رفعها ولم يكتمل منذ عدد من الساعات (مع محتواها الجزئي)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--hours', type=int, default=getattr(settings, 'ATTACHMENTS_UPLOAD_EXPIRE_HOURS', 24),
+            help='عدد الساعات منذ بدء الرفع قبل اعتباره متروكاً'
+        )
+        parser.add_argument('--dry-run', action='store_true', help='عرض عدد المرفقات المرشحة دون حذفها')
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(hours=options['hours'])
+        # يستخدم الفهرس الجزئي للرفعات غير المكتملة
+        stale = Attachment.objects.filter(status='uploading', created_at__lt=cutoff)
+        if options['dry_run']:
+            self.stdout.write(f'عدد الرفعات المتروكة: {stale.count()}')
+            return
+
+        # الحذف عبر النماذج حتى تحذف الإشارات المحتوى من المخزن
+        deleted, _ = stale.delete()
+        self.stdout.write(self.style.SUCCESS(f'تم حذف {deleted} رفعاً متروكاً'))
@@ -0,0 +1,63 @@
+from django.db import models
+from organizations.models import Organization
+from tasks.models import Task
+from users.models import User
+
+
+class Attachment(models.Model):
+    """
+    ملف مرفق بمهمة
+    المحتوى في مخزن المرفقات (attachments.storage) باسم داخلي لا يعتمد على اسم الملف الأصلي،
+    ويُرفع على أجزاء: received عدد البايتات المحفوظة حتى الآن، ويكتمل الرفع عندما يساوي size
+    """
+    STATUS_CHOICES = (
+        ('uploading', 'Uploading'),
+        ('complete', 'Complete'),
+    )
+
+    task = models.ForeignKey(
+        Task,
+        on_delete=models.CASCADE,
+        related_name='attachments'
+    )
+    # مؤسسة المهمة (محفوظة مع المرفق للتحقق من العزل دون ربط المهمة)
+    organization = models.ForeignKey(
+        Organization,
+        on_delete=models.CASCADE,
+        related_name='attachments'
+    )
+    uploaded_by = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        related_name='attachments',
+        null=True,
+        blank=True
+    )
+    filename = models.CharField(max_length=255)
+    content_type = models.CharField(max_length=100, default='application/octet-stream')
+    size = models.BigIntegerField()
+    received = models.BigIntegerField(default=0)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='uploading')
+    storage_name = models.CharField(max_length=255, unique=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['created_at', 'id']
+        indexes = [
+            # مرفقات المهمة في استعلام واحد بترتيبها
+            models.Index(fields=['task', 'created_at']),
+            # حذف الرفعات غير المكتملة القديمة (purge_stale_uploads)
+            models.Index(
+                fields=['created_at'],
+                condition=models.Q(status='uploading'),
+                name='attachment_uploading_idx',
+            ),
+        ]
+
+    def __str__(self):
+        return self.filename
+
+    @property
+    def is_complete(self):
+        return self.status == 'complete'
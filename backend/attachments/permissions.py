@@ -0,0 +1,15 @@
+from rest_framework import permissions
+
+
+class CanDeleteAttachment(permissions.BasePermission):
+    """
+    حذف المرفق: من رفعه، أو مشرف مؤسسته، أو مالك النظام
+    """
+
+    def has_object_permission(self, request, view, obj):
+        user = request.user
+        if user.is_system_owner:
+            return True
+        if obj.uploaded_by_id == user.id:
+            return True
+        return user.is_admin and obj.organization_id == user.organization_id
@@ -0,0 +1,37 @@
+from rest_framework import serializers
+from django.conf import settings
+from .models import Attachment
+
+
+class AttachmentSerializer(serializers.ModelSerializer):
+    """
+    بيانات المرفق؛ الإنشاء يحجز المرفق فقط (الاسم والحجم والنوع)، والمحتوى يُرفع إلى content_url
+    """
+    content_url = serializers.HyperlinkedIdentityField(view_name='attachment-content')
+
+    class Meta:
+        model = Attachment
+        fields = [
+            'id', 'task', 'filename', 'content_type', 'size', 'received', 'status',
+            'uploaded_by', 'content_url', 'created_at', 'completed_at'
+        ]
+        read_only_fields = ['id', 'received', 'status', 'uploaded_by', 'created_at', 'completed_at']
+
+    def validate_task(self, task):
+        user = self.context['request'].user
+        if not user.is_system_owner and task.organization_id != user.organization_id:
+            raise serializers.ValidationError("لا يمكنك إرفاق ملفات بمهمة من مؤسسة أخرى")
+        return task
+
+    def validate_size(self, size):
+        max_size = getattr(settings, 'ATTACHMENTS_MAX_SIZE', 100 * 1024 * 1024)
+        if size < 0 or size > max_size:
+            raise serializers.ValidationError(f"حجم الملف يجب أن يكون بين 0 و{max_size} بايت")
+        return size
+
+    def validate_filename(self, filename):
+        # الاسم يُعرض ويُرسل في Content-Disposition فقط، ولا يُستخدم في مسار التخزين
+        filename = filename.replace('\\', '/').rsplit('/', 1)[-1].strip()
+        if not filename:
+            raise serializers.ValidationError("اسم الملف مطلوب")
+        return filename
@@ -0,0 +1,14 @@
+from django.db import transaction
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+from .models import Attachment
+from .storage import storage
+
+
+@receiver(post_delete, sender=Attachment)
+def delete_attachment_content(sender, instance, **kwargs):
+    """
+    حذف محتوى المرفق من المخزن بعد نجاح حذف صفه (ويشمل ذلك حذف المهمة أو المؤسسة)
+    """
+    name = instance.storage_name
+    transaction.on_commit(lambda: storage.delete(name))
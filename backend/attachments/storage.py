@@ -0,0 +1,65 @@
+"""
+مخزن محتوى المرفقات
+- الواجهة صغيرة وتدعم الكتابة من موضع محدد، وهو ما يحتاجه الرفع على أجزاء القابل للاستئناف
+  (واجهة Storage في Django تكتب الملف كاملاً فقط)
+- المخزن يُختار بالإعداد ATTACHMENTS_STORAGE (مسار الصنف)؛ المخزن المحلي هو الافتراضي وللاختبارات،
+  وأي مخزن آخر (S3 مثلاً) يوفر نفس التوابع
+- local_path() تعيد مسار الملف على القرص إذا كان محلياً، لتسليم التنزيل للخادم الوسيط (X-Sendfile)
+"""
+import os
+
+from django.conf import settings
+from django.utils.functional import SimpleLazyObject
+from django.utils.module_loading import import_string
+
+
+class LocalAttachmentStorage:
+    """
+    مرفقات على نظام الملفات المحلي تحت ATTACHMENTS_ROOT
+    """
+
+    def __init__(self, root=None):
+        self.root = os.path.abspath(root or settings.ATTACHMENTS_ROOT)
+
+    def local_path(self, name):
+        path = os.path.abspath(os.path.join(self.root, name))
+        # الأسماء يولدها الخادم، لكن يُمنع الخروج من المجلد الجذر احتياطاً
+        if os.path.commonpath([self.root, path]) != self.root:
+            raise ValueError(f"اسم مرفق غير صالح: {name}")
+        return path
+
+    def write(self, name, offset, chunks):
+        """
+        كتابة الأجزاء بدءاً من offset دون جمعها في الذاكرة؛ يعيد عدد البايتات المكتوبة
+        """
+        path = self.local_path(name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        written = 0
+        with open(path, 'r+b' if os.path.exists(path) else 'wb') as file:
+            file.seek(offset)
+            for chunk in chunks:
+                file.write(chunk)
+                written += len(chunk)
+        return written
+
+    def open(self, name):
+        return open(self.local_path(name), 'rb')
+
+    def size(self, name):
+        try:
+            return os.path.getsize(self.local_path(name))
+        except FileNotFoundError:
+            return 0
+
+    def delete(self, name):
+        try:
+            os.remove(self.local_path(name))
+        except FileNotFoundError:
+            pass
+
+
+def get_storage():
+    return import_string(getattr(settings, 'ATTACHMENTS_STORAGE', 'attachments.storage.LocalAttachmentStorage'))()
+
+
+storage = SimpleLazyObject(get_storage)
@@ -0,0 +1,109 @@
+import os
+import tempfile
+
+from django.test import override_settings
+from django.utils.functional import empty
+from rest_framework.test import APITestCase
+
+from organizations.models import Organization
+from projects.models import Project
+from tasks.models import Task
+from users.models import User
+
+from .models import Attachment
+from .storage import storage
+
+DATA = os.urandom(3000)
+
+
+class AttachmentApiTests(APITestCase):
+
+    def setUp(self):
+        root = tempfile.TemporaryDirectory()
+        self.addCleanup(root.cleanup)
+        settings_override = override_settings(ATTACHMENTS_ROOT=root.name, ATTACHMENTS_SENDFILE='')
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        # المخزن يُنشأ عند أول استخدام بمجلد الإعدادات الحالية
+        storage._wrapped = empty
+        self.addCleanup(setattr, storage, '_wrapped', empty)
+
+        self.organization = Organization.objects.create(name='Org', slug='org')
+        self.user = User.objects.create_user(username='member', password='x', organization=self.organization)
+        project = Project.objects.create(title='Board', owner=self.user, organization=self.organization)
+        self.task = Task.objects.create(title='Task', project=project, organization=self.organization)
+        self.client.force_authenticate(self.user)
+
+    def reserve(self, size=len(DATA)):
+        response = self.client.post(
+            '/api/attachments/',
+            {'task': self.task.id, 'filename': 'report.bin', 'size': size, 'content_type': 'application/octet-stream'},
+            format='json',
+        )
+        self.assertEqual(response.status_code, 201)
+        return response.data['id']
+
+    def put(self, attachment_id, start, end, body=None):
+        return self.client.put(
+            f'/api/attachments/{attachment_id}/content/',
+            DATA[start:end + 1] if body is None else body,
+            content_type='application/octet-stream',
+            HTTP_CONTENT_RANGE=f'bytes {start}-{end}/{len(DATA)}',
+        )
+
+    def upload(self):
+        attachment_id = self.reserve()
+        self.put(attachment_id, 0, len(DATA) - 1)
+        return attachment_id
+
+    def download(self, attachment_id, byte_range=None):
+        extra = {'HTTP_RANGE': byte_range} if byte_range else {}
+        return self.client.get(f'/api/attachments/{attachment_id}/content/', **extra)
+
+    def test_resumable_upload(self):
+        attachment_id = self.reserve()
+        response = self.put(attachment_id, 0, 999)
+        self.assertEqual((response.status_code, response.data['received'], response.data['status']), (200, 1000, 'uploading'))
+
+        response = self.put(attachment_id, 500, 1499)
+        self.assertEqual((response.status_code, response.data['received']), (409, 1000))
+
+        response = self.put(attachment_id, 1000, len(DATA) - 1)
+        self.assertEqual((response.status_code, response.data['status']), (200, 'complete'))
+        self.assertEqual(b''.join(self.download(attachment_id).streaming_content), DATA)
+
+    def test_body_length_must_match_content_range(self):
+        attachment_id = self.reserve()
+        response = self.put(attachment_id, 0, 999, body=DATA[:10])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(Attachment.objects.get(id=attachment_id).received, 0)
+
+    def test_download_incomplete_upload(self):
+        attachment_id = self.reserve()
+        self.put(attachment_id, 0, 999)
+        response = self.download(attachment_id)
+        self.assertEqual((response.status_code, response.data['received']), (409, 1000))
+
+    def test_range_requests(self):
+        attachment_id = self.upload()
+        size = len(DATA)
+        cases = [
+            ('bytes=-10', f'bytes {size - 10}-{size - 1}/{size}', DATA[-10:]),
+            ('bytes=2990-', f'bytes 2990-{size - 1}/{size}', DATA[2990:]),
+            ('bytes=100-199', f'bytes 100-199/{size}', DATA[100:200]),
+        ]
+        for byte_range, content_range, body in cases:
+            response = self.download(attachment_id, byte_range)
+            self.assertEqual((response.status_code, response['Content-Range']), (206, content_range))
+            self.assertEqual(b''.join(response.streaming_content), body)
+
+        response = self.download(attachment_id, f'bytes={size}-')
+        self.assertEqual((response.status_code, response['Content-Range']), (416, f'bytes */{size}'))
+
+    def test_other_organization_gets_404(self):
+        attachment_id = self.upload()
+        other = Organization.objects.create(name='Other', slug='other')
+        self.client.force_authenticate(User.objects.create_user(username='outsider', password='x', organization=other))
+        self.assertEqual(self.client.get(f'/api/attachments/{attachment_id}/').status_code, 404)
+        self.assertEqual(self.download(attachment_id).status_code, 404)
+        self.assertEqual(self.client.get(f'/api/attachments/?task={self.task.id}').data, [])
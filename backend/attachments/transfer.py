@@ -0,0 +1,157 @@
+"""
+نقل محتوى المرفقات عبر HTTP
+- الرفع: كل طلب PUT جزء من الملف مع ترويسة Content-Range، ويُكتب من جسم الطلب إلى المخزن
+  على كتل دون قراءة الجسم كاملاً
+- التنزيل: استجابة متدفقة على كتل، مع دعم Range (نطاق واحد) وحالة 206،
+  أو تسليمه للخادم الوسيط (X-Accel-Redirect لـ nginx أو X-Sendfile) حسب ATTACHMENTS_SENDFILE
+- تحت ASGI يُعاد مكرر غير متزامن، لأن Django يجمع المكرر المتزامن كاملاً في الذاكرة قبل إرساله
+"""
+import re
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import HttpResponse, StreamingHttpResponse
+from django.utils.http import content_disposition_header
+
+CONTENT_RANGE_RE = re.compile(r'^bytes (\d+)-(\d+)/(\d+)$')
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+
+def block_size():
+    return getattr(settings, 'ATTACHMENTS_STREAM_BLOCK_SIZE', 64 * 1024)
+
+
+def parse_content_range(value):
+    """
+    'bytes 0-1023/5000' -> (0، 1023، 5000)، أو None إذا كانت الترويسة غير صالحة
+    """
+    match = CONTENT_RANGE_RE.match((value or '').strip())
+    if not match:
+        return None
+    start, end, total = (int(group) for group in match.groups())
+    if start > end or end >= total:
+        return None
+    return start, end, total
+
+
+def parse_range(value, size):
+    """
+    نطاق واحد من ترويسة Range كـ (البداية، النهاية) شاملة، أو None لإرسال الملف كاملاً
+    (بدون الترويسة، أو بوحدة غير البايت، أو بعدة نطاقات)
+    """
+    if not value:
+        return None
+    match = RANGE_RE.match(value.strip())
+    if not match:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        # bytes=-N: آخر N بايت
+        length = int(last)
+        if length == 0:
+            raise RangeNotSatisfiable()
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        raise RangeNotSatisfiable()
+    return start, end
+
+
+def read_body(stream, length):
+    """
+    قراءة length بايت من جسم الطلب على كتل
+    """
+    remaining = length
+    while remaining > 0:
+        chunk = stream.read(min(block_size(), remaining))
+        if not chunk:
+            break
+        remaining -= len(chunk)
+        yield chunk
+
+
+def iter_file(storage, name, start, end):
+    with storage.open(name) as file:
+        file.seek(start)
+        remaining = end - start + 1
+        while remaining > 0:
+            chunk = file.read(min(block_size(), remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
+async def aiter_file(storage, name, start, end):
+    iterator = iter_file(storage, name, start, end)
+    try:
+        while True:
+            chunk = await sync_to_async(next, thread_sensitive=False)(iterator, None)
+            if chunk is None:
+                break
+            yield chunk
+    finally:
+        await sync_to_async(iterator.close, thread_sensitive=False)()
+
+
+def offload_response(storage, attachment):
+    """
+    استجابة فارغة يرسل الخادم الوسيط محتواها (ويعالج Range بنفسه)، أو None إذا لم يُضبط التسليم
+    """
+    mode = getattr(settings, 'ATTACHMENTS_SENDFILE', '')
+    if mode == 'x-accel-redirect':
+        response = HttpResponse(content_type=attachment.content_type)
+        response['X-Accel-Redirect'] = settings.ATTACHMENTS_ACCEL_PREFIX.rstrip('/') + '/' + attachment.storage_name
+        return response
+    if mode == 'x-sendfile':
+        local_path = getattr(storage, 'local_path', None)
+        if local_path is None:
+            return None
+        response = HttpResponse(content_type=attachment.content_type)
+        response['X-Sendfile'] = local_path(attachment.storage_name)
+        return response
+    return None
+
+
+def download_response(request, storage, attachment):
+    """
+    استجابة تنزيل المرفق: كاملاً (200) أو جزءاً منه (206)، أو 416 لنطاق خارج الملف
+    """
+    disposition = content_disposition_header(True, attachment.filename)
+    response = offload_response(storage, attachment)
+    if response is not None:
+        response['Content-Disposition'] = disposition
+        return response
+
+    size = attachment.size
+    try:
+        byte_range = parse_range(request.headers.get('Range'), size) if size else None
+    except RangeNotSatisfiable:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{size}'
+        return response
+
+    start, end = byte_range or (0, size - 1)
+    if isinstance(request, ASGIRequest) or isinstance(getattr(request, '_request', None), ASGIRequest):
+        content = aiter_file(storage, attachment.storage_name, start, end)
+    else:
+        content = iter_file(storage, attachment.storage_name, start, end)
+    response = StreamingHttpResponse(
+        content if size else iter(()),
+        status=206 if byte_range else 200,
+        content_type=attachment.content_type,
+    )
+    response['Content-Length'] = str(end - start + 1 if size else 0)
+    response['Accept-Ranges'] = 'bytes'
+    response['Content-Disposition'] = disposition
+    if byte_range:
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+    return response
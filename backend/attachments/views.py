@@ -0,0 +1,132 @@
+import uuid
+
+from django.conf import settings
+from django.utils import timezone
+from rest_framework import mixins, permissions, status, viewsets
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+
+from trello_backend.permissions import IsSameOrganization
+from .models import Attachment
+from .permissions import CanDeleteAttachment
+from .serializers import AttachmentSerializer
+from .storage import storage
+from .transfer import download_response, parse_content_range, read_body
+
+
+class AttachmentViewSet(mixins.CreateModelMixin, mixins.RetrieveModelMixin, mixins.ListModelMixin,
+                        mixins.DestroyModelMixin, viewsets.GenericViewSet):
+    """
+    وجهة API لمرفقات المهام
+    - GET ?task=<id>: بيانات مرفقات المهمة في استعلام واحد
+    - POST {task, filename, size, content_type}: حجز مرفق جديد
+    - PUT {id}/content/ مع Content-Range: رفع جزء من المحتوى بدءاً من received؛
+      عند انقطاع الرفع يقرأ العميل received من بيانات المرفق ويكمل منه
+    - GET {id}/content/: تنزيل المحتوى (يدعم Range)
+    العزل: المرفقات تُقرأ من مؤسسة المستخدم فقط، مع IsSameOrganization على كل مرفق
+    """
+    serializer_class = AttachmentSerializer
+
+    def get_queryset(self):
+        user = self.request.user
+        queryset = Attachment.objects.select_related('organization')
+        if not user.is_system_owner:
+            queryset = queryset.filter(organization_id=user.organization_id)
+        if self.action == 'list':
+            task_id = self.request.query_params.get('task')
+            if not task_id:
+                raise ValidationError({'task': 'معرف المهمة مطلوب'})
+            try:
+                queryset = queryset.filter(task_id=int(task_id))
+            except ValueError:
+                return Attachment.objects.none()
+        return queryset
+
+    def get_permissions(self):
+        base_permissions = [permissions.IsAuthenticated, IsSameOrganization]
+        if self.action == 'destroy':
+            permission_classes = base_permissions + [CanDeleteAttachment]
+        else:
+            permission_classes = base_permissions
+        return [permission() for permission in permission_classes]
+
+    def perform_create(self, serializer):
+        task = serializer.validated_data['task']
+        extra = {}
+        if serializer.validated_data['size'] == 0:
+            extra = {'status': 'complete', 'completed_at': timezone.now()}
+        serializer.save(
+            organization_id=task.organization_id,
+            uploaded_by=self.request.user,
+            # اسم داخلي عشوائي؛ اسم الملف الأصلي لا يدخل في مسار التخزين
+            storage_name=f'{task.organization_id}/{task.id}/{uuid.uuid4().hex}',
+            **extra
+        )
+
+    @action(detail=True, methods=['get', 'put'])
+    def content(self, request, pk=None):
+        """
+        رفع جزء من محتوى المرفق (PUT) أو تنزيله (GET)
+        """
+        attachment = self.get_object()
+        if request.method == 'PUT':
+            return self.upload_chunk(request, attachment)
+        if not attachment.is_complete:
+            return Response(
+                {"detail": "لم يكتمل رفع المرفق بعد", "received": attachment.received},
+                status=status.HTTP_409_CONFLICT
+            )
+        return download_response(request, storage, attachment)
+
+    def upload_chunk(self, request, attachment):
+        if attachment.uploaded_by_id != request.user.id:
+            return Response({"detail": "فقط من بدأ الرفع يمكنه إكماله"}, status=status.HTTP_403_FORBIDDEN)
+        if attachment.is_complete:
+            return Response(
+                {"detail": "اكتمل رفع المرفق", "received": attachment.received},
+                status=status.HTTP_409_CONFLICT
+            )
+
+        parsed = parse_content_range(request.headers.get('Content-Range'))
+        if parsed is None or parsed[2] != attachment.size:
+            return Response(
+                {"detail": f"ترويسة Content-Range مطلوبة بالصيغة bytes start-end/{attachment.size}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        start, end, _ = parsed
+        length = end - start + 1
+        if length > getattr(settings, 'ATTACHMENTS_MAX_CHUNK_SIZE', 8 * 1024 * 1024):
+            return Response({"detail": "حجم الجزء أكبر من المسموح"}, status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+        try:
+            content_length = int(request.META.get('CONTENT_LENGTH') or 0)
+        except ValueError:
+            content_length = 0
+        if content_length != length:
+            return Response({"detail": "طول الجسم لا يطابق Content-Range"}, status=status.HTTP_400_BAD_REQUEST)
+        if start != attachment.received:
+            # العميل يستأنف من received
+            return Response(
+                {"detail": "موضع الجزء لا يطابق ما تم رفعه", "received": attachment.received},
+                status=status.HTTP_409_CONFLICT
+            )
+
+        written = storage.write(attachment.storage_name, start, read_body(request.stream, length))
+        if written != length:
+            return Response(
+                {"detail": "انقطع الجزء قبل اكتماله", "received": attachment.received},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        updates = {'received': end + 1}
+        if end + 1 == attachment.size:
+            updates.update(status='complete', completed_at=timezone.now())
+        # تحديث مشروط: إذا سبق طلب آخر بنفس الجزء يُحتسب مرة واحدة
+        updated = Attachment.objects.filter(id=attachment.id, status='uploading', received=start).update(**updates)
+        attachment.refresh_from_db(fields=['received', 'status', 'completed_at'])
+        if not updated:
+            return Response(
+                {"detail": "موضع الجزء لا يطابق ما تم رفعه", "received": attachment.received},
+                status=status.HTTP_409_CONFLICT
+            )
+        return Response({'id': attachment.id, 'received': attachment.received, 'status': attachment.status})
@@ -0,0 +1,13 @@
+from django.apps import AppConfig
+
+
+class JobsConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'jobs'
+
+    def ready(self):
+        """
+        تحميل وحدات jobs.py في التطبيقات المثبتة حتى تُسجل معالجات المهام في كل عملية (ومنها العمال)
+        """
+        from django.utils.module_loading import autodiscover_modules
+        autodiscover_modules('jobs')
@@ -0,0 +1,30 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from jobs import metrics
+
+
+class Command(BaseCommand):
+    help = 'عرض مقاييس طابور المهام الخلفية (المنتظرة والجارية والمنتهية وتأخر الطابور وزمن التنفيذ)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--window', type=int, default=60, help='نافذة المهام المنتهية بالدقائق')
+        parser.add_argument('--json', action='store_true', help='إخراج المقاييس بصيغة JSON')
+
+    def handle(self, *args, **options):
+        data = metrics.snapshot(options['window'])
+        if options['json']:
+            self.stdout.write(json.dumps(data, ensure_ascii=False))
+            return
+
+        if not data['jobs']:
+            self.stdout.write('لا توجد مهام في الطابور')
+            return
+        for name, row in data['jobs'].items():
+            self.stdout.write(
+                f"{name}: منتظرة {row['queued']} (مستحقة {row['due']}، إعادة محاولة {row['retrying']})، "
+                f"جارية {row['running']}، خلال {data['window_minutes']} دقيقة: نجحت {row['succeeded']} "
+                f"وفشلت {row['failed']}، متوسط {row['avg_ms']}ms وأقصى {row['max_ms']}ms"
+            )
+        self.stdout.write(f"تأخر الطابور: {data['lag_seconds']} ثانية")
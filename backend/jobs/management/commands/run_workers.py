@@ -0,0 +1,135 @@
+import multiprocessing
+import os
+import signal
+import socket
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from jobs import metrics, worker
+
+
+def _worker_main(index, stop_event, options):
+    """
+    نقطة دخول عملية العامل
+    """
+    import django
+    from django.apps import apps
+    if not apps.ready:
+        # عند بدء العمليات بـ spawn (غير Linux) تحتاج كل عملية لتهيئة Django
+        django.setup()
+
+    # الإيقاف يديره المشرف عبر stop_event، فيُتجاهل Ctrl+C هنا حتى تكتمل المهمة الجارية
+    # معالج الإشارة يغير قائمة محلية فقط؛ استدعاء stop_event.set() داخله قد ينتظر قفلاً يحمله الخيط نفسه
+    terminated = []
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, lambda *args: terminated.append(True))
+
+    worker_id = f'{socket.gethostname()}:{os.getpid()}:{index}'
+    processed = worker.work(
+        worker_id,
+        lambda: bool(terminated) or stop_event.is_set(),
+        batch_size=options['batch_size'],
+        poll_interval=options['poll_interval'],
+    )
+    print(f"DEBUG: العامل {worker_id} توقف بعد تنفيذ {processed} مهمة")
+
+
+class Command(BaseCommand):
+    help = 'تشغيل عمال المهام الخلفية (طابور jobs) في مجموعة عمليات'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--concurrency', type=int, default=getattr(settings, 'JOBS_CONCURRENCY', 2),
+            help='عدد عمليات العمال (كل عملية تنفذ مهمة واحدة في كل مرة)'
+        )
+        parser.add_argument(
+            '--poll-interval', type=float, default=getattr(settings, 'JOBS_POLL_INTERVAL', 1.0),
+            help='مدة الانتظار (بالثواني) قبل البحث عن مهام جديدة عند فراغ الطابور'
+        )
+        parser.add_argument('--batch-size', type=int, default=5, help='عدد المهام التي يحجزها العامل في كل مرة')
+        parser.add_argument(
+            '--metrics-interval', type=float, default=60,
+            help='الفاصل (بالثواني) بين طباعة مقاييس الطابور، 0 لإيقافها'
+        )
+        parser.add_argument('--once', action='store_true', help='تنفيذ المهام المستحقة في هذه العملية ثم الخروج')
+
+    def handle(self, *args, **options):
+        if not getattr(settings, 'JOBS_ENABLED', False):
+            self.stdout.write(self.style.WARNING(
+                'JOBS_ENABLED غير مفعل: المهام تُنفذ داخل الطلبات ولن يُضاف شيء إلى الطابور'
+            ))
+
+        worker.recover_stale()
+        if options['once']:
+            processed = worker.work(
+                f'{socket.gethostname()}:{os.getpid()}:once',
+                lambda: False,
+                batch_size=options['batch_size'],
+                exit_when_idle=True,
+            )
+            self.stdout.write(self.style.SUCCESS(f'تم تنفيذ {processed} مهمة'))
+            return
+
+        self.supervise(options)
+
+    def supervise(self, options):
+        """
+        تشغيل العمال ومراقبتهم: إعادة تشغيل من يتوقف منهم، واستعادة المهام العالقة وحذف المنتهية دورياً
+        """
+        stop_event = multiprocessing.Event()
+        # اتصالات قاعدة البيانات لا تُشارك بين العمليات، فتُغلق قبل إنشاء العمال
+        connections.close_all()
+
+        def start(index):
+            process = multiprocessing.Process(
+                target=_worker_main, args=(index, stop_event, options), name=f'jobs-worker-{index}', daemon=True
+            )
+            process.start()
+            return process
+
+        processes = [start(index) for index in range(max(options['concurrency'], 1))]
+
+        stopping = []
+        signal.signal(signal.SIGINT, lambda *args: stopping.append(True))
+        signal.signal(signal.SIGTERM, lambda *args: stopping.append(True))
+        self.stdout.write(self.style.SUCCESS(f'بدأ {len(processes)} عامل (PID {os.getpid()})'))
+
+        maintenance_at = metrics_at = time.monotonic()
+        while True:
+            time.sleep(1)
+            if stopping:
+                break
+            for index, process in enumerate(processes):
+                if not process.is_alive():
+                    print(f"WARNING: العامل {process.name} توقف (رمز الخروج {process.exitcode})، تتم إعادة تشغيله")
+                    processes[index] = start(index)
+
+            now = time.monotonic()
+            if now - maintenance_at >= 60:
+                maintenance_at = now
+                requeued, failed = worker.recover_stale()
+                purged = worker.purge_finished()
+                if requeued or failed or purged:
+                    print(f"DEBUG: مهام مستعادة: {requeued}، فاشلة لتوقف عاملها: {failed}، محذوفة: {purged}")
+                connections.close_all()
+            if options['metrics_interval'] and now - metrics_at >= options['metrics_interval']:
+                metrics_at = now
+                self.print_metrics()
+                connections.close_all()
+
+        self.stdout.write('إيقاف العمال بعد إكمال المهام الجارية...')
+        stop_event.set()
+        for process in processes:
+            process.join()
+
+    def print_metrics(self):
+        data = metrics.snapshot()
+        for name, row in data['jobs'].items():
+            print(
+                f"DEBUG: {name}: منتظرة {row['queued']} (مستحقة {row['due']}، تأخر {row['lag_seconds']}ث)، "
+                f"جارية {row['running']}، نجحت {row['succeeded']}، فشلت {row['failed']}، "
+                f"متوسط {row['avg_ms']}ms"
+            )
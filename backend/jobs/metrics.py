@@ -0,0 +1,43 @@
+"""
+مقاييس الطابور من جدول Job نفسه (بدون خدمات خارجية)
+"""
+from datetime import timedelta
+
+from django.db.models import Avg, Count, Max, Min, Q
+from django.utils import timezone
+
+from .models import Job
+
+
+def snapshot(window_minutes=60):
+    """
+    لكل مهمة: عدد المنتظرة والجارية والمنتهية، ومتوسط وأقصى زمن التنفيذ وعدد الإخفاقات خلال النافذة،
+    مع تأخر الطابور (عمر أقدم مهمة مستحقة لم تُنفذ)
+    """
+    now = timezone.now()
+    since = now - timedelta(minutes=window_minutes)
+    rows = Job.objects.values('name').annotate(
+        queued=Count('id', filter=Q(status='queued')),
+        due=Count('id', filter=Q(status='queued', run_at__lte=now)),
+        running=Count('id', filter=Q(status='running')),
+        succeeded=Count('id', filter=Q(status='succeeded', finished_at__gte=since)),
+        failed=Count('id', filter=Q(status='failed', finished_at__gte=since)),
+        retrying=Count('id', filter=Q(status='queued', attempts__gt=0)),
+        avg_ms=Avg('duration_ms', filter=Q(status='succeeded', finished_at__gte=since)),
+        max_ms=Max('duration_ms', filter=Q(status='succeeded', finished_at__gte=since)),
+        oldest_due=Min('run_at', filter=Q(status='queued', run_at__lte=now)),
+    ).order_by('name')
+
+    jobs = {}
+    for row in rows:
+        oldest_due = row.pop('oldest_due')
+        name = row.pop('name')
+        row['lag_seconds'] = round((now - oldest_due).total_seconds(), 1) if oldest_due else 0.0
+        row['avg_ms'] = round(row['avg_ms'], 1) if row['avg_ms'] is not None else None
+        jobs[name] = row
+
+    return {
+        'window_minutes': window_minutes,
+        'jobs': jobs,
+        'lag_seconds': max((row['lag_seconds'] for row in jobs.values()), default=0.0),
+    }
@@ -0,0 +1,46 @@
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models
+from django.db.models import Q
+from django.utils import timezone
+
+
+class Job(models.Model):
+    """
+    مهمة خلفية محفوظة في قاعدة البيانات ينفذها أمر run_workers
+    """
+    STATUS_CHOICES = (
+        ('queued', 'في الانتظار'),
+        ('running', 'قيد التنفيذ'),
+        ('succeeded', 'نجحت'),
+        ('failed', 'فشلت'),
+    )
+
+    name = models.CharField(max_length=100)
+    payload = models.JSONField(default=dict, encoder=DjangoJSONEncoder)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='queued')
+    # لا تُنفذ المهمة قبل هذا الوقت (يُؤخر عند إعادة المحاولة)
+    run_at = models.DateTimeField(default=timezone.now)
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=5)
+    # مفتاح اختياري يمنع إضافة نفس المهمة مرتين
+    idempotency_key = models.CharField(max_length=200, null=True, blank=True, unique=True)
+    locked_by = models.CharField(max_length=100, blank=True)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    duration_ms = models.PositiveIntegerField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['run_at', 'id']
+        indexes = [
+            # استعلام العمال عن المهام المستحقة يمر على المهام المنتظرة فقط
+            models.Index(fields=['run_at', 'id'], name='job_due_idx', condition=Q(status='queued')),
+            # استعادة المهام العالقة عند توقف عامل أثناء تنفيذها
+            models.Index(fields=['locked_at'], name='job_running_idx', condition=Q(status='running')),
+            # حذف المهام المنتهية القديمة
+            models.Index(fields=['finished_at'], name='job_finished_idx', condition=Q(status__in=['succeeded', 'failed'])),
+        ]
+
+    def __str__(self):
+        return f"{self.name} #{self.id} ({self.status})"
@@ -0,0 +1,97 @@
+"""
+طابور المهام الخلفية
+- المعالجات تُسجل بالمزخرف job() في وحدة jobs.py داخل أي تطبيق
+- enqueue() تضيف المهمة بعد نجاح المعاملة الحالية (on_commit)، فلا تُنفذ آثار تغيير تم التراجع عنه
+  ولا يقرأ العامل بيانات لم تُحفظ بعد
+- JOBS_ENABLED=False (الافتراضي): تُنفذ المهمة مباشرة بعد نجاح المعاملة داخل نفس العملية
+- JOBS_ENABLED=True: تُحفظ في جدول Job وينفذها manage.py run_workers مع إعادة المحاولة
+"""
+import random
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from .models import Job
+
+# {اسم المهمة: (الدالة، الحد الأقصى للمحاولات)}
+_handlers = {}
+
+
+def job(name, max_attempts=None):
+    """
+    تسجيل دالة كمعالج لمهمة؛ تُستدعى بمحتوى المهمة كوسائط مسماة
+    """
+    def register(function):
+        _handlers[name] = (function, max_attempts)
+        return function
+    return register
+
+
+def get_handler(name):
+    handler = _handlers.get(name)
+    return handler[0] if handler else None
+
+
+def registered_jobs():
+    return sorted(_handlers)
+
+
+def enqueue(name, payload=None, *, idempotency_key=None, delay=None, max_attempts=None):
+    """
+    إضافة مهمة بعد نجاح المعاملة الحالية
+    payload يجب أن يكون قابلاً للتحويل إلى JSON عند تفعيل الطابور
+    """
+    if name not in _handlers:
+        raise ValueError(f"مهمة غير مسجلة: {name}")
+    payload = payload or {}
+    if getattr(settings, 'JOBS_ENABLED', False):
+        transaction.on_commit(lambda: _save(name, payload, idempotency_key, delay, max_attempts))
+    else:
+        transaction.on_commit(lambda: run_inline(name, payload))
+
+
+def _save(name, payload, idempotency_key, delay, max_attempts):
+    if max_attempts is None:
+        max_attempts = _handlers[name][1] or getattr(settings, 'JOBS_MAX_ATTEMPTS', 5)
+    run_at = timezone.now()
+    if delay:
+        run_at += timedelta(seconds=delay)
+    job = Job(
+        name=name,
+        payload=payload,
+        run_at=run_at,
+        max_attempts=max_attempts,
+        idempotency_key=idempotency_key,
+    )
+    if idempotency_key is None:
+        job.save()
+        return job
+    # مفتاح مكرر: المهمة موجودة مسبقاً (أو أضافتها عملية أخرى في نفس اللحظة)
+    try:
+        with transaction.atomic():
+            job.save()
+        return job
+    except IntegrityError:
+        return Job.objects.filter(idempotency_key=idempotency_key).first()
+
+
+def run_inline(name, payload):
+    """
+    تنفيذ المهمة مباشرة (بدون طابور)؛ الفشل لا يُفشل الطلب
+    """
+    try:
+        get_handler(name)(**payload)
+    except Exception as e:
+        print(f"WARNING: خطأ في تنفيذ المهمة {name}: {str(e)}")
+
+
+def retry_delay(attempts):
+    """
+    مدة الانتظار قبل المحاولة التالية: تتضاعف مع كل محاولة حتى JOBS_RETRY_MAX_DELAY،
+    مع تفاوت عشوائي حتى لا تعود المهام الفاشلة معاً في نفس اللحظة
+    """
+    base = getattr(settings, 'JOBS_RETRY_BACKOFF', 2) * (2 ** max(attempts - 1, 0))
+    delay = min(base, getattr(settings, 'JOBS_RETRY_MAX_DELAY', 600))
+    return delay * random.uniform(0.8, 1.2)
@@ -0,0 +1,93 @@
+from datetime import timedelta
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from .models import Job
+from .queue import _save, job
+from .worker import claim, execute, recover_stale
+
+calls = []
+
+
+@job('tests.record')
+def record(**payload):
+    calls.append(payload)
+
+
+@job('tests.fail', max_attempts=2)
+def fail(**payload):
+    raise RuntimeError('boom')
+
+
+class WorkerTests(TestCase):
+
+    def setUp(self):
+        calls.clear()
+
+    def test_claim_locks_due_jobs_once(self):
+        due = Job.objects.create(name='tests.record')
+        Job.objects.create(name='tests.record', run_at=timezone.now() + timedelta(hours=1))
+        claimed = claim('w1', limit=5)
+        self.assertEqual([item.id for item in claimed], [due.id])
+        self.assertEqual((claimed[0].status, claimed[0].locked_by, claimed[0].attempts), ('running', 'w1', 1))
+        self.assertEqual(claim('w2', limit=5), [])
+
+    def test_execute_success(self):
+        Job.objects.create(name='tests.record', payload={'x': 1})
+        self.assertTrue(execute(claim('w1')[0]))
+        self.assertEqual(calls, [{'x': 1}])
+        done = Job.objects.get()
+        self.assertEqual((done.status, done.locked_by), ('succeeded', ''))
+        self.assertIsNotNone(done.finished_at)
+
+    @override_settings(JOBS_RETRY_BACKOFF=10)
+    def test_execute_failure_retries_with_backoff_then_fails(self):
+        _save('tests.fail', {}, None, None, None)
+        before = timezone.now()
+        self.assertFalse(execute(claim('w1')[0]))
+        retried = Job.objects.get()
+        self.assertEqual(retried.status, 'queued')
+        self.assertIn('boom', retried.last_error)
+        self.assertGreaterEqual(retried.run_at, before + timedelta(seconds=8))
+
+        Job.objects.update(run_at=timezone.now())
+        self.assertFalse(execute(claim('w1')[0]))
+        failed = Job.objects.get()
+        self.assertEqual((failed.status, failed.attempts), ('failed', 2))
+
+    def test_execute_unknown_handler_fails_without_retry(self):
+        Job.objects.create(name='tests.missing')
+        self.assertFalse(execute(claim('w1')[0]))
+        self.assertEqual(Job.objects.get().status, 'failed')
+
+    @override_settings(JOBS_LOCK_TIMEOUT=60)
+    def test_recover_stale(self):
+        old = timezone.now() - timedelta(seconds=120)
+        stale = Job.objects.create(name='tests.record', status='running', locked_by='w1', locked_at=old, attempts=1)
+        exhausted = Job.objects.create(
+            name='tests.record', status='running', locked_by='w1', locked_at=old, attempts=5, max_attempts=5,
+        )
+        fresh = Job.objects.create(name='tests.record', status='running', locked_by='w2', locked_at=timezone.now(), attempts=1)
+        self.assertEqual(recover_stale(), (1, 1))
+        stale.refresh_from_db()
+        exhausted.refresh_from_db()
+        fresh.refresh_from_db()
+        self.assertEqual((stale.status, stale.locked_by), ('queued', ''))
+        self.assertEqual(exhausted.status, 'failed')
+        self.assertEqual(fresh.status, 'running')
+
+
+class QueueTests(TestCase):
+
+    def test_save_with_duplicate_idempotency_key_returns_existing_job(self):
+        first = _save('tests.record', {'x': 1}, 'key-1', None, None)
+        second = _save('tests.record', {'x': 2}, 'key-1', None, None)
+        self.assertEqual(first.id, second.id)
+        self.assertEqual(Job.objects.count(), 1)
+        self.assertEqual(Job.objects.get().payload, {'x': 1})
+
+    def test_save_uses_handler_max_attempts_and_delay(self):
+        saved = _save('tests.fail', {}, None, 60, None)
+        self.assertEqual(saved.max_attempts, 2)
+        self.assertGreater(saved.run_at, timezone.now() + timedelta(seconds=50))
@@ -0,0 +1,126 @@
+"""
+تنفيذ المهام المحفوظة في جدول Job
+- حجز المهام يتم بتحديث مشروط (status='queued') فلا ينفذ عاملان نفس المهمة،
+  وفي PostgreSQL تُتخطى الصفوف المحجوزة (SKIP LOCKED) بدلاً من انتظارها
+- المهمة الفاشلة تعود للانتظار بتأخير متزايد حتى تستنفد max_attempts فتصبح failed
+- المهام التي توقف عاملها أثناء تنفيذها تُستعاد بعد JOBS_LOCK_TIMEOUT
+"""
+import time
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Job
+from .queue import get_handler, retry_delay
+
+
+def claim(worker_id, limit=1):
+    """
+    حجز حتى limit من المهام المستحقة لهذا العامل
+    """
+    now = timezone.now()
+    due = Job.objects.filter(status='queued', run_at__lte=now).order_by('run_at', 'id')
+    claim_fields = {'status': 'running', 'locked_by': worker_id, 'locked_at': now, 'attempts': F('attempts') + 1}
+
+    if connection.features.has_select_for_update_skip_locked:
+        with transaction.atomic():
+            ids = list(due.select_for_update(skip_locked=True).values_list('id', flat=True)[:limit])
+            Job.objects.filter(id__in=ids).update(**claim_fields)
+    else:
+        # عمال آخرون قد يحجزون نفس المرشحين، فيُؤخذ ما نجح تحديثه فقط
+        ids = []
+        for job_id in due.values_list('id', flat=True)[:limit * 4]:
+            if Job.objects.filter(id=job_id, status='queued').update(**claim_fields):
+                ids.append(job_id)
+                if len(ids) >= limit:
+                    break
+    return list(Job.objects.filter(id__in=ids).order_by('run_at', 'id'))
+
+
+def execute(job):
+    """
+    تنفيذ مهمة محجوزة وتسجيل نتيجتها؛ يعيد True عند النجاح
+    """
+    handler = get_handler(job.name)
+    started = time.monotonic()
+    try:
+        if handler is None:
+            raise LookupError(f"مهمة غير مسجلة: {job.name}")
+        handler(**job.payload)
+    except Exception as e:
+        elapsed = int((time.monotonic() - started) * 1000)
+        error = ''.join(traceback.format_exception(type(e), e, e.__traceback__))[-4000:]
+        if handler is not None and job.attempts < job.max_attempts:
+            delay = retry_delay(job.attempts)
+            Job.objects.filter(id=job.id).update(
+                status='queued', run_at=timezone.now() + timedelta(seconds=delay),
+                locked_by='', locked_at=None, last_error=error, duration_ms=elapsed,
+            )
+            print(f"WARNING: فشلت المهمة {job} (المحاولة {job.attempts}/{job.max_attempts})، إعادة المحاولة بعد {delay:.1f} ثانية: {str(e)}")
+        else:
+            Job.objects.filter(id=job.id).update(
+                status='failed', finished_at=timezone.now(),
+                locked_by='', locked_at=None, last_error=error, duration_ms=elapsed,
+            )
+            print(f"ERROR: فشلت المهمة {job} نهائياً بعد {job.attempts} محاولة: {str(e)}")
+        return False
+
+    Job.objects.filter(id=job.id).update(
+        status='succeeded', finished_at=timezone.now(), locked_by='', locked_at=None,
+        duration_ms=int((time.monotonic() - started) * 1000),
+    )
+    return True
+
+
+def recover_stale():
+    """
+    إعادة المهام العالقة (توقف عاملها) إلى الانتظار، أو إفشالها إذا استنفدت محاولاتها
+    """
+    cutoff = timezone.now() - timedelta(seconds=getattr(settings, 'JOBS_LOCK_TIMEOUT', 300))
+    stale = Job.objects.filter(status='running', locked_at__lt=cutoff)
+    failed = stale.filter(attempts__gte=F('max_attempts')).update(
+        status='failed', finished_at=timezone.now(), locked_by='', locked_at=None,
+        last_error='توقف العامل أثناء تنفيذ المهمة',
+    )
+    requeued = stale.update(status='queued', run_at=timezone.now(), locked_by='', locked_at=None)
+    return requeued, failed
+
+
+def purge_finished():
+    """
+    حذف المهام المنتهية الأقدم من JOBS_KEEP_FINISHED_HOURS (ومعها مفاتيح عدم التكرار الخاصة بها)
+    """
+    cutoff = timezone.now() - timedelta(hours=getattr(settings, 'JOBS_KEEP_FINISHED_HOURS', 24))
+    deleted, _ = Job.objects.filter(status__in=['succeeded', 'failed'], finished_at__lt=cutoff).delete()
+    return deleted
+
+
+def work(worker_id, should_stop, batch_size=10, poll_interval=1.0, exit_when_idle=False):
+    """
+    حلقة العامل: حجز دفعة وتنفيذها، والانتظار poll_interval عند عدم وجود مهام
+    should_stop دالة تعيد True لإنهاء الحلقة بعد المهمة الحالية
+    """
+    processed = 0
+    while not should_stop():
+        close_old_connections()
+        jobs = claim(worker_id, batch_size)
+        if not jobs:
+            if exit_when_idle:
+                break
+            time.sleep(poll_interval)
+            continue
+        for index, job in enumerate(jobs):
+            execute(job)
+            processed += 1
+            if should_stop():
+                # المهام المحجوزة التي لم تبدأ تعود للانتظار دون احتساب محاولة
+                remaining = [pending.id for pending in jobs[index + 1:]]
+                Job.objects.filter(id__in=remaining, status='running', locked_by=worker_id).update(
+                    status='queued', locked_by='', locked_at=None, attempts=F('attempts') - 1,
+                )
+                break
+    return processed
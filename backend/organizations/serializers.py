@@ -1,8 +1,9 @@
 from rest_framework import serializers
 from .models import Organization
+from trello_backend.fieldsets import SparseFieldsetMixin
 
 
-class OrganizationSerializer(serializers.ModelSerializer):
+class OrganizationSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     class Meta:
         model = Organization
         fields = ['id', 'name', 'slug', 'created_at']
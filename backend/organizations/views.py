@@ -56,7 +56,7 @@ class OrganizationViewSet(viewsets.ModelViewSet):
             return Response({"error": "لا يمكنك الوصول إلى مشاريع مؤسسة أخرى"}, status=status.HTTP_403_FORBIDDEN)
         
         # جلب مشاريع المؤسسة
-        projects = Project.objects.filter(organization=organization)
+        projects = Project.objects.filter(organization=organization).select_related('stats')
         serializer = ProjectSerializer(projects, many=True)
         
         return Response(serializer.data)
@@ -0,0 +1,45 @@
+from django.core.management.base import BaseCommand, CommandError
+from projects import stats
+
+
+class Command(BaseCommand):
+    help = 'إعادة حساب إحصائيات المشاريع على دفعات أو التحقق من انحرافها عن العدّ الفعلي'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help='عدد المشاريع في كل دفعة')
+        parser.add_argument('--project', type=int, action='append', dest='projects', help='معرف مشروع محدد (يمكن تكراره)')
+        parser.add_argument('--verify', action='store_true', help='التحقق من الانحراف فقط دون تعديل')
+        parser.add_argument('--fix', action='store_true', help='مع --verify: إصلاح المشاريع المنحرفة فقط')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        project_ids = options['projects']
+
+        if options['verify']:
+            drifted = []
+            for ids in stats.iter_project_batches(batch_size, project_ids):
+                for project_id, stored, actual in stats.find_drift(ids):
+                    drifted.append(project_id)
+                    self.stdout.write(self.style.WARNING(
+                        f'انحراف في المشروع {project_id}: المخزن={stored} الفعلي={actual}'
+                    ))
+
+            if not drifted:
+                self.stdout.write(self.style.SUCCESS('جميع إحصائيات المشاريع مطابقة'))
+                return
+
+            if options['fix']:
+                for start in range(0, len(drifted), batch_size):
+                    stats.rebuild(drifted[start:start + batch_size])
+                self.stdout.write(self.style.SUCCESS(f'تم إصلاح إحصائيات {len(drifted)} مشروع'))
+                return
+
+            raise CommandError(f'تم العثور على انحراف في {len(drifted)} مشروع')
+
+        total = 0
+        for ids in stats.iter_project_batches(batch_size, project_ids):
+            stats.rebuild(ids)
+            total += len(ids)
+            self.stdout.write(f'تمت إعادة حساب {total} مشروع...')
+
+        self.stdout.write(self.style.SUCCESS(f'تمت إعادة حساب إحصائيات {total} مشروع بنجاح'))
@@ -3,28 +3,47 @@
 """
 import json
 import traceback
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
 from django.http import JsonResponse
 from django.conf import settings
 
 class ProjectErrorMiddleware:
     """
     وسيط لمعالجة الأخطاء في تطبيق المشاريع
+    يعمل بالوضعين المتزامن وغير المتزامن حتى لا يُجبر العروض غير المتزامنة على المرور بخيط
     """
+    sync_capable = True
+    async_capable = True
+
     def __init__(self, get_response):
         self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
 
     def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
         # معالجة الطلب
         try:
             response = self.get_response(request)
             return response
         except Exception as e:
-            # تسجيل الخطأ
-            print(f"ERROR: حدث خطأ أثناء معالجة الطلب: {str(e)}")
-            print(traceback.format_exc())
-            
-            # إرجاع استجابة خطأ
-            return JsonResponse({
-                'error': 'حدث خطأ أثناء معالجة الطلب',
-                'details': str(e)
-            }, status=500)
+            return self.error_response(e)
+
+    async def __acall__(self, request):
+        try:
+            return await self.get_response(request)
+        except Exception as e:
+            return self.error_response(e)
+
+    @staticmethod
+    def error_response(e):
+        # تسجيل الخطأ
+        print(f"ERROR: حدث خطأ أثناء معالجة الطلب: {str(e)}")
+        print(traceback.format_exc())
+        
+        # إرجاع استجابة خطأ
+        return JsonResponse({
+            'error': 'حدث خطأ أثناء معالجة الطلب',
+            'details': str(e)
+        }, status=500)
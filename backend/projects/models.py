@@ -21,3 +21,34 @@ class Project(models.Model):
 
     def __str__(self):
         return self.title
+
+
+class ProjectStats(models.Model):
+    """
+    إحصائيات المشروع المحسوبة مسبقاً
+    يتم تحديثها بزيادات ونقصانات بسيطة عند إنشاء المهام وتعديلها وحذفها
+    بدلاً من إعادة عدّ المهام عند كل قراءة
+    """
+    STATUS_FIELDS = ('todo', 'in_progress', 'done')
+
+    project = models.OneToOneField(
+        Project,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='stats'
+    )
+    total = models.IntegerField(default=0)
+    todo = models.IntegerField(default=0)
+    in_progress = models.IntegerField(default=0)
+    done = models.IntegerField(default=0)
+    last_activity_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f'إحصائيات {self.project_id}'
+
+    @property
+    def completion_percentage(self):
+        return int((self.done / self.total) * 100) if self.total > 0 else 0
+
+    def as_counts(self):
+        return {field: getattr(self, field) for field in ('total',) + self.STATUS_FIELDS}
@@ -1,10 +1,11 @@
 from rest_framework import serializers
-from .models import Project
+from .models import Project, ProjectStats
 from users.serializers import UserSerializer
 from organizations.serializers import OrganizationSerializer
+from trello_backend.fieldsets import SparseFieldsetMixin
 
 
-class ProjectSerializer(serializers.ModelSerializer):
+class ProjectSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     owner_detail = UserSerializer(source='owner', read_only=True)
     organization_detail = OrganizationSerializer(source='organization', read_only=True)
     tasks_count = serializers.SerializerMethodField(read_only=True)
@@ -18,11 +19,33 @@ class ProjectSerializer(serializers.ModelSerializer):
             'tasks_count', 'completion_percentage'
         ]
         read_only_fields = ['id', 'owner', 'organization', 'created_at', 'updated_at', 'tasks_count', 'completion_percentage']
+        expandable_fields = ['owner_detail', 'organization_detail', 'tasks_count', 'completion_percentage']
+        related_fields = {
+            'owner_detail': ('owner__organization',),
+            'organization_detail': ('organization',),
+            'tasks_count': ('stats',),
+            'completion_percentage': ('stats',),
+        }
+    
+    def get_stats(self, obj):
+        """
+        الإحصائيات المحسوبة مسبقاً للمشروع (يفضل جلبها مع select_related('stats'))
+        """
+        try:
+            return obj.stats
+        except ProjectStats.DoesNotExist:
+            return None
     
     def get_tasks_count(self, obj):
+        stats = self.get_stats(obj)
+        if stats is not None:
+            return stats.total
         return obj.tasks.count() if hasattr(obj, 'tasks') else 0
     
     def get_completion_percentage(self, obj):
+        stats = self.get_stats(obj)
+        if stats is not None:
+            return stats.completion_percentage
         if not hasattr(obj, 'tasks') or obj.tasks.count() == 0:
             return 0
         completed_tasks = obj.tasks.filter(status='done').count()
@@ -50,3 +73,7 @@ class ProjectSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError({'title': 'عنوان المشروع مطلوب'})
         
         return super().update(instance, validated_data)
+
+
+# العلاقات التي يقرؤها ProjectSerializer بكامل حقوله
+PROJECT_SERIALIZER_RELATED = ProjectSerializer.select_related_for()
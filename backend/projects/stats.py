@@ -0,0 +1,179 @@
+"""
+صيانة إحصائيات المشاريع (ProjectStats) بشكل تراكمي
+- كل تغيير على مهمة يُترجم إلى زيادة/نقصان في صف إحصائيات مشروعها (O(1))
+- العمليات المجمعة تجمع التغييرات وتطبقها بتحديث واحد لكل مشروع
+- إعادة البناء والتحقق من الانحراف تتم على دفعات
+"""
+import threading
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F
+from django.utils import timezone
+
+from .models import Project, ProjectStats
+
+_local = threading.local()
+
+
+def _counts_for(project_ids):
+    """
+    عدّ المهام حسب الحالة لمجموعة مشاريع باستعلام واحد
+    """
+    from tasks.models import Task
+
+    counts = {project_id: Counter() for project_id in project_ids}
+    rows = (
+        Task.objects.filter(project_id__in=project_ids)
+        .values('project_id', 'status')
+        .annotate(n=Count('id'))
+        .order_by()
+    )
+    for row in rows:
+        counts[row['project_id']][row['status']] += row['n']
+    return counts
+
+
+def _stats_values(counter):
+    values = {field: counter.get(field, 0) for field in ProjectStats.STATUS_FIELDS}
+    values['total'] = sum(counter.values())
+    return values
+
+
+def _create_from_counts(project_id):
+    """
+    إنشاء صف الإحصائيات لمشروع لم يكن له صف بعد، بعدّ مهامه الحالية مرة واحدة
+    """
+    if not Project.objects.filter(id=project_id).exists():
+        return
+    values = _stats_values(_counts_for([project_id])[project_id])
+    try:
+        with transaction.atomic():
+            ProjectStats.objects.create(project_id=project_id, last_activity_at=timezone.now(), **values)
+    except IntegrityError:
+        # تم إنشاء الصف بالتوازي من طلب آخر، والعدّ الذي قام به يشمل هذا التغيير
+        pass
+
+
+def _apply(project_id, delta):
+    """
+    تطبيق تغيير على صف إحصائيات مشروع واحد باستخدام تعبيرات F
+    """
+    updates = {
+        field: F(field) + amount
+        for field, amount in delta.items()
+        if amount and field in ('total',) + ProjectStats.STATUS_FIELDS
+    }
+    updated = ProjectStats.objects.filter(project_id=project_id).update(
+        last_activity_at=timezone.now(), **updates
+    )
+    if not updated:
+        # لا يوجد صف بعد: يتم حسابه من المهام الحالية (والتي تشمل هذا التغيير)
+        _create_from_counts(project_id)
+
+
+def status_delta(old_status=None, new_status=None):
+    """
+    تحويل انتقال حالة مهمة إلى تغيير في العدادات
+    old_status=None يعني إنشاء مهمة، وnew_status=None يعني حذفها
+    """
+    delta = Counter()
+    if old_status is not None:
+        delta[old_status] -= 1
+        delta['total'] -= 1
+    if new_status is not None:
+        delta[new_status] += 1
+        delta['total'] += 1
+    return delta
+
+
+def record_change(project_id, old_status=None, new_status=None):
+    """
+    تسجيل تغيير مهمة واحدة؛ يُطبق فوراً أو يُجمع إذا كانت هناك عملية مجمعة جارية
+    """
+    delta = status_delta(old_status, new_status)
+    pending = getattr(_local, 'pending', None)
+    if pending is not None:
+        pending[project_id].update(delta)
+        return
+    with transaction.atomic():
+        _apply(project_id, delta)
+
+
+def apply_deltas(deltas):
+    """
+    تطبيق تغييرات مجمعة {project_id: Counter} بتحديث واحد لكل مشروع
+    """
+    with transaction.atomic():
+        for project_id, delta in deltas.items():
+            _apply(project_id, delta)
+
+
+@contextmanager
+def batch():
+    """
+    تجميع تغييرات الإحصائيات داخل عملية مجمعة وتطبيقها مرة واحدة في النهاية
+    """
+    if getattr(_local, 'pending', None) is not None:
+        yield
+        return
+
+    _local.pending = defaultdict(Counter)
+    try:
+        with transaction.atomic():
+            yield
+            pending = _local.pending
+            _local.pending = None
+            apply_deltas(pending)
+    finally:
+        _local.pending = None
+
+
+def rebuild(project_ids):
+    """
+    إعادة حساب إحصائيات مجموعة مشاريع من الصفر
+    """
+    counts = _counts_for(project_ids)
+    existing = set(ProjectStats.objects.filter(project_id__in=project_ids).values_list('project_id', flat=True))
+    now = timezone.now()
+    with transaction.atomic():
+        to_create = []
+        for project_id in project_ids:
+            values = _stats_values(counts[project_id])
+            if project_id in existing:
+                ProjectStats.objects.filter(project_id=project_id).update(**values)
+            else:
+                to_create.append(ProjectStats(project_id=project_id, last_activity_at=now, **values))
+        ProjectStats.objects.bulk_create(to_create, ignore_conflicts=True)
+
+
+def iter_project_batches(batch_size, project_ids=None):
+    """
+    المرور على معرفات المشاريع على دفعات مرتبة حسب المعرف
+    """
+    queryset = Project.objects.order_by('id').values_list('id', flat=True)
+    if project_ids:
+        queryset = queryset.filter(id__in=project_ids)
+    last_id = 0
+    while True:
+        ids = list(queryset.filter(id__gt=last_id)[:batch_size])
+        if not ids:
+            return
+        yield ids
+        last_id = ids[-1]
+
+
+def find_drift(project_ids):
+    """
+    مقارنة الإحصائيات المخزنة بالعدّ الفعلي وإرجاع المشاريع المنحرفة
+    [(project_id, المخزن أو None, الفعلي)]
+    """
+    counts = _counts_for(project_ids)
+    stored = {stats.project_id: stats.as_counts() for stats in ProjectStats.objects.filter(project_id__in=project_ids)}
+    drift = []
+    for project_id in project_ids:
+        actual = _stats_values(counts[project_id])
+        if stored.get(project_id) != actual:
+            drift.append((project_id, stored.get(project_id), actual))
+    return drift
@@ -0,0 +1,80 @@
+from io import StringIO
+
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+
+from organizations.models import Organization
+from tasks.models import Task
+from users.models import User
+
+from .models import Project, ProjectStats
+
+
+class ProjectStatsTests(TestCase):
+
+    def setUp(self):
+        self.organization = Organization.objects.create(name='Org', slug='org')
+        self.user = User.objects.create_user(username='member', password='x', organization=self.organization)
+        self.board = self.project('Board')
+
+    def project(self, title):
+        return Project.objects.create(title=title, owner=self.user, organization=self.organization)
+
+    def task(self, project=None, status='todo'):
+        return Task.objects.create(title='Task', project=project or self.board, organization=self.organization, status=status)
+
+    def counts(self, project=None):
+        return ProjectStats.objects.get(project=project or self.board).as_counts()
+
+    def test_create(self):
+        self.task()
+        self.task(status='done')
+        self.assertEqual(self.counts(), {'total': 2, 'todo': 1, 'in_progress': 0, 'done': 1})
+
+    def test_status_change(self):
+        task = self.task()
+        task.status = 'in_progress'
+        task.save()
+        task.status = 'done'
+        task.save()
+        self.assertEqual(self.counts(), {'total': 1, 'todo': 0, 'in_progress': 0, 'done': 1})
+
+    def test_move_between_projects(self):
+        other = self.project('Other')
+        task = self.task(status='in_progress')
+        task.project = other
+        task.status = 'done'
+        task.save()
+        self.assertEqual(self.counts(), {'total': 0, 'todo': 0, 'in_progress': 0, 'done': 0})
+        self.assertEqual(self.counts(other), {'total': 1, 'todo': 0, 'in_progress': 0, 'done': 1})
+
+    def test_bulk_delete(self):
+        other = self.project('Other')
+        for status in ('todo', 'todo', 'done'):
+            self.task(status=status)
+        self.task(other)
+        Task.objects.filter(status='todo').delete()
+        self.assertEqual(self.counts(), {'total': 1, 'todo': 0, 'in_progress': 0, 'done': 1})
+        self.assertEqual(self.counts(other)['total'], 0)
+
+    def test_rebuild_verify_and_fix(self):
+        self.task()
+        other = self.project('Other')
+        self.task(other, status='done')
+        ProjectStats.objects.filter(project=self.board).update(total=5, todo=5)
+
+        with self.assertRaises(CommandError):
+            call_command('rebuild_project_stats', '--verify', stdout=StringIO())
+        self.assertEqual(self.counts()['total'], 5)
+
+        call_command('rebuild_project_stats', '--verify', '--fix', stdout=StringIO())
+        self.assertEqual(self.counts(), {'total': 1, 'todo': 1, 'in_progress': 0, 'done': 0})
+        out = StringIO()
+        call_command('rebuild_project_stats', '--verify', stdout=out)
+        self.assertIn('مطابقة', out.getvalue())
+
+    def test_rebuild_creates_missing_rows(self):
+        self.task()
+        ProjectStats.objects.all().delete()
+        call_command('rebuild_project_stats', stdout=StringIO())
+        self.assertEqual(self.counts()['total'], 1)
@@ -3,10 +3,14 @@ from rest_framework.response import Response
 from rest_framework.decorators import action
 from .models import Project
 from .serializers import ProjectSerializer
+from tasks.models import Task
 from tasks.serializers import TaskSerializer
+from tasks.inbox import publish_inbox_change
+from tasks.views import include_archived
+from trello_backend.async_views import AsyncReadView, json_response, serialize
 from trello_backend.permissions import IsSameOrganization, IsProjectOwner
-from channels.layers import get_channel_layer
-from asgiref.sync import async_to_sync
+from trello_backend.broadcast import publish_later, project_group, org_group
+from activity.recorder import record_project, record_task
 
 
 class ProjectViewSet(viewsets.ModelViewSet):
@@ -15,11 +19,13 @@ class ProjectViewSet(viewsets.ModelViewSet):
     """
     serializer_class = ProjectSerializer
     permission_classes = [permissions.IsAuthenticated]
+    # فئة حد الطلبات؛ تُحدد لكل إجراء عبر @action(throttle_scope=...) وإلا تُشتق من طريقة الطلب
+    throttle_scope = None
     
     def get_queryset(self):
         # إذا كان المستخدم هو مالك النظام، يرى جميع المشاريع
         if self.request.user.is_system_owner:
-            return Project.objects.all()
+            return ProjectSerializer.prepare_queryset(Project.objects.all(), self.request)
             
         # المستخدم العادي يرى فقط مشاريع مؤسسته
         try:
@@ -33,7 +39,8 @@ class ProjectViewSet(viewsets.ModelViewSet):
                 print(f"تم إنشاء مؤسسة افتراضية للمستخدم: {self.request.user.username}")
             
             # إرجاع المشاريع التابعة لمؤسسة المستخدم
-            return Project.objects.filter(organization=self.request.user.organization)
+            queryset = Project.objects.filter(organization=self.request.user.organization)
+            return ProjectSerializer.prepare_queryset(queryset, self.request)
         except Exception as e:
             print(f"خطأ في get_queryset: {str(e)}")
             return Project.objects.none()  # إرجاع قائمة فارغة في حالة حدوث أي خطأ
@@ -77,6 +84,8 @@ class ProjectViewSet(viewsets.ModelViewSet):
                 project = serializer.save(owner=request.user, organization=request.user.organization)
                 print(f"DEBUG: تم إنشاء المشروع بنجاح: {project.id} - {project.title}")
             
+            record_project('project.created', project, request.user)
+            
             # إرجاع الاستجابة
             headers = self.get_success_headers(serializer.data)
             return Response(serializer.data, status=status.HTTP_201_CREATED, headers=headers)
@@ -107,20 +116,11 @@ class ProjectViewSet(viewsets.ModelViewSet):
             print(f"DEBUG: Project created successfully: {project.id} - {project.title} in organization: {project.organization.name}")
         
         # إرسال تحديث عبر WebSocket إلى غرفة المؤسسة
-        try:
-            if project.organization and project.organization.slug:
-                channel_layer = get_channel_layer()
-                async_to_sync(channel_layer.group_send)(
-                    f'org_{project.organization.slug}',
-                    {
-                        'type': 'project_create',
-                        'project': ProjectSerializer(project).data
-                    }
-                )
-                print(f"DEBUG: تم إرسال إشعار WebSocket بإنشاء المشروع بنجاح")
-        except Exception as ws_error:
-            print(f"WARNING: خطأ في إرسال إشعار WebSocket: {str(ws_error)}")
-            # لا نريد أن يفشل إنشاء المشروع بسبب خطأ في WebSocket
+        if project.organization and project.organization.slug:
+            publish_later([org_group(project.organization.slug)], {
+                'type': 'project_create',
+                'project': serializer.data
+            })
     
     def perform_update(self, serializer):
         """
@@ -128,22 +128,14 @@ class ProjectViewSet(viewsets.ModelViewSet):
         """
         # حفظ المشروع
         project = serializer.save()
+        record_project('project.updated', project, self.request.user)
         
         # إرسال تحديث عبر WebSocket إلى غرفة المؤسسة
-        try:
-            if project.organization and project.organization.slug:
-                channel_layer = get_channel_layer()
-                async_to_sync(channel_layer.group_send)(
-                    f'org_{project.organization.slug}',
-                    {
-                        'type': 'project_update',
-                        'project': ProjectSerializer(project).data
-                    }
-                )
-                print(f"DEBUG: تم إرسال إشعار WebSocket بتحديث المشروع بنجاح")
-        except Exception as ws_error:
-            print(f"WARNING: خطأ في إرسال إشعار WebSocket: {str(ws_error)}")
-            # لا نريد أن يفشل تحديث المشروع بسبب خطأ في WebSocket
+        if project.organization and project.organization.slug:
+            publish_later([org_group(project.organization.slug)], {
+                'type': 'project_update',
+                'project': serializer.data
+            })
     
     def perform_destroy(self, instance):
         """
@@ -152,25 +144,16 @@ class ProjectViewSet(viewsets.ModelViewSet):
         # الحصول على معلومات المشروع قبل الحذف
         project_id = instance.id
         organization_slug = instance.organization.slug if instance.organization else None
+        record_project('project.deleted', instance, self.request.user)
         
         # حذف المشروع
         instance.delete()
         
         # إرسال تحديث عبر WebSocket إلى غرفة المؤسسة
-        try:
-            if organization_slug:
-                channel_layer = get_channel_layer()
-                async_to_sync(channel_layer.group_send)(
-                    f'org_{organization_slug}',
-                    {
-                        'type': 'project_delete',
-                        'project_id': project_id
-                    }
-                )
-                print(f"DEBUG: تم إرسال إشعار WebSocket بحذف المشروع بنجاح")
-        except Exception as ws_error:
-            print(f"WARNING: خطأ في إرسال إشعار WebSocket: {str(ws_error)}")
-            # لا نريد أن يفشل حذف المشروع بسبب خطأ في WebSocket
+        publish_later([org_group(organization_slug)], {
+            'type': 'project_delete',
+            'project_id': project_id
+        })
     
     def get_permissions(self):
         """
@@ -205,15 +188,43 @@ class ProjectViewSet(viewsets.ModelViewSet):
             print(f"تم العثور على المشروع: {project.id} - {project.title}")
             
             # التحقق من وجود مهام للمشروع
-            tasks = project.tasks.all()
+            # المهام النشطة فقط (الفهرس الجزئي)، فيبقى زمن اللوحة ثابتاً مع تراكم المهام المؤرشفة
+            tasks = TaskSerializer.prepare_queryset(project.tasks.visible(include_archived(request)), request)
             print(f"تم العثور على {tasks.count()} مهمة للمشروع")
             
-            serializer = TaskSerializer(tasks, many=True)
+            serializer = TaskSerializer(tasks, many=True, context={'request': request})
             return Response(serializer.data)
         except Exception as e:
             print(f"خطأ في جلب مهام المشروع: {str(e)}")
             return Response({"error": f"خطأ في جلب مهام المشروع: {str(e)}"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
     
+    # تجميع ثقيل على سجل الانتقالات، فيُحد كعملية مجمعة (bulk) وليس كقراءة عادية
+    @action(detail=True, methods=['get'], throttle_scope='bulk')
+    def analytics(self, request, pk=None):
+        """
+        تحليلات المشروع: منحنى الإنجاز اليومي ومتوسط زمن الدورة والعمل الجاري
+        تُحسب من التجميعات اليومية لانتقالات الحالة
+        """
+        from tasks.analytics import project_analytics
+        
+        project = self.get_object()
+        try:
+            days = min(max(int(request.query_params.get('days', 30)), 1), 365)
+        except ValueError:
+            return Response({"error": "قيمة days يجب أن تكون رقماً"}, status=status.HTTP_400_BAD_REQUEST)
+        
+        return Response(project_analytics(project, days=days))
+    
+    @action(detail=True, methods=['get'])
+    def label_counts(self, request, pk=None):
+        """
+        تصنيفات المؤسسة المستخدمة في مهام المشروع مع عدد المهام لكل تصنيف
+        الأعداد تُقرأ من الذاكرة المشتركة (tasks.labels)
+        """
+        from tasks.labels import project_label_summary
+        
+        return Response(project_label_summary(self.get_object()))
+    
     @action(detail=True, methods=['post'])
     def add_task(self, request, pk=None):
         """
@@ -291,40 +302,18 @@ class ProjectViewSet(viewsets.ModelViewSet):
                     assignee=assignee
                 )
                 print(f"DEBUG: تم إنشاء المهمة بنجاح: {task.id} - {task.title}")
+                record_task('task.created', task, request.user)
                 
-                # إرسال إشعار WebSocket إذا كان متاحًا
-                try:
-                    from channels.layers import get_channel_layer
-                    from asgiref.sync import async_to_sync
-                    from tasks.serializers import TaskSerializer
-                    
-                    channel_layer = get_channel_layer()
-                    # إرسال إلى غرفة المشروع
-                    async_to_sync(channel_layer.group_send)(
-                        f'project_{project.id}',
-                        {
-                            'type': 'task_create',
-                            'task': TaskSerializer(task).data
-                        }
-                    )
-                    
-                    # إرسال إلى غرفة المؤسسة
-                    if project.organization and project.organization.slug:
-                        async_to_sync(channel_layer.group_send)(
-                            f'org_{project.organization.slug}',
-                            {
-                                'type': 'task_create',
-                                'task': TaskSerializer(task).data
-                            }
-                        )
-                    print(f"DEBUG: تم إرسال إشعار WebSocket بنجاح")
-                except Exception as ws_error:
-                    print(f"WARNING: خطأ في إرسال إشعار WebSocket: {str(ws_error)}")
-                    # لا نريد أن يفشل إنشاء المهمة بسبب خطأ في WebSocket
+                # إرسال إشعار WebSocket إلى غرفة المشروع وغرفة المؤسسة
+                task_data = TaskSerializer(task).data
+                publish_later(
+                    [project_group(project.id), org_group(project.organization.slug if project.organization else None)],
+                    {'type': 'task_create', 'task': task_data}
+                )
+                publish_inbox_change(task)
                 
                 # إرسال الاستجابة
-                from tasks.serializers import TaskSerializer
-                return Response(TaskSerializer(task).data, status=status.HTTP_201_CREATED)
+                return Response(task_data, status=status.HTTP_201_CREATED)
                 
             except Exception as task_error:
                 print(f"ERROR: خطأ في إنشاء المهمة: {str(task_error)}")
@@ -357,3 +346,45 @@ class ProjectViewSet(viewsets.ModelViewSet):
         except Exception as e:
             print(f"ERROR: خطأ عام في إضافة المهمة: {str(e)}")
             return Response({"error": f"حدث خطأ أثناء إنشاء المهمة: {str(e)}"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+class ProjectListAsyncView(AsyncReadView):
+    """
+    قائمة المشاريع (GET غير متزامن، والإنشاء عبر ProjectViewSet)
+    """
+    fallback = ProjectViewSet.as_view({'get': 'list', 'post': 'create'})
+    
+    def needs_fallback(self, user):
+        return not user.is_system_owner and not user.organization_id
+    
+    async def get(self, request, user):
+        queryset = ProjectSerializer.prepare_queryset(Project.objects.all(), request)
+        if not user.is_system_owner:
+            queryset = queryset.filter(organization_id=user.organization_id)
+        projects = [project async for project in queryset]
+        return json_response(await serialize(ProjectSerializer(projects, many=True, context={'request': request})))
+
+
+class ProjectTasksAsyncView(AsyncReadView):
+    """
+    مهام مشروع واحد (GET غير متزامن)
+    """
+    fallback = ProjectViewSet.as_view({'get': 'tasks'})
+    
+    def needs_fallback(self, user):
+        return not user.is_system_owner and not user.organization_id
+    
+    async def get(self, request, user, pk):
+        projects = Project.objects.all()
+        if not user.is_system_owner:
+            projects = projects.filter(organization_id=user.organization_id)
+        try:
+            if not await projects.filter(pk=pk).aexists():
+                return self.not_found()
+        except ValueError:
+            return self.not_found()
+        
+        queryset = Task.objects.filter(project_id=pk).visible(include_archived(request))
+        queryset = TaskSerializer.prepare_queryset(queryset, request)
+        tasks = [task async for task in queryset]
+        return json_response(await serialize(TaskSerializer(tasks, many=True, context={'request': request})))
@@ -0,0 +1,202 @@
+"""
+تحليلات حالة المهام: سجل الانتقالات والتجميع اليومي وتقارير المشروع
+- كل تغيير حالة يُضاف إلى TaskStatusTransition
+- وفي نفس المعاملة يُحدّث صف اليوم في TaskStatusDailyRollup بتعبيرات F
+- التقارير (منحنى الإنجاز، زمن الدورة، العمل الجاري) تُحسب من التجميعات اليومية فقط
+"""
+import threading
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.db import IntegrityError, transaction
+from django.db.models import F, Min
+from django.utils import timezone
+
+from .models import TaskStatusTransition, TaskStatusDailyRollup
+
+STATUS_FIELDS = ('todo', 'in_progress', 'done')
+
+_local = threading.local()
+
+
+def _day(value):
+    if timezone.is_aware(value):
+        return timezone.localtime(value).date()
+    return value.date()
+
+
+def transition(task, from_status, to_status, at=None):
+    """
+    وصف انتقال واحد؛ task يمكن أن يكون نموذج مهمة أو قاموساً من values()
+    """
+    get = task.get if isinstance(task, dict) else lambda name: getattr(task, name)
+    return {
+        'task_id': get('id'),
+        'project_id': get('project_id'),
+        'organization_id': get('organization_id'),
+        'task_created_at': get('created_at'),
+        'from_status': from_status,
+        'to_status': to_status,
+        'at': at or timezone.now(),
+    }
+
+
+def _cycle_starts(task_ids):
+    """
+    أول دخول لكل مهمة في حالة "قيد التنفيذ" (استعلام واحد لجميع المهام)
+    """
+    if not task_ids:
+        return {}
+    rows = (
+        TaskStatusTransition.objects.filter(task_id__in=task_ids, to_status='in_progress')
+        .values('task_id')
+        .annotate(started_at=Min('created_at'))
+        .order_by()
+    )
+    return {row['task_id']: row['started_at'] for row in rows}
+
+
+def _apply_rollup(project_id, date, delta):
+    updates = {field: F(field) + amount for field, amount in delta.items() if amount}
+    if not updates:
+        return
+    query = TaskStatusDailyRollup.objects.filter(project_id=project_id, date=date)
+    if query.update(**updates):
+        return
+    try:
+        with transaction.atomic():
+            TaskStatusDailyRollup.objects.create(project_id=project_id, date=date, **delta)
+    except IntegrityError:
+        query.update(**updates)
+
+
+@contextmanager
+def batch():
+    """
+    تجميع الانتقالات داخل عملية مجمعة وكتابتها مرة واحدة في النهاية
+    """
+    if getattr(_local, 'pending', None) is not None:
+        yield
+        return
+
+    _local.pending = []
+    try:
+        with transaction.atomic():
+            yield
+            pending = _local.pending
+            _local.pending = None
+            record_transitions(pending)
+    finally:
+        _local.pending = None
+
+
+def record_transitions(entries):
+    """
+    إضافة الانتقالات إلى السجل وتحديث التجميعات اليومية
+    الانتقالات المتعددة تُكتب بإدراج واحد وتحديث واحد لكل (مشروع، يوم)
+    """
+    entries = [entry for entry in entries if entry['from_status'] != entry['to_status']]
+    if not entries:
+        return
+
+    pending = getattr(_local, 'pending', None)
+    if pending is not None:
+        pending.extend(entries)
+        return
+
+    completed_ids = [entry['task_id'] for entry in entries if entry['to_status'] == 'done']
+
+    with transaction.atomic():
+        starts = _cycle_starts(completed_ids)
+
+        TaskStatusTransition.objects.bulk_create([
+            TaskStatusTransition(
+                task_id=entry['task_id'],
+                project_id=entry['project_id'],
+                organization_id=entry['organization_id'],
+                from_status=entry['from_status'],
+                to_status=entry['to_status'],
+                created_at=entry['at'],
+            )
+            for entry in entries
+        ])
+
+        rollups = defaultdict(Counter)
+        for entry in entries:
+            delta = rollups[(entry['project_id'], _day(entry['at']))]
+            if entry['from_status'] in STATUS_FIELDS:
+                delta[f"{entry['from_status']}_delta"] -= 1
+            if entry['to_status'] in STATUS_FIELDS:
+                delta[f"{entry['to_status']}_delta"] += 1
+            if entry['from_status'] is None:
+                delta['created'] += 1
+            if entry['to_status'] == 'done':
+                started_at = starts.get(entry['task_id']) or entry['task_created_at']
+                delta['completed'] += 1
+                if started_at is not None:
+                    delta['cycle_time_seconds'] += max(int((entry['at'] - started_at).total_seconds()), 0)
+                    delta['cycle_time_count'] += 1
+
+        for (project_id, date), delta in rollups.items():
+            _apply_rollup(project_id, date, delta)
+
+
+def project_analytics(project, days=30):
+    """
+    تقرير المشروع لآخر عدد من الأيام:
+    منحنى الإنجاز اليومي، متوسط زمن الدورة، والعمل الجاري
+    الأعداد في نهاية كل يوم تُحسب بالرجوع من الإحصائيات الحالية وطرح صافي تغيرات الأيام اللاحقة
+    """
+    from projects.models import ProjectStats
+
+    today = _day(timezone.now())
+    start = today - timedelta(days=days - 1)
+
+    try:
+        current = project.stats.as_counts()
+    except ProjectStats.DoesNotExist:
+        from projects import stats
+        stats.rebuild([project.id])
+        current = ProjectStats.objects.get(project_id=project.id).as_counts()
+
+    rollups = {
+        rollup.date: rollup
+        for rollup in TaskStatusDailyRollup.objects.filter(project=project, date__gte=start)
+    }
+
+    counts = {field: current[field] for field in STATUS_FIELDS}
+    burndown = []
+    cycle_seconds = 0
+    cycle_count = 0
+    for offset in range(days):
+        date = today - timedelta(days=offset)
+        total = sum(counts.values())
+        rollup = rollups.get(date)
+        burndown.append({
+            'date': date.isoformat(),
+            'total': total,
+            'remaining': total - counts['done'],
+            'done': counts['done'],
+            'wip': counts['in_progress'],
+            'created': rollup.created if rollup else 0,
+            'completed': rollup.completed if rollup else 0,
+        })
+        if rollup:
+            # الرجوع إلى نهاية اليوم السابق
+            counts['todo'] -= rollup.todo_delta
+            counts['in_progress'] -= rollup.in_progress_delta
+            counts['done'] -= rollup.done_delta
+            cycle_seconds += rollup.cycle_time_seconds
+            cycle_count += rollup.cycle_time_count
+    burndown.reverse()
+
+    return {
+        'project': project.id,
+        'days': days,
+        'current': current,
+        'wip': current['in_progress'],
+        'average_cycle_time_hours': round(cycle_seconds / cycle_count / 3600, 2) if cycle_count else None,
+        'completed_count': cycle_count,
+        'burndown': burndown,
+    }
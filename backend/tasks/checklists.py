@@ -0,0 +1,85 @@
+"""
+قوائم التحقق (المهام الفرعية) وعدادات تقدمها على المهمة
+- Task.checklist_total وTask.checklist_done تُحدث بتعبيرات F داخل نفس المعاملة التي تغير العنصر،
+  فيعرض TaskSerializer التقدم دون استعلام فرعي لكل مهمة
+- تبديل العنصر تحديث مشروط (is_done يساوي القيمة القديمة)، فالطلبات المتزامنة لا تعدّ التغيير مرتين،
+  وكذلك الحذف (delete_item) مشروط بقيمة is_done في الصف ويُحتسب بعدد الصفوف المحذوفة فعلاً
+- كل تغيير يبث فرقاً صغيراً (checklist_item_update / checklist_item_delete) مع العدادات الجديدة
+  إلى مجموعتي المشروع والمؤسسة بدلاً من المهمة كاملة
+"""
+from django.db import transaction
+from django.db.models import F, Max
+
+from trello_backend.broadcast import org_group, project_group, publish_later
+
+from .models import ChecklistItem, Task
+
+
+def adjust_counters(task_id, total=0, done=0):
+    updates = {}
+    if total:
+        updates['checklist_total'] = F('checklist_total') + total
+    if done:
+        updates['checklist_done'] = F('checklist_done') + done
+    if updates:
+        Task.objects.filter(id=task_id).update(**updates)
+
+
+def counters(task_id):
+    total, done = Task.objects.filter(id=task_id).values_list('checklist_total', 'checklist_done').get()
+    return {'checklist_total': total, 'checklist_done': done}
+
+
+def next_position(task_id):
+    last = ChecklistItem.objects.filter(task_id=task_id).aggregate(last=Max('position'))['last']
+    return 0 if last is None else last + 1
+
+
+def set_done(item, is_done):
+    """
+    تغيير حالة العنصر وتعديل عداد المنجز؛ يعيد True إذا تغيرت الحالة
+    """
+    with transaction.atomic():
+        changed = ChecklistItem.objects.filter(id=item.id, is_done=not is_done).update(is_done=is_done)
+        if changed:
+            adjust_counters(item.task_id, done=1 if is_done else -1)
+    item.is_done = is_done
+    return bool(changed)
+
+
+def delete_item(item):
+    """
+    حذف العنصر وإنقاص العدادات حسب الصف المحذوف فعلاً؛ يعيد False إذا حذفه طلب آخر
+    """
+    with transaction.atomic():
+        while True:
+            is_done = (
+                ChecklistItem.objects.select_for_update().filter(id=item.id)
+                .values_list('is_done', flat=True).first()
+            )
+            if is_done is None:
+                return False
+            # إذا بدّل طلب آخر الحالة بين القراءة والحذف لا يُحذف شيء وتُعاد القراءة
+            deleted, _ = ChecklistItem.objects.filter(id=item.id, is_done=is_done).delete()
+            if deleted:
+                adjust_counters(item.task_id, total=-1, done=-1 if is_done else 0)
+                return True
+
+
+def item_diff(item):
+    return {'id': item.id, 'title': item.title, 'is_done': item.is_done, 'position': item.position}
+
+
+def publish_item_change(item, task, deleted=False, fields=None):
+    """
+    بث تغيير عنصر واحد مع عدادات المهمة بعد نجاح المعاملة
+    fields: حقول العنصر المرسلة فقط (مثل is_done عند التبديل)
+    """
+    event = {'type': 'checklist_item_delete' if deleted else 'checklist_item_update', 'task_id': task.id}
+    if deleted:
+        event['item_id'] = item.id
+    else:
+        diff = item_diff(item)
+        event['item'] = {key: diff[key] for key in ('id',) + tuple(fields)} if fields else diff
+    event.update(counters(task.id))
+    publish_later([project_group(task.project_id), org_group(task.organization.slug)], event)
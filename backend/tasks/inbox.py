@@ -0,0 +1,102 @@
+"""
+صندوق "مهامي": المهام النشطة المسندة للمستخدم من كل المشاريع
+- القائمة تُقرأ من الفهرس (assignee, status, updated_at) دون المرور على مهام المؤسسة كلها
+- عناوين المشاريع تأتي من خريطة مخزنة في الذاكرة المشتركة بدلاً من ربط المشروع وتفاصيله بكل مهمة
+- كل تغيير على مهمة مسندة يُبث إلى مجموعة المعين user_{id} (inbox_upsert / inbox_remove)،
+  وإلى المعين السابق عند نقل المهمة منه، فيحدث العميل صندوقه دون إعادة تحميله
+- التغييرات التي لا تمر بعروض المهام تُبث أيضاً: عدد التعليقات (tasks.signals عبر publish_task_row)
+  والأرشفة المجمعة (archive_done_tasks عبر publish_removed)؛ تقدم قائمة التحقق ليس من حقول الصندوق
+"""
+from django.conf import settings
+from django.core.cache import cache
+
+from trello_backend.broadcast import publish_later, user_group
+
+from .models import Task
+
+PROJECT_TITLE_CACHE_PREFIX = 'inbox:project_title'
+
+# الحقول التي يقرؤها InboxTaskSerializer فقط
+INBOX_FIELDS = (
+    'id', 'title', 'status', 'priority', 'due_date', 'project_id', 'organization_id', 'assignee_id',
+    'comment_count', 'archived_at', 'created_at', 'updated_at',
+)
+
+
+def inbox_queryset(user, statuses=None):
+    """
+    المهام النشطة المسندة للمستخدم في مؤسسته (مالك النظام: في كل المؤسسات)
+    """
+    queryset = Task.objects.active().filter(assignee_id=user.id)
+    if not user.is_system_owner:
+        queryset = queryset.filter(organization_id=user.organization_id)
+    if statuses:
+        queryset = queryset.filter(status__in=statuses)
+    return queryset.only(*INBOX_FIELDS)
+
+
+def get_project_titles(project_ids):
+    """
+    إرجاع قاموس {معرف المشروع: العنوان}؛ قراءة مجمعة من الذاكرة المشتركة ثم استعلام واحد للناقص
+    """
+    from projects.models import Project
+
+    project_ids = list(dict.fromkeys(project_ids))
+    if not project_ids:
+        return {}
+
+    cache_keys = {f'{PROJECT_TITLE_CACHE_PREFIX}:{project_id}': project_id for project_id in project_ids}
+    titles = {cache_keys[key]: title for key, title in cache.get_many(list(cache_keys)).items()}
+
+    missing = [project_id for project_id in project_ids if project_id not in titles]
+    if missing:
+        loaded = dict(Project.objects.filter(id__in=missing).values_list('id', 'title'))
+        cache.set_many(
+            {f'{PROJECT_TITLE_CACHE_PREFIX}:{project_id}': title for project_id, title in loaded.items()},
+            getattr(settings, 'INBOX_PROJECT_TITLE_CACHE_TIMEOUT', 3600),
+        )
+        titles.update(loaded)
+    return titles
+
+
+def forget_project_title(project_id):
+    cache.delete(f'{PROJECT_TITLE_CACHE_PREFIX}:{project_id}')
+
+
+def inbox_row(task):
+    from .serializers import InboxTaskSerializer
+    return InboxTaskSerializer(task, context={'project_titles': get_project_titles([task.project_id])}).data
+
+
+def publish_inbox_change(task, old_assignee_id=None, deleted=False):
+    """
+    بث تغيير المهمة إلى صندوق المعين الحالي، وإزالتها من صندوق المعين السابق إذا تغير
+    المهمة المحذوفة أو المؤرشفة تُزال من الصندوق
+    """
+    removed = {'type': 'inbox_remove', 'task_id': task.id}
+    if old_assignee_id and old_assignee_id != task.assignee_id:
+        publish_later([user_group(old_assignee_id)], removed)
+    if not task.assignee_id:
+        return
+    if deleted or task.archived_at:
+        publish_later([user_group(task.assignee_id)], removed)
+    else:
+        publish_later([user_group(task.assignee_id)], {'type': 'inbox_upsert', 'task': inbox_row(task)})
+
+
+def publish_task_row(task_id):
+    """
+    إعادة بث صف المهمة إلى صندوق معينها بعد تغيير من خارج عروض المهام
+    """
+    task = Task.objects.filter(id=task_id, assignee__isnull=False).only(*INBOX_FIELDS).first()
+    if task is not None:
+        publish_inbox_change(task)
+
+
+def publish_removed(rows):
+    """
+    إزالة مهام من صناديق معينيها بعد تحديث مجمع (مثل الأرشفة)؛ rows: [(معرف المهمة، معرف المعين)]
+    """
+    for task_id, assignee_id in rows:
+        if assignee_id:
+            publish_later([user_group(assignee_id)], {'type': 'inbox_remove', 'task_id': task_id})
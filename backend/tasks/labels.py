@@ -0,0 +1,83 @@
+"""
+تصنيفات المهام: التصفية بالتصنيفات وعدد المهام لكل تصنيف في المشروع
+- ?labels=bug,urgent يطابق أسماء تصنيفات مؤسسة المستخدم؛ labels_match=any (الافتراضي) لأي منها
+  وlabels_match=all لكلها. التصفية استعلام فرعي على فهرس (label, task) في جدول الربط،
+  فلا تُقرأ صفوف المهام إلا للنتيجة
+- أعداد التصنيفات لكل مشروع تُحسب بتجميع واحد وتُحفظ في الذاكرة المشتركة،
+  وتغيير تصنيفات مهمة أو نقلها أو حذفها يحذف أعداد مشروعها (tasks.signals)
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count
+
+from .models import Label, TaskLabel
+
+LABEL_COUNTS_CACHE_PREFIX = 'labels:project_counts'
+
+# حد لعدد التصنيفات في طلب تصفية واحد (الزائد يُتجاهل)
+MAX_FILTER_LABELS = 20
+
+
+def parse_label_filter(request):
+    """
+    (الأسماء، any/all) من معاملات الطلب، أو (None، None) بدون تصفية
+    """
+    value = request.GET.get('labels')
+    if not value:
+        return None, None
+    # مثل باقي معاملات التصفية: القيم غير الصالحة تُعامل بالقيمة الافتراضية بدلاً من رفض الطلب
+    names = list(dict.fromkeys(name.strip() for name in value.split(',') if name.strip()))[:MAX_FILTER_LABELS]
+    match = 'all' if request.GET.get('labels_match') == 'all' else 'any'
+    return names, match
+
+
+def filter_labels(queryset, request, organization_id):
+    """
+    تصفية المهام بتصنيفات المؤسسة المذكورة في ?labels (دون استعلام منفصل للتصنيفات)
+    """
+    names, match = parse_label_filter(request)
+    if not names:
+        return queryset
+    links = TaskLabel.objects.filter(label__organization_id=organization_id, label__name__in=names)
+    if match == 'all':
+        # الأسماء فريدة داخل المؤسسة، فالمهمة تطابق كل الأسماء إذا ارتبطت بعددها من التصنيفات
+        links = links.values('task_id').annotate(matched=Count('label_id')).filter(matched=len(names))
+    return queryset.filter(id__in=links.values('task_id'))
+
+
+def project_label_counts(project_id):
+    """
+    قاموس {معرف التصنيف: عدد مهام المشروع المرتبطة به}
+    """
+    key = f'{LABEL_COUNTS_CACHE_PREFIX}:{project_id}'
+    counts = cache.get(key)
+    if counts is None:
+        rows = (
+            TaskLabel.objects.filter(task__project_id=project_id)
+            .values('label_id')
+            .annotate(n=Count('task_id'))
+            .order_by()
+        )
+        counts = {row['label_id']: row['n'] for row in rows}
+        cache.set(key, counts, getattr(settings, 'LABEL_COUNTS_CACHE_TIMEOUT', 600))
+    return counts
+
+
+def project_label_summary(project):
+    """
+    تصنيفات المؤسسة المستخدمة في المشروع مع أعدادها (التصنيفات المحذوفة تُستبعد هنا)
+    """
+    counts = project_label_counts(project.id)
+    if not counts:
+        return []
+    labels = Label.objects.filter(organization_id=project.organization_id, id__in=list(counts))
+    return [
+        {'id': label.id, 'name': label.name, 'color': label.color, 'count': counts[label.id]}
+        for label in labels
+    ]
+
+
+def forget_project_label_counts(project_ids):
+    keys = [f'{LABEL_COUNTS_CACHE_PREFIX}:{project_id}' for project_id in set(project_ids) if project_id]
+    if keys:
+        cache.delete_many(keys)
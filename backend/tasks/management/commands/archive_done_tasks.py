@@ -0,0 +1,50 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from tasks.inbox import publish_removed
+from tasks.models import Task
+
+
+class Command(BaseCommand):
+    help = 'أرشفة المهام المنجزة التي لم تُعدّل منذ عدد من الأيام، على دفعات'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days', type=int, default=getattr(settings, 'TASK_ARCHIVE_AFTER_DAYS', 30),
+            help='عدد الأيام منذ آخر تعديل للمهمة المنجزة قبل أرشفتها'
+        )
+        parser.add_argument('--batch-size', type=int, default=1000, help='عدد المهام في كل دفعة')
+        parser.add_argument('--project', type=int, action='append', dest='projects', help='معرف مشروع محدد (يمكن تكراره)')
+        parser.add_argument('--dry-run', action='store_true', help='عرض عدد المهام المرشحة دون أرشفتها')
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=options['days'])
+        # يستخدم الفهرس الجزئي للمهام المنجزة غير المؤرشفة
+        candidates = Task.objects.active().filter(status='done', updated_at__lt=cutoff)
+        if options['projects']:
+            candidates = candidates.filter(project_id__in=options['projects'])
+
+        if options['dry_run']:
+            self.stdout.write(f'عدد المهام المرشحة للأرشفة: {candidates.count()}')
+            return
+
+        total = 0
+        now = timezone.now()
+        while True:
+            # كل دفعة تحديث قصير مستقل حتى لا تُقفل الجداول طويلاً
+            ids = list(candidates.order_by('id').values_list('id', flat=True)[:options['batch_size']])
+            if not ids:
+                break
+            batch = Task.objects.filter(id__in=ids)
+            with transaction.atomic():
+                # المهام المؤرشفة تخرج من صناديق "مهامي" لمعينيها (الأرشفة تحديث مجمع بدون إشارات)
+                assigned = list(batch.filter(assignee__isnull=False).values_list('id', 'assignee_id'))
+                total += batch.archive(at=now)
+                publish_removed(assigned)
+            self.stdout.write(f'تمت أرشفة {total} مهمة...')
+
+        self.stdout.write(self.style.SUCCESS(f'تمت أرشفة {total} مهمة منجزة أقدم من {options["days"]} يوم'))
@@ -0,0 +1,44 @@
+import signal
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from tasks.reminders import ReminderScheduler
+
+
+class Command(BaseCommand):
+    help = 'تشغيل مجدول تذكيرات مواعيد استحقاق المهام (أحداث task_reminder إلى مجموعات المستخدمين)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--window', type=int, help='طول نافذة التحميل بالثواني (TASK_REMINDER_WINDOW_SECONDS)')
+        parser.add_argument('--refresh', type=int, help='الفاصل بين إعادة تحميل النافذة بالثواني (TASK_REMINDER_REFRESH_SECONDS)')
+        parser.add_argument('--once', action='store_true', help='إرسال التذكيرات المستحقة الآن ثم الخروج')
+
+    def handle(self, *args, **options):
+        scheduler = ReminderScheduler(window=options['window'], refresh=options['refresh'])
+        if options['once']:
+            sent, _ = scheduler.tick()
+            self.stdout.write(self.style.SUCCESS(f'تم إرسال {sent} تذكير'))
+            return
+
+        # معالج الإشارة يغير قائمة محلية فقط، والحلقة تتحقق منها كل ثانية على الأكثر
+        stopping = []
+        signal.signal(signal.SIGINT, lambda *args: stopping.append(True))
+        signal.signal(signal.SIGTERM, lambda *args: stopping.append(True))
+        self.stdout.write(self.style.SUCCESS('بدأ مجدول التذكيرات'))
+
+        while not stopping:
+            close_old_connections()
+            try:
+                sent, wait = scheduler.tick()
+            except Exception as e:
+                print(f"ERROR: خطأ في مجدول التذكيرات: {str(e)}")
+                sent, wait = 0, 5
+            if sent:
+                print(f"DEBUG: تم إرسال {sent} تذكير")
+            deadline = time.monotonic() + wait
+            while not stopping and time.monotonic() < deadline:
+                time.sleep(min(1.0, max(deadline - time.monotonic(), 0)))
+
+        self.stdout.write('تم إيقاف مجدول التذكيرات')
@@ -0,0 +1,55 @@
+# Generated by Django 4.2.7 on 2026-10-19 11:09
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0003_projectstats'),
+        ('organizations', '0003_alter_organization_slug'),
+        ('tasks', '0003_taskcomment'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaskStatusDailyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('todo_delta', models.IntegerField(default=0)),
+                ('in_progress_delta', models.IntegerField(default=0)),
+                ('done_delta', models.IntegerField(default=0)),
+                ('created', models.IntegerField(default=0)),
+                ('completed', models.IntegerField(default=0)),
+                ('cycle_time_seconds', models.BigIntegerField(default=0)),
+                ('cycle_time_count', models.IntegerField(default=0)),
+                ('project', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='status_rollups', to='projects.project')),
+            ],
+            options={
+                'ordering': ['date'],
+            },
+        ),
+        migrations.CreateModel(
+            name='TaskStatusTransition',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('task_id', models.BigIntegerField()),
+                ('from_status', models.CharField(blank=True, choices=[('todo', 'To Do'), ('in_progress', 'In Progress'), ('done', 'Done')], max_length=20, null=True)),
+                ('to_status', models.CharField(blank=True, choices=[('todo', 'To Do'), ('in_progress', 'In Progress'), ('done', 'Done')], max_length=20, null=True)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('organization', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='status_transitions', to='organizations.organization')),
+                ('project', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='status_transitions', to='projects.project')),
+            ],
+            options={
+                'ordering': ['created_at'],
+                'indexes': [models.Index(fields=['task_id', 'to_status', 'created_at'], name='tasks_tasks_task_id_73332e_idx'), models.Index(fields=['project', 'created_at'], name='tasks_tasks_project_b34a1a_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='taskstatusdailyrollup',
+            constraint=models.UniqueConstraint(fields=('project', 'date'), name='unique_project_status_rollup_date'),
+        ),
+    ]
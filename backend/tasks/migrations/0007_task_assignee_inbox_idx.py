@@ -0,0 +1,17 @@
+# Generated by Django 4.2.7 on 2026-10-19 11:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0006_task_archived_at'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(condition=models.Q(('archived_at__isnull', True)), fields=['assignee', 'status', 'updated_at'], name='task_assignee_inbox_idx'),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 4.2.7 on 2026-10-19 11:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0007_task_assignee_inbox_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='task',
+            name='due_date',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='task',
+            name='priority',
+            field=models.CharField(choices=[('low', 'Low'), ('medium', 'Medium'), ('high', 'High')], default='medium', max_length=10),
+        ),
+        migrations.AddField(
+            model_name='task',
+            name='reminder_sent_for',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(condition=models.Q(('archived_at__isnull', True), ('due_date__isnull', False), models.Q(('status', 'done'), _negated=True)), fields=['organization', 'due_date'], name='task_open_org_due_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(condition=models.Q(('archived_at__isnull', True), ('due_date__isnull', False), models.Q(('status', 'done'), _negated=True)), fields=['due_date'], name='task_open_due_idx'),
+        ),
+    ]
@@ -1,15 +1,109 @@
-from django.db import models
+from datetime import timedelta
+
+from django.db import models, transaction
+from django.utils import timezone
 from organizations.models import Organization
 from projects.models import Project
 from users.models import User
 
 
+class TaskQuerySet(models.QuerySet):
+    """
+    عمليات مجمعة على المهام تحافظ على إحصائيات المشاريع بتحديث واحد لكل مشروع
+    """
+
+    def _transition_rows(self):
+        return list(self.values('id', 'project_id', 'organization_id', 'status', 'created_at'))
+
+    def update_status(self, status):
+        """
+        تغيير حالة مجموعة مهام دفعة واحدة مع تحديث الإحصائيات وسجل الانتقالات
+        """
+        from collections import Counter
+        from projects import stats
+        from . import analytics
+
+        with transaction.atomic():
+            rows = [row for row in self._transition_rows() if row['status'] != status]
+            updated = self.filter(id__in=[row['id'] for row in rows]).update(status=status)
+            deltas = {}
+            for row in rows:
+                delta = deltas.setdefault(row['project_id'], Counter())
+                delta[row['status']] -= 1
+                delta[status] += 1
+            stats.apply_deltas(deltas)
+            analytics.record_transitions([
+                analytics.transition(row, row['status'], status) for row in rows
+            ])
+        return updated
+
+    def bulk_create(self, objs, *args, **kwargs):
+        from projects import stats
+        from . import analytics
+
+        with stats.batch(), analytics.batch():
+            created = super().bulk_create(objs, *args, **kwargs)
+            for task in created:
+                stats.record_change(task.project_id, None, task.status)
+            analytics.record_transitions([
+                analytics.transition(task, None, task.status) for task in created if task.pk
+            ])
+        return created
+
+    def active(self):
+        """
+        المهام غير المؤرشفة (تستخدم الفهارس الجزئية للمهام النشطة)
+        """
+        return self.filter(archived_at__isnull=True)
+
+    def archived(self):
+        return self.filter(archived_at__isnull=False)
+
+    def visible(self, include_archived=False):
+        return self if include_archived else self.active()
+
+    def unfinished(self):
+        """
+        المهام النشطة غير المنجزة (شرط فهارس مواعيد الاستحقاق الجزئية)
+        """
+        return self.active().exclude(status='done')
+
+    def overdue(self, now=None):
+        return self.unfinished().filter(due_date__lt=now or timezone.now())
+
+    def due_soon(self, hours=24, now=None):
+        now = now or timezone.now()
+        return self.unfinished().filter(due_date__gte=now, due_date__lt=now + timedelta(hours=hours))
+
+    def archive(self, at=None):
+        """
+        أرشفة مجموعة مهام دفعة واحدة؛ الحالة لا تتغير، فلا تتأثر الإحصائيات ولا سجل الانتقالات
+        """
+        return self.filter(archived_at__isnull=True).update(archived_at=at or timezone.now())
+
+    def unarchive(self):
+        return self.filter(archived_at__isnull=False).update(archived_at=None)
+
+    def delete(self):
+        # إشارات الحذف تُجمع وتُطبق مرة واحدة لكل مشروع
+        from projects import stats
+        from . import analytics
+
+        with stats.batch(), analytics.batch():
+            return super().delete()
+
+
 class Task(models.Model):
     STATUS_CHOICES = (
         ('todo', 'To Do'),
         ('in_progress', 'In Progress'),
         ('done', 'Done'),
     )
+    PRIORITY_CHOICES = (
+        ('low', 'Low'),
+        ('medium', 'Medium'),
+        ('high', 'High'),
+    )
     
     title = models.CharField(max_length=255)
     description = models.TextField(blank=True, null=True)
@@ -18,6 +112,14 @@ class Task(models.Model):
         choices=STATUS_CHOICES,
         default='todo'
     )
+    priority = models.CharField(
+        max_length=10,
+        choices=PRIORITY_CHOICES,
+        default='medium'
+    )
+    due_date = models.DateTimeField(null=True, blank=True)
+    # موعد الاستحقاق الذي أُرسل تذكيره (tasks.reminders)؛ تغيير due_date يجعل التذكير مستحقاً من جديد
+    reminder_sent_for = models.DateTimeField(null=True, blank=True, editable=False)
     project = models.ForeignKey(
         Project, 
         on_delete=models.CASCADE, 
@@ -35,12 +137,229 @@ class Task(models.Model):
         on_delete=models.CASCADE, 
         related_name='tasks'
     )
+    labels = models.ManyToManyField(
+        'Label',
+        through='TaskLabel',
+        related_name='tasks',
+        blank=True
+    )
+    # عدد التعليقات (محفوظ مسبقاً حتى تعرض البطاقات العدد دون استعلام التعليقات)
+    comment_count = models.PositiveIntegerField(default=0)
+    # عدد عناصر قائمة التحقق والمنجز منها (محفوظان مسبقاً ويُحدثان بتعبيرات F في tasks.checklists)
+    checklist_total = models.PositiveIntegerField(default=0)
+    checklist_done = models.PositiveIntegerField(default=0)
+    # وقت الأرشفة؛ المهام المؤرشفة تخرج من استعلامات اللوحات وتبقى في الإحصائيات والسجل
+    archived_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = TaskQuerySet.as_manager()
+
+    # حقول تُحدث باستعلامات update فقط: العدادات بتعبيرات F (إشارات التعليقات وtasks.checklists)
+    # ووقت الأرشفة (TaskQuerySet.archive/unarchive)
+    QUERY_UPDATED_FIELDS = ('comment_count', 'checklist_total', 'checklist_done', 'archived_at')
+
+    class Meta:
+        indexes = [
+            # فهارس جزئية للمهام النشطة فقط: حجمها يتبع عدد المهام النشطة وليس كل السجل
+            models.Index(
+                fields=['project', 'status'],
+                condition=models.Q(archived_at__isnull=True),
+                name='task_active_project_idx',
+            ),
+            models.Index(
+                fields=['organization', 'status'],
+                condition=models.Q(archived_at__isnull=True),
+                name='task_active_org_idx',
+            ),
+            # بحث المؤرشف عن المهام المنجزة القديمة
+            models.Index(
+                fields=['updated_at'],
+                condition=models.Q(archived_at__isnull=True, status='done'),
+                name='task_done_unarchived_idx',
+            ),
+            # صندوق "مهامي": مهام المعين النشطة حسب الحالة والأحدث تعديلاً
+            models.Index(
+                fields=['assignee', 'status', 'updated_at'],
+                condition=models.Q(archived_at__isnull=True),
+                name='task_assignee_inbox_idx',
+            ),
+            # المهام المتأخرة والقريبة من موعدها في المؤسسة، وتحميل نوافذ التذكير
+            models.Index(
+                fields=['organization', 'due_date'],
+                condition=models.Q(archived_at__isnull=True, due_date__isnull=False) & ~models.Q(status='done'),
+                name='task_open_org_due_idx',
+            ),
+            models.Index(
+                fields=['due_date'],
+                condition=models.Q(archived_at__isnull=True, due_date__isnull=False) & ~models.Q(status='done'),
+                name='task_open_due_idx',
+            ),
+        ]
+
+    def __str__(self):
+        return self.title
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance.remember_state()
+        return instance
+
+    def remember_state(self):
+        """
+        حفظ الحالة والمشروع كما تم تحميلهما لمعرفة ما تغير عند الحفظ
+        """
+        self._loaded_status = self.__dict__.get('status')
+        self._loaded_project_id = self.__dict__.get('project_id')
+
+    def save(self, *args, **kwargs):
+        # الحقول المحدثة باستعلامات update لا تُكتب عند حفظ مهمة موجودة، حتى لا تعيد النسخة المحملة قيمها القديمة
+        if not self._state.adding and kwargs.get('update_fields') is None and not kwargs.get('force_insert'):
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.QUERY_UPDATED_FIELDS
+            ]
+        # حفظ المهمة وتحديث إحصائيات المشروع (عبر الإشارات) في معاملة واحدة
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
+
+class Label(models.Model):
+    """
+    تصنيف للمهام خاص بالمؤسسة (الاسم فريد داخل المؤسسة)
+    """
+    organization = models.ForeignKey(
+        Organization,
+        on_delete=models.CASCADE,
+        related_name='labels'
+    )
+    name = models.CharField(max_length=50)
+    color = models.CharField(max_length=7, default='#6b7280')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['name']
+        constraints = [
+            models.UniqueConstraint(fields=['organization', 'name'], name='unique_organization_label_name'),
+        ]
+
+    def __str__(self):
+        return self.name
+
+
+class TaskLabel(models.Model):
+    """
+    جدول ربط المهام بالتصنيفات
+    فهرسان مركبان بدلاً من فهارس الأعمدة المنفصلة: (task, label) لجلب تصنيفات صفحة من المهام،
+    و(label, task) لتصفية المهام حسب التصنيفات دون قراءة صفوف المهام
+    """
+    task = models.ForeignKey(Task, on_delete=models.CASCADE, db_index=False)
+    label = models.ForeignKey(Label, on_delete=models.CASCADE, db_index=False)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['task', 'label'], name='unique_task_label'),
+        ]
+        indexes = [
+            models.Index(fields=['label', 'task'], name='tasklabel_label_task_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.task_id}: {self.label_id}'
+
+
+class ChecklistItem(models.Model):
+    """
+    عنصر في قائمة التحقق (المهام الفرعية) لمهمة
+    تغيير is_done يتم عبر tasks.checklists.set_done حتى يبقى عداد المهمة صحيحاً
+    """
+    task = models.ForeignKey(
+        Task,
+        on_delete=models.CASCADE,
+        related_name='checklist_items'
+    )
+    title = models.CharField(max_length=255)
+    is_done = models.BooleanField(default=False)
+    position = models.PositiveIntegerField(default=0)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        ordering = ['position', 'id']
+        indexes = [
+            models.Index(fields=['task', 'position']),
+        ]
+
     def __str__(self):
         return self.title
 
+    @property
+    def organization(self):
+        # لصلاحية IsSameOrganization (تُجلب المهمة ومؤسستها مع العنصر في ChecklistItemViewSet)
+        return self.task.organization
+
+
+class TaskStatusTransition(models.Model):
+    """
+    سجل إلحاقي لتغييرات حالة المهام (لا يتم تعديله أو حذفه)
+    from_status فارغة عند إنشاء المهمة، وto_status فارغة عند حذفها
+    """
+    task_id = models.BigIntegerField()
+    project = models.ForeignKey(
+        Project,
+        on_delete=models.CASCADE,
+        related_name='status_transitions'
+    )
+    organization = models.ForeignKey(
+        Organization,
+        on_delete=models.CASCADE,
+        related_name='status_transitions'
+    )
+    from_status = models.CharField(max_length=20, choices=Task.STATUS_CHOICES, null=True, blank=True)
+    to_status = models.CharField(max_length=20, choices=Task.STATUS_CHOICES, null=True, blank=True)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['task_id', 'to_status', 'created_at']),
+            models.Index(fields=['project', 'created_at']),
+        ]
+
+    def __str__(self):
+        return f'{self.task_id}: {self.from_status} -> {self.to_status}'
+
+
+class TaskStatusDailyRollup(models.Model):
+    """
+    تجميع يومي لانتقالات الحالة لكل مشروع
+    يحفظ صافي التغير في كل حالة خلال اليوم، وعدد المهام المكتملة ومجموع زمن الدورة
+    تُحسب منه تقارير الإنجاز دون المرور على الانتقالات الخام
+    """
+    project = models.ForeignKey(
+        Project,
+        on_delete=models.CASCADE,
+        related_name='status_rollups'
+    )
+    date = models.DateField()
+    todo_delta = models.IntegerField(default=0)
+    in_progress_delta = models.IntegerField(default=0)
+    done_delta = models.IntegerField(default=0)
+    created = models.IntegerField(default=0)
+    completed = models.IntegerField(default=0)
+    cycle_time_seconds = models.BigIntegerField(default=0)
+    cycle_time_count = models.IntegerField(default=0)
+
+    class Meta:
+        ordering = ['date']
+        constraints = [
+            models.UniqueConstraint(fields=['project', 'date'], name='unique_project_status_rollup_date'),
+        ]
+
+    def __str__(self):
+        return f'{self.project_id} - {self.date}'
+
 
 class TaskComment(models.Model):
     """
@@ -63,6 +382,10 @@ class TaskComment(models.Model):
     
     class Meta:
         ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['task', '-created_at', '-id']),
+        ]
         
     def __str__(self):
-        return f'تعليق بواسطة {self.author.username} على {self.task.title}'
+        # استخدام المعرفات فقط حتى لا يتطلب عرض التعليق استعلامات إضافية
+        return f'تعليق #{self.pk} بواسطة المستخدم {self.author_id} على المهمة {self.task_id}'
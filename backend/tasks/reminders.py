@@ -0,0 +1,124 @@
+"""
+تذكيرات مواعيد استحقاق المهام
+- التذكير يُرسل إلى مجموعة المعين user_{id} (حدث task_reminder) قبل الموعد بـ TASK_REMINDER_LEAD_MINUTES
+- المجدول (manage.py run_reminders) يحمّل نافذة قصيرة فقط من المواعيد القادمة عبر فهرس
+  task_open_due_idx، ويحفظها في كومة صغرى (heap) مرتبة بوقت التذكير، وينام حتى أقرب وقت منها
+- النافذة يُعاد تحميلها كل TASK_REMINDER_REFRESH_SECONDS، فالموعد الجديد أو المعدل يدخل الكومة
+  خلال هذه المدة؛ وهي أقصى تأخير للتذكير عن وقته
+- reminder_sent_for يُحدث بشرط أن الموعد لم يتغير ولم يُذكّر به، فلا يتكرر التذكير عند تشغيل أكثر
+  من مجدول أو إعادة تشغيله، والعناصر القديمة في الكومة (موعد تغير أو مهمة أُنجزت) تُتجاهل
+"""
+import heapq
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from trello_backend.broadcast import publish_later, user_group
+
+from .inbox import INBOX_FIELDS, inbox_row
+from .models import Task
+
+
+def reminder_lead():
+    return timedelta(minutes=getattr(settings, 'TASK_REMINDER_LEAD_MINUTES', 60))
+
+
+def not_reminded():
+    return Q(reminder_sent_for__isnull=True) | ~Q(reminder_sent_for=F('due_date'))
+
+
+def upcoming(start, end):
+    """
+    المهام التي يحين وقت تذكيرها بين start وend: قائمة (وقت التذكير، المعرف، الموعد) مرتبة
+    """
+    lead = reminder_lead()
+    rows = (
+        Task.objects.unfinished()
+        .filter(assignee__isnull=False, due_date__gte=start + lead, due_date__lt=end + lead)
+        .filter(not_reminded())
+        .order_by('due_date')
+        .values_list('id', 'due_date')
+    )
+    return [(due_date - lead, task_id, due_date) for task_id, due_date in rows]
+
+
+def send_reminder(task_id, due_date):
+    """
+    تسجيل التذكير وبثه إلى المعين بعد نجاح المعاملة؛ يعيد False إذا لم يعد مستحقاً
+    """
+    with transaction.atomic():
+        claimed = (
+            Task.objects.unfinished()
+            .filter(not_reminded(), id=task_id, due_date=due_date, assignee__isnull=False)
+            .update(reminder_sent_for=due_date)
+        )
+        if not claimed:
+            return False
+        task = Task.objects.only(*INBOX_FIELDS).get(id=task_id)
+        publish_later([user_group(task.assignee_id)], {
+            'type': 'task_reminder',
+            'task': inbox_row(task),
+            'overdue': due_date <= timezone.now(),
+        })
+    return True
+
+
+class ReminderScheduler:
+    """
+    كومة التذكيرات القادمة ضمن النافذة المحملة
+    """
+
+    def __init__(self, window=None, refresh=None, grace=None):
+        self.window = timedelta(seconds=window or getattr(settings, 'TASK_REMINDER_WINDOW_SECONDS', 300))
+        self.refresh = timedelta(seconds=refresh or getattr(settings, 'TASK_REMINDER_REFRESH_SECONDS', 30))
+        # التذكيرات الفائتة أثناء توقف المجدول تُرسل إذا لم يمض على وقتها أكثر من هذه المدة
+        self.grace = timedelta(minutes=getattr(settings, 'TASK_REMINDER_GRACE_MINUTES', 60) if grace is None else grace)
+        self.heap = []
+        self.scheduled = set()
+        self.refreshed_at = None
+
+    def load(self, now):
+        """
+        إعادة تحميل النافذة [now - grace، now + window) وإضافة الجديد منها إلى الكومة
+        """
+        added = 0
+        for entry in upcoming(now - self.grace, now + self.window):
+            key = entry[1:]
+            if key not in self.scheduled:
+                self.scheduled.add(key)
+                heapq.heappush(self.heap, entry)
+                added += 1
+        self.refreshed_at = now
+        return added
+
+    def fire_due(self, now):
+        """
+        إرسال كل التذكيرات التي حان وقتها؛ يعيد عدد المرسل منها
+        """
+        sent = 0
+        while self.heap and self.heap[0][0] <= now:
+            _, task_id, due_date = heapq.heappop(self.heap)
+            self.scheduled.discard((task_id, due_date))
+            try:
+                if send_reminder(task_id, due_date):
+                    sent += 1
+            except Exception as e:
+                print(f"WARNING: خطأ في إرسال تذكير المهمة {task_id}: {str(e)}")
+        return sent
+
+    def tick(self, now=None):
+        """
+        خطوة واحدة: إعادة تحميل النافذة عند الحاجة ثم إرسال المستحق؛ يعيد (المرسل، ثواني الانتظار)
+        """
+        now = now or timezone.now()
+        if self.refreshed_at is None or now - self.refreshed_at >= self.refresh:
+            self.load(now)
+        sent = self.fire_due(now)
+
+        wake_at = self.refreshed_at + self.refresh
+        if self.heap:
+            wake_at = min(wake_at, self.heap[0][0])
+        return sent, max((wake_at - now).total_seconds(), 0.0)
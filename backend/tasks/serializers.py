@@ -1,11 +1,54 @@
+import re
+
 from rest_framework import serializers
-from .models import Task, TaskComment
-from users.serializers import UserSerializer
+from .models import ChecklistItem, Label, Task, TaskComment
+from users.serializers import UserSerializer, UserSummarySerializer
 from projects.serializers import ProjectSerializer
 from organizations.serializers import OrganizationSerializer
+from trello_backend.fieldsets import SparseFieldsetMixin
+
+
+class LabelSerializer(serializers.ModelSerializer):
+    """
+    محول تصنيفات المهام (المؤسسة تُعين من المستخدم)
+    """
+    
+    class Meta:
+        model = Label
+        fields = ['id', 'name', 'color', 'organization', 'created_at']
+        read_only_fields = ['id', 'organization', 'created_at']
+    
+    def validate_name(self, value):
+        """
+        الاسم فريد داخل المؤسسة (عند الإنشاء وإعادة التسمية)
+        """
+        if self.instance is not None:
+            organization_id = self.instance.organization_id
+        else:
+            request = self.context.get('request')
+            organization_id = request.user.organization_id if request else None
+        labels = Label.objects.filter(organization_id=organization_id, name=value)
+        if self.instance is not None:
+            labels = labels.exclude(id=self.instance.id)
+        if labels.exists():
+            raise serializers.ValidationError("يوجد تصنيف بهذا الاسم في المؤسسة")
+        return value
+    
+    def validate_color(self, value):
+        if not re.fullmatch(r'#[0-9a-fA-F]{6}', value):
+            raise serializers.ValidationError("اللون يجب أن يكون بصيغة #RRGGBB")
+        return value
 
 
-class TaskSerializer(serializers.ModelSerializer):
+class LabelSummarySerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Label
+        fields = ['id', 'name', 'color']
+
+
+class TaskSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    labels = serializers.PrimaryKeyRelatedField(many=True, queryset=Label.objects.all(), required=False)
+    labels_detail = LabelSummarySerializer(source='labels', many=True, read_only=True)
     assignee_detail = UserSerializer(source='assignee', read_only=True)
     project_detail = ProjectSerializer(source='project', read_only=True)
     organization_detail = OrganizationSerializer(source='organization', read_only=True)
@@ -13,13 +56,43 @@ class TaskSerializer(serializers.ModelSerializer):
     class Meta:
         model = Task
         fields = [
-            'id', 'title', 'description', 'status', 
+            'id', 'title', 'description', 'status', 'priority', 'due_date',
             'project', 'project_detail',
             'assignee', 'assignee_detail',
             'organization', 'organization_detail',
+            'labels', 'labels_detail',
+            'comment_count', 'checklist_total', 'checklist_done', 'archived_at',
             'created_at', 'updated_at'
         ]
-        read_only_fields = ['id', 'created_at', 'updated_at']
+        read_only_fields = [
+            'id', 'comment_count', 'checklist_total', 'checklist_done', 'archived_at', 'created_at', 'updated_at'
+        ]
+        expandable_fields = ['project_detail', 'assignee_detail', 'organization_detail', 'labels_detail']
+        # العلاقات التي يقرؤها كل حقل؛ جلبها مع المهام يجعل التحويل بدون أي استعلام إضافي
+        related_fields = {
+            'assignee_detail': ('assignee__organization',),
+            'project_detail': ('project__owner__organization', 'project__organization', 'project__stats'),
+            'organization_detail': ('organization',),
+        }
+        # تصنيفات كل مهام الصفحة في استعلام واحد
+        prefetch_fields = {
+            'labels': ('labels',),
+            'labels_detail': ('labels',),
+        }
+    
+    def validate_labels(self, labels):
+        """
+        التصنيفات يجب أن تكون من مؤسسة المهمة
+        """
+        # المهام الجديدة تُنشأ في مؤسسة المستخدم (TaskViewSet.perform_create)
+        if self.instance is not None:
+            organization_id = self.instance.organization_id
+        else:
+            request = self.context.get('request')
+            organization_id = request.user.organization_id if request else None
+        if any(label.organization_id != organization_id for label in labels):
+            raise serializers.ValidationError("لا يمكن إضافة تصنيف من مؤسسة أخرى")
+        return labels
         
     def create(self, validated_data):
         # تلقائيًا إضافة المؤسسة من المستخدم إذا لم يتم تحديدها
@@ -145,11 +218,34 @@ class TaskSerializer(serializers.ModelSerializer):
                     raise serializers.ValidationError(f"حدث خطأ أثناء إنشاء المهمة. الرجاء المحاولة مرة أخرى.")
 
 
-class TaskCommentSerializer(serializers.ModelSerializer):
+# العلاقات التي يقرؤها TaskSerializer بكامل حقوله
+TASK_SERIALIZER_RELATED = TaskSerializer.select_related_for()
+
+
+class InboxTaskSerializer(serializers.ModelSerializer):
+    """
+    محول مختصر لصندوق "مهامي": عنوان المشروع بدلاً من تفاصيله
+    العناوين تُمرر في context['project_titles'] (inbox.get_project_titles) لكل الصفحة دفعة واحدة
+    """
+    project_title = serializers.SerializerMethodField()
+    
+    class Meta:
+        model = Task
+        fields = [
+            'id', 'title', 'status', 'priority', 'due_date', 'project', 'project_title', 'organization',
+            'assignee', 'comment_count', 'created_at', 'updated_at'
+        ]
+        read_only_fields = fields
+    
+    def get_project_title(self, obj):
+        return self.context.get('project_titles', {}).get(obj.project_id)
+
+
+class TaskCommentSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """
     محول لنموذج تعليقات المهام
     """
-    author_detail = UserSerializer(source='author', read_only=True)
+    author_detail = UserSummarySerializer(source='author', read_only=True)
     
     class Meta:
         model = TaskComment
@@ -158,6 +254,8 @@ class TaskCommentSerializer(serializers.ModelSerializer):
             'created_at', 'updated_at', 'is_edited'
         ]
         read_only_fields = ['id', 'created_at', 'updated_at', 'is_edited', 'author']
+        expandable_fields = ['author_detail']
+        related_fields = {'author_detail': ('author',)}
     
     def create(self, validated_data):
         # تعيين المستخدم الحالي كمؤلف للتعليق
@@ -182,3 +280,35 @@ class TaskCommentSerializer(serializers.ModelSerializer):
         except Exception as e:
             print(f"ERROR: خطأ في إنشاء التعليق: {str(e)}")
             raise serializers.ValidationError("حدث خطأ أثناء حفظ التعليق")
+
+
+
+class ChecklistItemSerializer(serializers.ModelSerializer):
+    """
+    محول عناصر قائمة التحقق
+    المهمة لا تتغير بعد الإنشاء، وis_done يُغير عبر checklists.set_done في العرض
+    """
+    
+    class Meta:
+        model = ChecklistItem
+        fields = ['id', 'task', 'title', 'is_done', 'position', 'created_at', 'updated_at']
+        read_only_fields = ['id', 'created_at', 'updated_at']
+    
+    def get_fields(self):
+        fields = super().get_fields()
+        if self.instance is not None:
+            fields['task'].read_only = True
+        return fields
+    
+    def validate_task(self, task):
+        user = self.context['request'].user
+        if not user.is_system_owner and task.organization_id != user.organization_id:
+            raise serializers.ValidationError("لا يمكنك إضافة عناصر إلى مهمة من مؤسسة أخرى")
+        return task
+    
+    def update(self, instance, validated_data):
+        for attr, value in validated_data.items():
+            setattr(instance, attr, value)
+        # حفظ الحقول المعدلة فقط حتى لا يُكتب فوق is_done إذا بدله طلب آخر بالتزامن
+        instance.save(update_fields=list(validated_data) + ['updated_at'])
+        return instance
@@ -0,0 +1,122 @@
+from django.db.models import F
+from django.db.models.signals import m2m_changed, post_save, post_delete
+from django.dispatch import receiver
+from .models import ChecklistItem, Task, TaskComment
+from . import analytics, checklists, inbox, labels
+from projects import stats
+from projects.models import Project
+
+
+@receiver(post_save, sender=Task)
+def update_project_stats_on_save(sender, instance, created, **kwargs):
+    """
+    تحديث إحصائيات المشروع وسجل الانتقالات عند إنشاء مهمة أو تغيير حالتها أو نقلها لمشروع آخر
+    """
+    old_status = getattr(instance, '_loaded_status', None)
+    old_project_id = getattr(instance, '_loaded_project_id', None)
+    transitions = []
+
+    if created or old_status is None:
+        stats.record_change(instance.project_id, None, instance.status)
+        transitions.append(analytics.transition(instance, None, instance.status))
+    elif old_project_id != instance.project_id:
+        labels.forget_project_label_counts([old_project_id, instance.project_id])
+        stats.record_change(old_project_id, old_status, None)
+        stats.record_change(instance.project_id, None, instance.status)
+        removed = analytics.transition(instance, old_status, None)
+        removed['project_id'] = old_project_id
+        transitions += [removed, analytics.transition(instance, None, instance.status)]
+    else:
+        # تغيير الحالة، أو تحديث وقت آخر نشاط فقط إذا لم تتغير
+        stats.record_change(instance.project_id, old_status, instance.status)
+        transitions.append(analytics.transition(instance, old_status, instance.status))
+
+    analytics.record_transitions(transitions)
+
+    instance.remember_state()
+
+
+@receiver(post_delete, sender=Task)
+def update_project_stats_on_delete(sender, instance, origin=None, **kwargs):
+    """
+    تحديث إحصائيات المشروع وسجل الانتقالات عند حذف مهمة
+    عند حذف المشروع أو المؤسسة نفسها تُحذف الإحصائيات معها فلا حاجة لتحديثها
+    """
+    if origin is not None and not isinstance(origin, Task) and getattr(origin, 'model', None) is not Task:
+        return
+    old_status = getattr(instance, '_loaded_status', None) or instance.status
+    labels.forget_project_label_counts([instance.project_id])
+    stats.record_change(instance.project_id, old_status, None)
+    analytics.record_transitions([analytics.transition(instance, old_status, None)])
+
+
+@receiver(post_save, sender=TaskComment)
+def increment_comment_count(sender, instance, created, **kwargs):
+    """
+    زيادة عداد تعليقات المهمة عند إضافة تعليق
+    """
+    if created:
+        Task.objects.filter(id=instance.task_id).update(comment_count=F('comment_count') + 1)
+        inbox.publish_task_row(instance.task_id)
+
+
+@receiver(post_delete, sender=TaskComment)
+def decrement_comment_count(sender, instance, origin=None, **kwargs):
+    """
+    إنقاص عداد تعليقات المهمة عند حذف تعليق (لا حاجة لذلك عند حذف المهمة نفسها)
+    """
+    if origin is not None and not isinstance(origin, TaskComment) and getattr(origin, 'model', None) is not TaskComment:
+        return
+    Task.objects.filter(id=instance.task_id, comment_count__gt=0).update(comment_count=F('comment_count') - 1)
+    inbox.publish_task_row(instance.task_id)
+
+
+@receiver(post_save, sender=Project)
+@receiver(post_delete, sender=Project)
+def forget_inbox_project_title(sender, instance, **kwargs):
+    """
+    حذف عنوان المشروع المخزن لصندوق "مهامي" عند تعديله أو حذفه
+    """
+    inbox.forget_project_title(instance.pk)
+
+
+@receiver(m2m_changed, sender=Task.labels.through)
+def forget_label_counts_on_change(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    حذف أعداد التصنيفات المخزنة لمشاريع المهام التي تغيرت تصنيفاتها
+    (من جهة التصنيف، قبل إزالته من كل مهامه، تُحدد المشاريع قبل الحذف)
+    """
+    if not reverse:
+        if action in ('post_add', 'post_remove', 'post_clear'):
+            labels.forget_project_label_counts([instance.project_id])
+        return
+    if action in ('post_add', 'post_remove'):
+        task_ids = pk_set
+    elif action == 'pre_clear':
+        task_ids = instance.tasks.values('id')
+    else:
+        return
+    labels.forget_project_label_counts(
+        Task.objects.filter(id__in=task_ids).values_list('project_id', flat=True).distinct()
+    )
+
+
+@receiver(post_save, sender=ChecklistItem)
+def increment_checklist_counters(sender, instance, created, **kwargs):
+    """
+    زيادة عدادات قائمة التحقق عند إضافة عنصر (تغيير الحالة يتم عبر checklists.set_done)
+    """
+    if created:
+        checklists.adjust_counters(instance.task_id, total=1, done=1 if instance.is_done else 0)
+
+
+@receiver(post_delete, sender=ChecklistItem)
+def decrement_checklist_counters(sender, instance, origin=None, **kwargs):
+    """
+    إنقاص عدادات قائمة التحقق عند حذف عنصر بـ item.delete()
+    الحذف عبر الواجهة يتم بـ checklists.delete_item (حذف مشروط من QuerySet يُعدل العدادات بنفسه)،
+    ولا حاجة لذلك عند حذف المهمة نفسها
+    """
+    if not isinstance(origin, ChecklistItem):
+        return
+    checklists.adjust_counters(instance.task_id, total=-1, done=-1 if instance.is_done else 0)
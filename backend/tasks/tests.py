@@ -0,0 +1,243 @@
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import RequestFactory, TestCase
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from organizations.models import Organization
+from projects.models import Project
+from users.models import User
+
+from . import checklists, inbox, reminders
+from .models import ChecklistItem, Label, Task, TaskComment
+from .serializers import TaskSerializer
+from .views import filter_due
+
+
+class TaskFixtureMixin:
+    """
+    مؤسسة ومستخدم ومشروع ومهمة للاختبارات
+    """
+
+    def setUp(self):
+        self.organization = Organization.objects.create(name='Org', slug='org')
+        self.user = User.objects.create_user(username='member', password='x', organization=self.organization)
+        self.project = Project.objects.create(title='Board', owner=self.user, organization=self.organization)
+        self.task = Task.objects.create(title='Task', project=self.project, organization=self.organization)
+
+    def save_stale(self, task, **data):
+        """
+        حفظ نسخة محملة مسبقاً عبر TaskSerializer (مثل طلب PATCH متزامن)
+        """
+        request = RequestFactory().patch('/')
+        request.user = self.user
+        serializer = TaskSerializer(task, data=data, partial=True, context={'request': request})
+        serializer.is_valid(raise_exception=True)
+        return serializer.save()
+
+
+class TaskCounterFieldsTests(TaskFixtureMixin, TestCase):
+
+    def test_task_update_keeps_concurrent_checklist_counters(self):
+        stale = Task.objects.get(id=self.task.id)
+        ChecklistItem.objects.create(task=self.task, title='Step', is_done=True)
+        self.save_stale(stale, title='Renamed')
+        task = Task.objects.get(id=self.task.id)
+        self.assertEqual((task.title, task.checklist_total, task.checklist_done), ('Renamed', 1, 1))
+
+    def test_task_update_keeps_concurrent_comment_count(self):
+        stale = Task.objects.get(id=self.task.id)
+        TaskComment.objects.create(task=self.task, author=self.user, content='Note')
+        self.save_stale(stale, status='in_progress')
+        self.assertEqual(Task.objects.get(id=self.task.id).comment_count, 1)
+
+    def test_task_update_does_not_unarchive(self):
+        stale = Task.objects.get(id=self.task.id)
+        Task.objects.filter(id=self.task.id).archive()
+        self.save_stale(stale, description='Edited')
+        self.assertIsNotNone(Task.objects.get(id=self.task.id).archived_at)
+
+
+class LabelApiTests(APITestCase):
+
+    def setUp(self):
+        self.organization = Organization.objects.create(name='Org', slug='org')
+        self.user = User.objects.create_user(username='member', password='x', organization=self.organization)
+        self.client.force_authenticate(self.user)
+        self.bug = Label.objects.create(organization=self.organization, name='bug', color='#ff0000')
+        self.feature = Label.objects.create(organization=self.organization, name='feature', color='#00ff00')
+
+    def test_create_duplicate_name(self):
+        response = self.client.post('/api/labels/', {'name': 'bug', 'color': '#000000'}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('name', response.data)
+
+    def test_rename_to_existing_name(self):
+        response = self.client.patch(f'/api/labels/{self.feature.id}/', {'name': 'bug'}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('name', response.data)
+
+    def test_rename_keeping_own_name(self):
+        response = self.client.patch(f'/api/labels/{self.bug.id}/', {'name': 'bug', 'color': '#111111'}, format='json')
+        self.assertEqual(response.status_code, 200)
+
+    def test_same_name_in_other_organization(self):
+        other = Organization.objects.create(name='Other', slug='other')
+        Label.objects.create(organization=other, name='urgent', color='#ff0000')
+        response = self.client.post('/api/labels/', {'name': 'urgent', 'color': '#000000'}, format='json')
+        self.assertEqual(response.status_code, 201)
+
+
+class ChecklistApiTests(TaskFixtureMixin, APITestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_authenticate(self.user)
+        self.events = []
+        patcher = mock.patch.object(checklists, 'publish_later', side_effect=lambda groups, event: self.events.append(event))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def counters(self):
+        task = Task.objects.get(id=self.task.id)
+        return task.checklist_total, task.checklist_done
+
+    def add_item(self, title='Step', **data):
+        response = self.client.post('/api/checklist-items/', dict(data, task=self.task.id, title=title), format='json')
+        self.assertEqual(response.status_code, 201)
+        return response.data['id']
+
+    def test_create_toggle_delete_maintain_counters(self):
+        first = self.add_item()
+        second = self.add_item(is_done=True)
+        self.assertEqual(self.counters(), (2, 1))
+
+        response = self.client.post(f'/api/checklist-items/{first}/toggle/', {'is_done': True}, format='json')
+        self.assertEqual((response.data['checklist_total'], response.data['checklist_done']), (2, 2))
+
+        self.assertEqual(self.client.delete(f'/api/checklist-items/{second}/').status_code, 204)
+        self.assertEqual(self.counters(), (1, 1))
+
+    def test_toggle_to_same_state_twice_counts_once(self):
+        item = self.add_item()
+        for _ in range(2):
+            self.client.post(f'/api/checklist-items/{item}/toggle/', {'is_done': True}, format='json')
+        self.assertEqual(self.counters(), (1, 1))
+        self.assertEqual(len([event for event in self.events if event['type'] == 'checklist_item_update']), 2)
+
+    def test_delete_with_stale_instance_counts_once(self):
+        item_id = self.add_item()
+        stale = ChecklistItem.objects.get(id=item_id)
+        ChecklistItem.objects.filter(id=item_id).update(is_done=True)
+        Task.objects.filter(id=self.task.id).update(checklist_done=1)
+        self.assertTrue(checklists.delete_item(stale))
+        self.assertFalse(checklists.delete_item(stale))
+        self.assertEqual(self.counters(), (0, 0))
+
+    def test_task_from_other_organization_rejected(self):
+        other = Organization.objects.create(name='Other', slug='other')
+        owner = User.objects.create_user(username='outsider', password='x', organization=other)
+        project = Project.objects.create(title='Other board', owner=owner, organization=other)
+        task = Task.objects.create(title='Other task', project=project, organization=other)
+        response = self.client.post('/api/checklist-items/', {'task': task.id, 'title': 'Step'}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('task', response.data)
+        self.assertFalse(ChecklistItem.objects.exists())
+
+    def test_update_event_carries_diff_and_counters(self):
+        item = self.add_item()
+        self.events.clear()
+        self.client.post(f'/api/checklist-items/{item}/toggle/', {'is_done': True}, format='json')
+        self.assertEqual(self.events, [{
+            'type': 'checklist_item_update',
+            'task_id': self.task.id,
+            'item': {'id': item, 'is_done': True},
+            'checklist_total': 1,
+            'checklist_done': 1,
+        }])
+
+
+class InboxEventTests(TaskFixtureMixin, APITestCase):
+
+    def setUp(self):
+        super().setUp()
+        Task.objects.filter(id=self.task.id).update(assignee=self.user)
+        self.client.force_authenticate(self.user)
+        self.events = []
+        patcher = mock.patch.object(inbox, 'publish_later', side_effect=lambda groups, event: self.events.append((groups, event)))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_archive_and_unarchive(self):
+        self.client.post(f'/api/tasks/{self.task.id}/archive/')
+        self.client.post(f'/api/tasks/{self.task.id}/unarchive/')
+        self.assertEqual([event['type'] for _, event in self.events], ['inbox_remove', 'inbox_upsert'])
+
+    def test_archive_done_tasks_removes_from_inbox(self):
+        Task.objects.filter(id=self.task.id).update(status='done', updated_at=timezone.now() - timedelta(days=60))
+        call_command('archive_done_tasks', '--days', '30', stdout=StringIO())
+        self.assertEqual(self.events, [([f'user_{self.user.id}'], {'type': 'inbox_remove', 'task_id': self.task.id})])
+
+    def test_comment_updates_inbox_row(self):
+        TaskComment.objects.create(task=self.task, author=self.user, content='Note')
+        groups, event = self.events[-1]
+        self.assertEqual((groups, event['type'], event['task']['comment_count']), ([f'user_{self.user.id}'], 'inbox_upsert', 1))
+
+
+class ReminderTests(TaskFixtureMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.now = timezone.now()
+        self.sent = []
+        patcher = mock.patch.object(reminders, 'publish_later', side_effect=lambda groups, event: self.sent.append((groups, event)))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def set_due(self, task, due_date, **fields):
+        Task.objects.filter(id=task.id).update(due_date=due_date, assignee=self.user, **fields)
+
+    def test_scheduler_sends_each_reminder_once(self):
+        self.set_due(self.task, self.now + reminders.reminder_lead() + timedelta(seconds=10))
+        scheduler = reminders.ReminderScheduler(window=60, refresh=30)
+        sent, wait = scheduler.tick(self.now)
+        self.assertEqual((sent, wait), (0, 10.0))
+        self.assertEqual(scheduler.tick(self.now + timedelta(seconds=10))[0], 1)
+        # مجدول آخر (أو إعادة تشغيل) لا يكرر التذكير
+        self.assertEqual(reminders.ReminderScheduler(window=60).tick(self.now + timedelta(seconds=10))[0], 0)
+        groups, event = self.sent[0]
+        self.assertEqual(groups, [f'user_{self.user.id}'])
+        self.assertEqual((event['type'], event['task']['id'], event['overdue']), ('task_reminder', self.task.id, False))
+        self.assertEqual(len(self.sent), 1)
+
+    def test_changed_due_date_rearms_reminder(self):
+        due_date = self.now + reminders.reminder_lead()
+        self.set_due(self.task, due_date)
+        self.assertTrue(reminders.send_reminder(self.task.id, due_date))
+        self.assertFalse(reminders.send_reminder(self.task.id, due_date))
+        later = due_date + timedelta(hours=1)
+        self.set_due(self.task, later)
+        # عنصر قديم في الكومة بالموعد السابق يُتجاهل
+        self.assertFalse(reminders.send_reminder(self.task.id, due_date))
+        self.assertTrue(reminders.send_reminder(self.task.id, later))
+        self.assertEqual(len(self.sent), 2)
+
+    def test_done_or_unassigned_tasks_are_skipped(self):
+        due_date = self.now + reminders.reminder_lead()
+        self.set_due(self.task, due_date, status='done')
+        other = Task.objects.create(title='Other', project=self.project, organization=self.organization, due_date=due_date)
+        self.assertEqual(reminders.upcoming(self.now - timedelta(minutes=1), self.now + timedelta(minutes=1)), [])
+        self.assertFalse(reminders.send_reminder(self.task.id, due_date))
+        self.assertFalse(reminders.send_reminder(other.id, due_date))
+        self.assertEqual(self.sent, [])
+
+    def test_due_filter(self):
+        overdue = Task.objects.create(title='Late', project=self.project, organization=self.organization, due_date=self.now - timedelta(hours=1))
+        soon = Task.objects.create(title='Soon', project=self.project, organization=self.organization, due_date=self.now + timedelta(hours=1))
+        Task.objects.create(title='Done', project=self.project, organization=self.organization, due_date=self.now - timedelta(hours=1), status='done')
+        for due, expected in (('overdue', [overdue.id]), ('soon', [soon.id])):
+            request = RequestFactory().get('/', {'due': due})
+            self.assertEqual(list(filter_due(Task.objects.all(), request).values_list('id', flat=True)), expected)
@@ -1,15 +1,44 @@
-from rest_framework import viewsets, permissions, status
+from rest_framework import mixins, viewsets, permissions, status
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
 from rest_framework.decorators import action
-from .models import Task, TaskComment
-from .serializers import TaskSerializer, TaskCommentSerializer
+from .models import ChecklistItem, Label, Task, TaskComment
+from .serializers import TaskSerializer, TaskCommentSerializer, InboxTaskSerializer, LabelSerializer, ChecklistItemSerializer
+from . import checklists
+from .inbox import inbox_queryset, get_project_titles, publish_inbox_change
+from .labels import filter_labels
 from .permissions import IsCommentAuthor, CanDeleteComment
-from trello_backend.permissions import IsSameOrganization, IsProjectOwner, IsTaskAssignee
-from channels.layers import get_channel_layer
-from asgiref.sync import async_to_sync
+from trello_backend.permissions import IsSameOrganization, IsProjectOwner, IsTaskAssignee, IsOrganizationAdmin
+from trello_backend.pagination import NewestFirstCursorPagination
+from trello_backend.async_views import AsyncReadView, json_response, serialize
+from trello_backend.broadcast import publish_later, project_group, org_group
+from activity.recorder import record, record_task
+from django.conf import settings
+from django.db import IntegrityError, transaction
 import json
 
 
+def include_archived(request):
+    """
+    ?include_archived=true يضيف المهام المؤرشفة إلى القوائم (الافتراضي: المهام النشطة فقط)
+    """
+    return request.GET.get('include_archived', '').lower() in ('1', 'true', 'yes')
+
+
+def filter_due(queryset, request):
+    """
+    ?due=overdue: المهام غير المنجزة التي تجاوزت موعدها
+    ?due=soon: التي يحين موعدها خلال TASK_DUE_SOON_HOURS
+    (كلاهما يستخدم الفهرس الجزئي task_open_org_due_idx)
+    """
+    due = request.GET.get('due')
+    if due == 'overdue':
+        return queryset.overdue()
+    if due == 'soon':
+        return queryset.due_soon(hours=getattr(settings, 'TASK_DUE_SOON_HOURS', 24))
+    return queryset
+
+
 class TaskViewSet(viewsets.ModelViewSet):
     """
     وجهة API للمهام
@@ -28,8 +57,13 @@ class TaskViewSet(viewsets.ModelViewSet):
                 self.request.user.save()
                 print(f"DEBUG: تم إنشاء مؤسسة افتراضية للمستخدم: {self.request.user.username}")
             
-            # جلب المهام التابعة لمؤسسة المستخدم
-            return Task.objects.filter(organization=self.request.user.organization)
+            # جلب المهام التابعة لمؤسسة المستخدم مع العلاقات التي تحتاجها الحقول المطلوبة فقط
+            # القائمة تعرض المهام النشطة فقط، والوصول لمهمة مؤرشفة بمعرفها يبقى متاحاً
+            queryset = Task.objects.filter(organization=self.request.user.organization)
+            if self.action == 'list':
+                queryset = filter_due(queryset.visible(include_archived(self.request)), self.request)
+                queryset = filter_labels(queryset, self.request, self.request.user.organization_id)
+            return TaskSerializer.prepare_queryset(queryset, self.request)
         except Exception as e:
             print(f"ERROR: خطأ في جلب المهام: {str(e)}")
             # في حالة الخطأ، نعيد قائمة فارغة
@@ -59,31 +93,14 @@ class TaskViewSet(viewsets.ModelViewSet):
                 # تعيين المؤسسة بشكل صريح للمهمة
                 task = serializer.save(organization=organization)
                 print(f"DEBUG: Task created successfully: {task.id} in organization: {organization.name}")
+                record_task('task.created', task, self.request.user)
                 
-                # محاولة إرسال تحديث عبر WebSocket
-                try:
-                    channel_layer = get_channel_layer()
-                    # إرسال إلى غرفة المشروع
-                    async_to_sync(channel_layer.group_send)(
-                        f'project_{task.project.id}',
-                        {
-                            'type': 'task_create',
-                            'task': TaskSerializer(task).data
-                        }
-                    )
-                    
-                    # إرسال إلى غرفة المؤسسة
-                    if task.organization and task.organization.slug:
-                        async_to_sync(channel_layer.group_send)(
-                            f'org_{task.organization.slug}',
-                            {
-                                'type': 'task_create',
-                                'task': TaskSerializer(task).data
-                            }
-                        )
-                except Exception as ws_error:
-                    print(f"WARNING: خطأ في إرسال تحديث WebSocket: {str(ws_error)}")
-                    # لا نريد أن يفشل إنشاء المهمة بسبب خطأ في WebSocket
+                # إرسال تحديث عبر WebSocket إلى غرفة المشروع وغرفة المؤسسة
+                publish_later(
+                    [project_group(task.project_id), org_group(organization.slug)],
+                    {'type': 'task_create', 'task': serializer.data}
+                )
+                publish_inbox_change(task)
                 
                 return task
             except Exception as serializer_error:
@@ -139,8 +156,8 @@ class TaskViewSet(viewsets.ModelViewSet):
         # التحقق من أن المستخدم مسجل الدخول ومن نفس المؤسسة (قاعدة العزل الأساسية)
         base_permissions = [permissions.IsAuthenticated, IsSameOrganization]
         
-        if self.action == 'destroy':
-            # حذف المهمة: فقط مالك المشروع أو أدمن
+        if self.action in ['destroy', 'archive', 'unarchive']:
+            # حذف المهمة أو أرشفتها: فقط مالك المشروع أو أدمن
             permission_classes = base_permissions + [IsProjectOwner]
         elif self.action in ['update', 'partial_update']:
             # تعديل المهمة: المعين أو مالك المشروع أو أدمن
@@ -158,68 +175,244 @@ class TaskViewSet(viewsets.ModelViewSet):
     
     def perform_update(self, serializer):
         # حفظ المهمة
+        old_status = serializer.instance.status
+        old_assignee_id = serializer.instance.assignee_id
         task = serializer.save()
+        if task.status != old_status:
+            record_task('task.updated', task, self.request.user, from_status=old_status, status=task.status)
+        else:
+            record_task('task.updated', task, self.request.user)
         
-        # إرسال تحديث عبر WebSocket
-        try:
-            channel_layer = get_channel_layer()
-            
-            # إرسال إلى غرفة المشروع
-            async_to_sync(channel_layer.group_send)(
-                f'project_{task.project.id}',
-                {
-                    'type': 'task_update',
-                    'task': TaskSerializer(task).data
-                }
-            )
-            
-            # إرسال إلى غرفة المؤسسة
-            if task.organization and task.organization.slug:
-                async_to_sync(channel_layer.group_send)(
-                    f'org_{task.organization.slug}',
-                    {
-                        'type': 'task_update',
-                        'task': TaskSerializer(task).data
-                    }
-                )
-        except Exception as ws_error:
-            print(f"WARNING: خطأ في إرسال تحديث WebSocket: {str(ws_error)}")
-            # لا نريد أن يفشل تحديث المهمة بسبب خطأ في WebSocket
+        # إرسال تحديث عبر WebSocket إلى غرفة المشروع وغرفة المؤسسة
+        publish_later(
+            [project_group(task.project_id), org_group(task.organization.slug if task.organization else None)],
+            {'type': 'task_update', 'task': serializer.data}
+        )
+        publish_inbox_change(task, old_assignee_id)
     
     def perform_destroy(self, instance):
         # الحصول على معرف المشروع قبل الحذف
         project_id = instance.project.id
         task_id = instance.id
         organization_slug = instance.organization.slug if instance.organization else None
+        # تسجيل النشاط قبل الحذف حتى تبقى بيانات المهمة متاحة
+        record_task('task.deleted', instance, self.request.user)
         
         # حذف المهمة
         instance.delete()
         
-        # إرسال تحديث عبر WebSocket
+        # إرسال تحديث عبر WebSocket إلى غرفة المشروع وغرفة المؤسسة
+        publish_later(
+            [project_group(project_id), org_group(organization_slug)],
+            {'type': 'task_delete', 'task_id': task_id}
+        )
+        # delete() يفرغ معرف الكائن، فيُعاد لإرساله في حدث الإزالة
+        instance.id = task_id
+        publish_inbox_change(instance, deleted=True)
+    
+    def _set_archived(self, archived):
+        task = self.get_object()
+        queryset = Task.objects.filter(pk=task.pk)
+        if archived:
+            queryset.archive()
+        else:
+            queryset.unarchive()
+        task.refresh_from_db(fields=['archived_at'])
+        record_task('task.archived' if archived else 'task.unarchived', task, self.request.user)
+        
+        data = TaskSerializer(task).data
+        publish_later(
+            [project_group(task.project_id), org_group(task.organization.slug if task.organization else None)],
+            {'type': 'task_update', 'task': data}
+        )
+        publish_inbox_change(task)
+        return Response(data)
+    
+    @action(detail=True, methods=['post'])
+    def archive(self, request, pk=None):
+        """
+        أرشفة المهمة: تخرج من قوائم المهام واللوحات وتبقى متاحة بمعرفها
+        """
+        return self._set_archived(True)
+    
+    @action(detail=True, methods=['post'])
+    def unarchive(self, request, pk=None):
+        """
+        إعادة المهمة المؤرشفة إلى اللوحة
+        """
+        return self._set_archived(False)
+
+
+class LabelViewSet(viewsets.ModelViewSet):
+    """
+    وجهة API لتصنيفات المهام في مؤسسة المستخدم
+    - إنشاء وتعديل التصنيفات: أي عضو في المؤسسة
+    - حذف التصنيف (يزيله من كل المهام): أدمن المؤسسة فقط
+    """
+    serializer_class = LabelSerializer
+    
+    def get_queryset(self):
+        if not self.request.user.organization_id:
+            return Label.objects.none()
+        return Label.objects.filter(organization_id=self.request.user.organization_id)
+    
+    def get_permissions(self):
+        base_permissions = [permissions.IsAuthenticated, IsSameOrganization]
+        if self.action == 'destroy':
+            permission_classes = base_permissions + [IsOrganizationAdmin]
+        else:
+            permission_classes = base_permissions
+        return [permission() for permission in permission_classes]
+    
+    def perform_create(self, serializer):
         try:
-            channel_layer = get_channel_layer()
-            
-            # إرسال إلى غرفة المشروع
-            async_to_sync(channel_layer.group_send)(
-                f'project_{project_id}',
-                {
-                    'type': 'task_delete',
-                    'task_id': task_id
-                }
-            )
-            
-            # إرسال إلى غرفة المؤسسة
-            if organization_slug:
-                async_to_sync(channel_layer.group_send)(
-                    f'org_{organization_slug}',
-                    {
-                        'type': 'task_delete',
-                        'task_id': task_id
-                    }
-                )
-        except Exception as ws_error:
-            print(f"WARNING: خطأ في إرسال تحديث WebSocket: {str(ws_error)}")
-            # لا نريد أن يفشل حذف المهمة بسبب خطأ في WebSocket
+            serializer.save(organization=self.request.user.organization)
+        except IntegrityError:
+            raise ValidationError({'name': 'يوجد تصنيف بهذا الاسم في المؤسسة'})
+    
+    def perform_update(self, serializer):
+        # validate_name يتحقق من الاسم، وهذا لطلبين متزامنين بنفس الاسم
+        try:
+            serializer.save()
+        except IntegrityError:
+            raise ValidationError({'name': 'يوجد تصنيف بهذا الاسم في المؤسسة'})
+
+
+class ChecklistItemViewSet(viewsets.ModelViewSet):
+    """
+    وجهة API لعناصر قوائم التحقق في مهام مؤسسة المستخدم
+    - ?task=<id>: عناصر مهمة واحدة بترتيبها
+    - POST {id}/toggle/: تبديل حالة العنصر (أو تعيينها بـ is_done)
+    أي عضو في المؤسسة يستطيع إضافة العناصر وتعديلها، مثل التعليقات
+    """
+    serializer_class = ChecklistItemSerializer
+    permission_classes = [permissions.IsAuthenticated, IsSameOrganization]
+    
+    def get_queryset(self):
+        user = self.request.user
+        queryset = ChecklistItem.objects.select_related('task__organization')
+        if not user.is_system_owner:
+            queryset = queryset.filter(task__organization_id=user.organization_id)
+        task_id = self.request.query_params.get('task')
+        if task_id:
+            try:
+                queryset = queryset.filter(task_id=int(task_id))
+            except ValueError:
+                return ChecklistItem.objects.none()
+        return queryset
+    
+    def perform_create(self, serializer):
+        task = serializer.validated_data['task']
+        with transaction.atomic():
+            if 'position' in serializer.validated_data:
+                item = serializer.save()
+            else:
+                item = serializer.save(position=checklists.next_position(task.id))
+            checklists.publish_item_change(item, task)
+    
+    def perform_update(self, serializer):
+        is_done = serializer.validated_data.pop('is_done', None)
+        with transaction.atomic():
+            item = serializer.save()
+            if is_done is not None:
+                checklists.set_done(item, is_done)
+            checklists.publish_item_change(item, item.task)
+    
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            # الحذف المتزامن لنفس العنصر يُنقص العدادات ويبث الحدث مرة واحدة
+            if checklists.delete_item(instance):
+                checklists.publish_item_change(instance, instance.task, deleted=True)
+    
+    @action(detail=True, methods=['post'])
+    def toggle(self, request, pk=None):
+        """
+        تبديل حالة العنصر وبث حالته الجديدة وعدادات المهمة فقط
+        """
+        item = self.get_object()
+        is_done = request.data.get('is_done', not item.is_done)
+        if not isinstance(is_done, bool):
+            return Response({"is_done": "القيمة يجب أن تكون true أو false"}, status=status.HTTP_400_BAD_REQUEST)
+        
+        with transaction.atomic():
+            if checklists.set_done(item, is_done):
+                checklists.publish_item_change(item, item.task, fields=('is_done',))
+            progress = checklists.counters(item.task_id)
+        return Response({'id': item.id, 'task': item.task_id, 'is_done': item.is_done, **progress})
+
+
+class InboxCursorPagination(NewestFirstCursorPagination):
+    """
+    ترقيم صندوق "مهامي" بالأحدث تعديلاً (يتبع ترتيب فهرس task_assignee_inbox_idx)
+    """
+    ordering = ('-updated_at', '-id')
+
+
+class InboxViewSet(mixins.ListModelMixin, viewsets.GenericViewSet):
+    """
+    صندوق "مهامي": المهام النشطة المسندة للمستخدم من كل مشاريع مؤسسته (الأحدث تعديلاً أولاً)
+    - ?status=todo,in_progress: تصفية حسب الحالة
+    - التحديثات تصل عبر WebSocket العام (ws/) بأحداث inbox_upsert وinbox_remove
+    """
+    serializer_class = InboxTaskSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = InboxCursorPagination
+    
+    def get_statuses(self):
+        value = self.request.query_params.get('status')
+        if not value:
+            return None
+        statuses = [item.strip() for item in value.split(',') if item.strip()]
+        valid = dict(Task.STATUS_CHOICES)
+        invalid = [item for item in statuses if item not in valid]
+        if invalid:
+            raise ValidationError({'status': f"حالة غير صالحة: {', '.join(invalid)}"})
+        return statuses
+    
+    def get_queryset(self):
+        return inbox_queryset(self.request.user, self.get_statuses())
+    
+    def list(self, request, *args, **kwargs):
+        page = self.paginate_queryset(self.get_queryset())
+        # عناوين مشاريع الصفحة كلها في قراءة واحدة من الذاكرة المشتركة
+        titles = get_project_titles(task.project_id for task in page)
+        serializer = self.get_serializer(page, many=True, context={'request': request, 'project_titles': titles})
+        return self.get_paginated_response(serializer.data)
+
+
+class TaskListAsyncView(AsyncReadView):
+    """
+    قائمة مهام مؤسسة المستخدم (GET غير متزامن، والإنشاء عبر TaskViewSet)
+    """
+    fallback = TaskViewSet.as_view({'get': 'list', 'post': 'create'})
+    
+    def needs_fallback(self, user):
+        return not user.organization_id
+    
+    async def get(self, request, user):
+        queryset = Task.objects.filter(organization_id=user.organization_id).visible(include_archived(request))
+        queryset = filter_labels(filter_due(queryset, request), request, user.organization_id)
+        queryset = TaskSerializer.prepare_queryset(queryset, request)
+        tasks = [task async for task in queryset]
+        return json_response(await serialize(TaskSerializer(tasks, many=True, context={'request': request})))
+
+
+class TaskDetailAsyncView(AsyncReadView):
+    """
+    تفاصيل مهمة (GET غير متزامن، والتعديل والحذف عبر TaskViewSet)
+    """
+    fallback = TaskViewSet.as_view({'get': 'retrieve', 'put': 'update', 'patch': 'partial_update', 'delete': 'destroy'})
+    
+    def needs_fallback(self, user):
+        return not user.organization_id
+    
+    async def get(self, request, user, pk):
+        queryset = TaskSerializer.prepare_queryset(Task.objects.filter(organization_id=user.organization_id), request)
+        try:
+            task = await queryset.aget(pk=pk)
+        except (Task.DoesNotExist, ValueError):
+            return self.not_found()
+        return json_response(await serialize(TaskSerializer(task, context={'request': request})))
 
 
 class TaskCommentViewSet(viewsets.ModelViewSet):
@@ -232,14 +425,15 @@ class TaskCommentViewSet(viewsets.ModelViewSet):
         # المستخدم يرى فقط تعليقات مؤسسته
         if self.request.user.is_system_owner:
             # مالك النظام يرى جميع التعليقات
-            return TaskComment.objects.all()
+            return TaskCommentSerializer.prepare_queryset(TaskComment.objects.all(), self.request)
         
         # التحقق من وجود مؤسسة للمستخدم
         if not hasattr(self.request.user, 'organization') or not self.request.user.organization:
             return TaskComment.objects.none()
         
         # جلب التعليقات التابعة لمؤسسة المستخدم
-        return TaskComment.objects.filter(task__organization=self.request.user.organization)
+        queryset = TaskComment.objects.filter(task__organization=self.request.user.organization)
+        return TaskCommentSerializer.prepare_queryset(queryset, self.request)
     
     def get_permissions(self):
         """
@@ -270,7 +464,16 @@ class TaskCommentViewSet(viewsets.ModelViewSet):
     
     def perform_create(self, serializer):
         # حفظ التعليق مع تعيين المؤلف تلقائياً
-        serializer.save(author=self.request.user)
+        comment = serializer.save(author=self.request.user)
+        record(
+            'comment.created',
+            organization_id=comment.task.organization_id,
+            project_id=comment.task.project_id,
+            target_type='comment',
+            target_id=comment.id,
+            actor=self.request.user,
+            data={'task_id': comment.task_id, 'task_title': comment.task.title},
+        )
     
     def perform_update(self, serializer):
         # تعيين حالة التعديل
@@ -279,25 +482,28 @@ class TaskCommentViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['get'], url_path='task/(?P<task_id>[^/.]+)')
     def task_comments(self, request, task_id=None):
         """
-        الحصول على جميع تعليقات مهمة محددة
+        الحصول على تعليقات مهمة محددة مرقمة بالمؤشر (الأحدث أولاً)
+        يتم تحميل التعليقات الأقدم عبر رابط next في الاستجابة
         """
         try:
             # التحقق من وجود المهمة
-            task = Task.objects.get(id=task_id)
+            task = Task.objects.only('id', 'organization_id').get(id=task_id)
             
             # التحقق من أن المستخدم ينتمي إلى نفس المؤسسة
-            if not request.user.is_system_owner and task.organization != request.user.organization:
+            if not request.user.is_system_owner and task.organization_id != request.user.organization_id:
                 return Response(
                     {"detail": "لا يمكنك الوصول إلى تعليقات مهمة من مؤسسة أخرى"},
                     status=status.HTTP_403_FORBIDDEN
                 )
             
-            # جلب تعليقات المهمة
-            comments = TaskComment.objects.filter(task=task)
-            serializer = self.get_serializer(comments, many=True)
+            # جلب تعليقات المهمة مع المؤلفين في استعلام واحد
+            comments = TaskCommentSerializer.prepare_queryset(TaskComment.objects.filter(task_id=task.id), request)
+            paginator = NewestFirstCursorPagination()
+            page = paginator.paginate_queryset(comments, request, view=self)
+            serializer = self.get_serializer(page, many=True)
             
-            return Response(serializer.data)
-        except Task.DoesNotExist:
+            return paginator.get_paginated_response(serializer.data)
+        except (Task.DoesNotExist, ValueError):
             return Response(
                 {"detail": "المهمة غير موجودة"},
                 status=status.HTTP_404_NOT_FOUND
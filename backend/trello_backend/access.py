@@ -0,0 +1,209 @@
+"""
+خريطة الوصول للمشاريع والمؤسسات
+تربط معرف المشروع ومعرّف (slug) المؤسسة بمعرف المؤسسة المالكة
+وتُستخدم للتحقق من صلاحيات اتصالات WebSocket دون استعلام لكل مشروع
+- طبقتان: ذاكرة محدودة (LRU) داخل كل عملية، ثم الذاكرة المشتركة، ثم قاعدة البيانات
+- حفظ أو حذف مشروع أو مؤسسة يحذف مفاتيحه من الطبقتين في العملية التي كتبت،
+  وباقي العمليات تتخلص من القيم القديمة بعد ACCESS_MAP_LOCAL_TIMEOUT
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+
+from .db_router import use_primary
+
+PROJECT_ORG_CACHE_PREFIX = 'access:project_org'
+SLUG_ORG_CACHE_PREFIX = 'access:slug_org'
+
+# قيمة مخزنة للمشاريع/المؤسسات غير الموجودة حتى لا يتكرر الاستعلام عنها
+MISSING = 0
+
+# غياب المفتاح من الذاكرة المحلية (يختلف عن MISSING المخزنة للمشاريع غير الموجودة)
+NOT_CACHED = object()
+
+
+def _timeout():
+    return getattr(settings, 'ACCESS_MAP_CACHE_TIMEOUT', 600)
+
+
+class LocalAccessMap:
+    """
+    ذاكرة محدودة (LRU) داخل العملية لمدخلات خريطة الوصول، مع مدة صلاحية لكل مدخل
+    القراءة عند الإصابة بحث في قاموس فقط، دون استعلام أو انتقال إلى خيط
+    """
+
+    def __init__(self, max_size, timeout):
+        self.max_size = max_size
+        self.timeout = timeout
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return NOT_CACHED
+            value, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return NOT_CACHED
+            self._entries.move_to_end(key)
+            return value
+
+    def set_many(self, values):
+        expires_at = time.monotonic() + self.timeout
+        with self._lock:
+            for key, value in values.items():
+                self._entries[key] = (value, expires_at)
+                self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def discard(self, keys):
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+
+    def keys_with_value(self, prefix, value):
+        with self._lock:
+            return [key for key, (entry_value, _) in self._entries.items() if key.startswith(prefix) and entry_value == value]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+local_map = LocalAccessMap(
+    getattr(settings, 'ACCESS_MAP_LOCAL_SIZE', 10000),
+    getattr(settings, 'ACCESS_MAP_LOCAL_TIMEOUT', 60),
+)
+
+
+def _lookup(keys, prefix, load):
+    """
+    بحث مجمّع: قراءة المفاتيح من الذاكرة المشتركة دفعة واحدة
+    ثم جلب الناقص منها باستعلام واحد وحفظه
+    """
+    keys = list(dict.fromkeys(keys))
+    if not keys:
+        return {}
+
+    cache_keys = {f'{prefix}:{key}': key for key in keys}
+    result = {}
+    for cache_key, key in cache_keys.items():
+        value = local_map.get(cache_key)
+        if value is not NOT_CACHED:
+            result[key] = value
+
+    remote_keys = [cache_key for cache_key, key in cache_keys.items() if key not in result]
+    if remote_keys:
+        cached = cache.get_many(remote_keys)
+        local_map.set_many(cached)
+        result.update({cache_keys[cache_key]: value for cache_key, value in cached.items()})
+
+    missing = [key for key in keys if key not in result]
+    if missing:
+        # القراءة من القاعدة الرئيسية حتى لا يُخزن مشروع جديد كغير موجود بسبب تأخر النسخ المقروءة
+        with use_primary():
+            loaded = load(missing)
+        fresh = {f'{prefix}:{key}': loaded.get(key, MISSING) for key in missing}
+        cache.set_many(fresh, _timeout())
+        local_map.set_many(fresh)
+        result.update({cache_keys[cache_key]: value for cache_key, value in fresh.items()})
+
+    return {key: org_id for key, org_id in result.items() if org_id != MISSING}
+
+
+def peek_project_org_id(project_id):
+    """
+    معرف مؤسسة المشروع من الذاكرة المحلية فقط: None لمشروع غير موجود، وNOT_CACHED إذا لم يكن محفوظاً
+    يُستخدم في الكود غير المتزامن لتجنب الانتقال إلى خيط عند الإصابة
+    """
+    value = local_map.get(f'{PROJECT_ORG_CACHE_PREFIX}:{project_id}')
+    return None if value == MISSING else value
+
+
+def peek_slug_org_id(slug):
+    value = local_map.get(f'{SLUG_ORG_CACHE_PREFIX}:{slug}')
+    return None if value == MISSING else value
+
+
+def get_project_org_ids(project_ids):
+    """
+    إرجاع قاموس {معرف المشروع: معرف المؤسسة} للمشاريع الموجودة فقط
+    """
+    from projects.models import Project
+
+    def load(ids):
+        return dict(Project.objects.filter(id__in=ids).values_list('id', 'organization_id'))
+
+    return _lookup([int(project_id) for project_id in project_ids], PROJECT_ORG_CACHE_PREFIX, load)
+
+
+def get_org_ids_for_slugs(slugs):
+    """
+    إرجاع قاموس {slug: معرف المؤسسة} للمؤسسات الموجودة فقط
+    """
+    from organizations.models import Organization
+
+    def load(missing_slugs):
+        return dict(Organization.objects.filter(slug__in=missing_slugs).values_list('slug', 'id'))
+
+    return _lookup(slugs, SLUG_ORG_CACHE_PREFIX, load)
+
+
+def can_access_org(user, org_id):
+    """
+    مالك النظام يصل إلى كل المؤسسات، وباقي المستخدمين إلى مؤسستهم فقط
+    """
+    if user.is_system_owner:
+        return True
+    return org_id is not None and org_id == user.organization_id
+
+
+def invalidate(cache_keys):
+    """
+    حذف مفاتيح من الطبقتين الآن وبعد نجاح المعاملة
+    (حتى لا تُخزن قراءة متزامنة القيمة القديمة قبل حفظ التغيير)
+    """
+    cache_keys = list(cache_keys)
+
+    def discard():
+        local_map.discard(cache_keys)
+        cache.delete_many(cache_keys)
+
+    discard()
+    transaction.on_commit(discard)
+
+
+def _remember_slug(sender, instance, **kwargs):
+    # المعرّف القديم قبل تعديله، لحذف مفتاحه بعد الحفظ
+    if instance.pk and not kwargs.get('raw'):
+        instance._access_old_slug = sender.objects.filter(pk=instance.pk).values_list('slug', flat=True).first()
+
+
+def _invalidate_organization(sender, instance, **kwargs):
+    slugs = {instance.slug, getattr(instance, '_access_old_slug', None)} - {None}
+    keys = {f'{SLUG_ORG_CACHE_PREFIX}:{slug}' for slug in slugs}
+    keys.update(local_map.keys_with_value(SLUG_ORG_CACHE_PREFIX, instance.pk))
+    invalidate(keys)
+
+
+def _invalidate_project(sender, instance, **kwargs):
+    invalidate([f'{PROJECT_ORG_CACHE_PREFIX}:{instance.pk}'])
+
+
+def connect_signals():
+    """
+    ربط الحذف بحفظ وحذف المشاريع والمؤسسات (يُستدعى من TrelloBackendConfig.ready)
+    """
+    pre_save.connect(_remember_slug, sender='organizations.Organization', dispatch_uid='access_remember_slug')
+    post_save.connect(_invalidate_organization, sender='organizations.Organization', dispatch_uid='access_org_saved')
+    post_delete.connect(_invalidate_organization, sender='organizations.Organization', dispatch_uid='access_org_deleted')
+    post_save.connect(_invalidate_project, sender='projects.Project', dispatch_uid='access_project_saved')
+    post_delete.connect(_invalidate_project, sender='projects.Project', dispatch_uid='access_project_deleted')
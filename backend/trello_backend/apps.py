@@ -0,0 +1,13 @@
+from django.apps import AppConfig
+
+
+class TrelloBackendConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'trello_backend'
+
+    def ready(self):
+        """
+        ربط حذف خريطة الوصول المخزنة بحفظ وحذف المشاريع والمؤسسات
+        """
+        from .access import connect_signals
+        connect_signals()
@@ -9,21 +9,32 @@ https://docs.djangoproject.com/en/4.2/howto/deployment/asgi/
 
 import os
 from django.core.asgi import get_asgi_application
-from channels.routing import ProtocolTypeRouter, URLRouter
-from channels.auth import AuthMiddlewareStack
-from .routing import websocket_urlpatterns
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'trello_backend.settings')
+# كل طلب HTTP يعمل في خيط جديد تحت ASGI، فالاتصال الدائم لا يُعاد استخدامه ويبقى مفتوحاً؛
+# إعادة استخدام الاتصالات هنا تتم عبر تجمع الاتصالات (DB_POOL)
+os.environ.setdefault('DB_CONN_MAX_AGE', '0')
 
-# تطبيق Django الأساسي
+# تطبيق Django الأساسي (يجب تهيئته قبل استيراد المستهلكين والنماذج)
 django_asgi_app = get_asgi_application()
 
+from django.conf import settings
+from channels.routing import ProtocolTypeRouter, URLRouter
+from .compression import enable_daphne_permessage_deflate
+from .jwt_auth import JWTAuthMiddlewareStack
+from .routing import websocket_urlpatterns
+
 # تم نقل مسارات WebSocket إلى ملف routing.py
 
+# ضغط رسائل WebSocket يتفاوض عليه الخادم نفسه، فيُفعّل قبل أن يبدأ Daphne الاستماع
+if settings.WS_PERMESSAGE_DEFLATE:
+    enable_daphne_permessage_deflate()
+
 # تكوين ASGI مع دعم HTTP و WebSocket
+# مسارات WebSocket تستخدم مصادقة JWT لأن الواجهة الأمامية لا تستخدم الجلسات
 application = ProtocolTypeRouter({
     "http": django_asgi_app,
-    "websocket": AuthMiddlewareStack(
+    "websocket": JWTAuthMiddlewareStack(
         URLRouter(
             websocket_urlpatterns
         )
@@ -0,0 +1,102 @@
+"""
+أساس العروض غير المتزامنة لمسارات القراءة الأكثر استخداماً
+- طلبات GET تُخدم مباشرة في حلقة الأحداث باستخدام ORM غير المتزامن،
+  دون حجز خيط من مجمع الخيوط طوال مدة الطلب
+- المصادقة تعيد استخدام التحقق من JWT وذاكرة المستخدمين في jwt_auth
+- باقي الطرق (POST/PUT/PATCH/DELETE) تُحوّل إلى عرض DRF المتزامن الأصلي
+- حدود الطلبات نفسها المطبقة على عروض DRF (throttling.check_request)
+"""
+import math
+
+from asgiref.sync import sync_to_async
+from django.core.exceptions import SynchronousOnlyOperation
+from django.http import HttpResponse
+from django.views import View
+
+from . import json_codec
+from .jwt_auth import get_token_from_request, get_user_for_token
+from .throttling import check_request, endpoint_scope
+
+
+async def serialize(serializer):
+    """
+    تحويل البيانات في حلقة الأحداث عندما تكون العلاقات محملة مسبقاً،
+    أو في خيط منفصل إذا احتاج المحول إلى استعلام إضافي
+    """
+    try:
+        return serializer.data
+    except SynchronousOnlyOperation:
+        return await sync_to_async(lambda: serializer.data)()
+
+
+def json_response(data, status=200):
+    return HttpResponse(json_codec.dumps(data), status=status, content_type='application/json')
+
+
+class AsyncReadView(View):
+    """
+    عرض غير متزامن لطلبات GET مع الرجوع إلى عرض DRF المتزامن (fallback) لباقي الطرق
+    الأصناف الفرعية تعرّف async def get(self, request, user, ...)
+    """
+    fallback = None
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        view = super().as_view(**initkwargs)
+        # المصادقة عبر JWT وليس الجلسات، مثل عروض DRF
+        view.csrf_exempt = True
+        return view
+
+    async def run_fallback(self, request, *args, **kwargs):
+        # القراءة من الصنف وليس من الكائن حتى لا تُربط دالة العرض كتابع (method)
+        fallback = type(self).fallback
+        if fallback is None:
+            return json_response({'detail': f'Method "{request.method}" not allowed.'}, status=405)
+        return await sync_to_async(fallback)(request, *args, **kwargs)
+
+    def needs_fallback(self, user):
+        """
+        حالات نادرة يعالجها العرض المتزامن (مثل مستخدم بدون مؤسسة تُنشأ له مؤسسة افتراضية)
+        """
+        return False
+
+    async def dispatch(self, request, *args, **kwargs):
+        if request.method != 'GET':
+            return await self.run_fallback(request, *args, **kwargs)
+
+        token = get_token_from_request(request)
+        if token is None:
+            return self.unauthorized('Authentication credentials were not provided.')
+        user = await get_user_for_token(token)
+        if not user.is_authenticated:
+            return self.unauthorized('Given token not valid for any token type')
+        if self.needs_fallback(user):
+            return await self.run_fallback(request, *args, **kwargs)
+
+        request.user = user
+        # التحقق يتصل بذاكرة التخزين المؤقت (Redis) بشكل متزامن، فيُنفذ في خيط حتى لا يوقف حلقة الأحداث
+        wait = await sync_to_async(check_request, thread_sensitive=False)(request, user, endpoint_scope(request, self))
+        if wait:
+            return self.throttled(wait)
+        return await self.get(request, user, *args, **kwargs)
+
+    @staticmethod
+    def unauthorized(detail):
+        response = json_response({'detail': detail}, status=401)
+        response['WWW-Authenticate'] = 'Bearer realm="api"'
+        return response
+
+    @staticmethod
+    def throttled(wait):
+        wait = math.ceil(wait)
+        response = json_response({'detail': f'Request was throttled. Expected available in {wait} seconds.'}, status=429)
+        response['Retry-After'] = str(wait)
+        return response
+
+    @staticmethod
+    def not_found():
+        return json_response({'detail': 'Not found.'}, status=404)
+
+    @staticmethod
+    def forbidden():
+        return json_response({'detail': 'You do not have permission to perform this action.'}, status=403)
@@ -0,0 +1,67 @@
+"""
+بث الأحداث إلى مجموعات WebSocket (المشاريع والمؤسسات والمستخدمين)
+- من الكود غير المتزامن: apublish() تنتظر إرسال طبقة القنوات مباشرة
+- من الكود المتزامن: publish() تنفذ إرسال الحدث لكل المجموعات في انتقال واحد إلى حلقة الأحداث
+  بدلاً من async_to_sync منفصل لكل مجموعة
+- الحدث يُرمز مرة واحدة هنا لكل ترميز (JSON/MessagePack)، وتنتقل الإطارات الجاهزة
+  عبر طبقة القنوات إلى المستهلكين (ws_codec.prepare_event)
+- فشل البث لا يُفشل الطلب، ويُكتفى بتسجيل تحذير
+- publish_later() تؤجل البث إلى ما بعد نجاح المعاملة عبر طابور المهام الخلفية (تطبيق jobs)،
+  وعند تفعيل الطابور ينفذه العمال خارج الطلب ويعيدون المحاولة عند فشل طبقة القنوات
+"""
+import uuid
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+
+from jobs.queue import enqueue
+
+from .ws_codec import prepare_event
+
+
+def project_group(project_id):
+    return f'project_{project_id}'
+
+
+def org_group(slug):
+    return f'org_{slug}' if slug else None
+
+
+def user_group(user_id):
+    return f'user_{user_id}' if user_id else None
+
+
+async def apublish(groups, event, raise_errors=False):
+    """
+    إرسال الحدث إلى كل مجموعة في القائمة (تُتجاهل القيم الفارغة)
+    raise_errors: إعادة رفع أخطاء طبقة القنوات بدلاً من تسجيلها (لإعادة المحاولة في العمال)
+    """
+    channel_layer = get_channel_layer()
+    if channel_layer is None:
+        return
+    event = prepare_event(dict(event, event_id=event.get('event_id') or uuid.uuid4().hex))
+    try:
+        for group in groups:
+            if group:
+                await channel_layer.group_send(group, event)
+    except Exception as e:
+        if raise_errors:
+            raise
+        print(f"WARNING: خطأ في إرسال تحديث WebSocket: {str(e)}")
+
+
+def publish(groups, event, raise_errors=False):
+    """
+    النسخة المتزامنة من apublish لاستخدامها في عروض DRF والإشارات
+    """
+    async_to_sync(apublish)(groups, event, raise_errors)
+
+
+def publish_later(groups, event):
+    """
+    بث الحدث بعد نجاح المعاملة الحالية عبر طابور المهام الخلفية
+    الحدث يجب أن يكون قابلاً للتحويل إلى JSON (بيانات المحولات جاهزة لذلك)
+    معرف الحدث يُحدد هنا، فتحمل إعادة المحاولة بعد إرسال جزئي نفس المعرف ويتجاهل العميل المكرر
+    """
+    event = dict(event, event_id=event.get('event_id') or uuid.uuid4().hex)
+    enqueue('broadcast.publish', {'groups': [group for group in groups if group], 'event': event})
@@ -0,0 +1,240 @@
+"""
+ضغط الاستجابات حسب ما يقبله العميل (gzip أو brotli)
+- brotli يُستخدم عند تثبيت مكتبة brotli وقبول العميل له، وإلا gzip
+- الاستجابات العادية تُضغط فقط إذا تجاوز حجمها COMPRESSION_MIN_SIZE
+  ولا يُرسل الناتج المضغوط إذا لم يكن أصغر من الأصل
+- الاستجابات المتدفقة (StreamingHttpResponse) تُضغط جزءاً جزءاً أثناء الإرسال دون تجميعها في الذاكرة
+- ضغط رسائل WebSocket (permessage-deflate) يتم في خادم ASGI نفسه، انظر enable_daphne_permessage_deflate
+"""
+import zlib
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+
+try:
+    import brotli
+except ImportError:  # brotli اختياري؛ يُكتفى بـ gzip عند عدم توفره
+    brotli = None
+
+GZIP = 'gzip'
+BROTLI = 'br'
+
+# أنواع المحتوى التي تستفيد من الضغط (الصور والملفات المضغوطة مسبقاً تُستثنى)
+COMPRESSIBLE_TYPES = (
+    'text/',
+    'application/json',
+    'application/javascript',
+    'application/xml',
+    'image/svg+xml',
+)
+
+
+def available_encodings():
+    """
+    الترميزات المفعلة بترتيب تفضيل الخادم (brotli يُستبعد إذا لم تكن المكتبة مثبتة)
+    """
+    encodings = getattr(settings, 'COMPRESSION_ENCODINGS', [BROTLI, GZIP])
+    return [
+        encoding for encoding in encodings
+        if encoding == GZIP or (encoding == BROTLI and brotli is not None)
+    ]
+
+
+def parse_accept_encoding(header):
+    """
+    تحويل ترويسة Accept-Encoding إلى قاموس {الترميز: q}
+    """
+    accepted = {}
+    for part in header.split(','):
+        name, _, params = part.partition(';')
+        name = name.strip().lower()
+        if not name:
+            continue
+        quality = 1.0
+        for param in params.split(';'):
+            key, _, value = param.partition('=')
+            if key.strip() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        accepted[name] = quality
+    return accepted
+
+
+def choose_encoding(header):
+    """
+    اختيار الترميز الأعلى قيمة q لدى العميل، وعند التساوي الأفضل لدى الخادم
+    """
+    accepted = parse_accept_encoding(header or '')
+    candidates = []
+    for preference, encoding in enumerate(available_encodings()):
+        quality = accepted.get(encoding, accepted.get('*', 0.0))
+        if quality > 0:
+            candidates.append((-quality, preference, encoding))
+    return min(candidates)[2] if candidates else None
+
+
+# حجم البيانات (قبل الضغط) الذي يُفرغ بعده الضاغط أثناء التدفق
+# الإفراغ بعد كل جزء صغير يضيف بايتات ويُضعف الضغط، وتأخيره كثيراً يؤخر وصول البيانات
+STREAM_FLUSH_SIZE = 16 * 1024
+
+
+class Compressor:
+    """
+    ضاغط تدريجي: يُفرغ ما ضُغط كلما تجمع STREAM_FLUSH_SIZE حتى يصل للعميل دون انتظار نهاية التدفق
+    """
+
+    def __init__(self, encoding):
+        self.encoding = encoding
+        self._unflushed = 0
+        if encoding == BROTLI:
+            self._compressor = brotli.Compressor(quality=getattr(settings, 'COMPRESSION_BROTLI_QUALITY', 5))
+        else:
+            # wbits=31: صيغة gzip بدلاً من zlib الخام
+            self._compressor = zlib.compressobj(getattr(settings, 'COMPRESSION_GZIP_LEVEL', 6), zlib.DEFLATED, 31)
+
+    def compress(self, data):
+        self._unflushed += len(data)
+        flush = self._unflushed >= STREAM_FLUSH_SIZE
+        if flush:
+            self._unflushed = 0
+        if self.encoding == BROTLI:
+            output = self._compressor.process(data)
+            return output + self._compressor.flush() if flush else output
+        output = self._compressor.compress(data)
+        return output + self._compressor.flush(zlib.Z_SYNC_FLUSH) if flush else output
+
+    def finish(self):
+        if self.encoding == BROTLI:
+            return self._compressor.finish()
+        return self._compressor.flush()
+
+
+def compress(data, encoding):
+    """
+    ضغط محتوى كامل دفعة واحدة
+    """
+    if encoding == BROTLI:
+        return brotli.compress(data, quality=getattr(settings, 'COMPRESSION_BROTLI_QUALITY', 5))
+    compressor = zlib.compressobj(getattr(settings, 'COMPRESSION_GZIP_LEVEL', 6), zlib.DEFLATED, 31)
+    return compressor.compress(data) + compressor.flush()
+
+
+def compress_stream(chunks, encoding):
+    compressor = Compressor(encoding)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.finish()
+
+
+async def acompress_stream(chunks, encoding):
+    compressor = Compressor(encoding)
+    async for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.finish()
+
+
+def is_compressible(response):
+    content_type = response.get('Content-Type', '').split(';', 1)[0].strip().lower()
+    return content_type.startswith(COMPRESSIBLE_TYPES)
+
+
+class CompressionMiddleware:
+    """
+    ضغط الاستجابات الكبيرة بعد التفاوض مع العميل عبر Accept-Encoding
+    يعمل في الوضعين المتزامن وغير المتزامن حتى لا يُجبر العروض غير المتزامنة على الانتقال إلى خيط
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return self.process_response(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        response = await self.get_response(request)
+        return self.process_response(request, response)
+
+    def process_response(self, request, response):
+        # الاستجابات المضغوطة مسبقاً والأجزاء (Range) تُرسل كما هي
+        if response.has_header('Content-Encoding') or response.status_code == 206:
+            return response
+        if not is_compressible(response):
+            return response
+        if not response.streaming and len(response.content) < getattr(settings, 'COMPRESSION_MIN_SIZE', 1024):
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        encoding = choose_encoding(request.META.get('HTTP_ACCEPT_ENCODING'))
+        if encoding is None:
+            return response
+
+        if response.streaming:
+            if response.is_async:
+                response.streaming_content = acompress_stream(response.streaming_content, encoding)
+            else:
+                response.streaming_content = compress_stream(response.streaming_content, encoding)
+            # الطول النهائي غير معروف مسبقاً
+            del response.headers['Content-Length']
+        else:
+            compressed = compress(response.content, encoding)
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response.headers['Content-Length'] = str(len(compressed))
+
+        # المحتوى المضغوط لا يطابق الأصل بايتاً ببايت، فيصبح ETag ضعيفاً
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+        response.headers['Content-Encoding'] = encoding
+        return response
+
+
+def accept_permessage_deflate(offers):
+    """
+    قبول أول عرض permessage-deflate من العميل (المتصفحات ترسله تلقائياً)
+    """
+    from autobahn.websocket.compress import PerMessageDeflateOffer, PerMessageDeflateOfferAccept
+
+    for offer in offers:
+        if isinstance(offer, PerMessageDeflateOffer):
+            return PerMessageDeflateOfferAccept(offer)
+    return None
+
+
+def enable_daphne_permessage_deflate():
+    """
+    تفعيل ضغط رسائل WebSocket في Daphne
+    Daphne لا يوفر خياراً لذلك، فيُضاف قبول العرض إلى خيارات مصنع WebSocket قبل تشغيل الخادم
+    (uvicorn يفعله افتراضياً، وطبقة ASGI نفسها لا تتحكم في امتدادات WebSocket)
+    """
+    try:
+        from daphne.ws_protocol import WebSocketFactory
+    except ImportError:
+        return False
+
+    if getattr(WebSocketFactory, 'permessage_deflate', False):
+        return True
+
+    set_protocol_options = WebSocketFactory.setProtocolOptions
+
+    def setProtocolOptions(self, *args, **kwargs):
+        kwargs.setdefault('perMessageCompressionAccept', accept_permessage_deflate)
+        return set_protocol_options(self, *args, **kwargs)
+
+    WebSocketFactory.setProtocolOptions = setProtocolOptions
+    WebSocketFactory.permessage_deflate = True
+    return True
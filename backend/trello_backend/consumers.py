@@ -2,11 +2,16 @@ import json
 from channels.generic.websocket import AsyncJsonWebsocketConsumer
 from channels.db import database_sync_to_async
 from django.contrib.auth import get_user_model
+from .access import NOT_CACHED, can_access_org, get_project_org_ids, peek_project_org_id
+from .presence import tracker
+from .throttling import RateLimitedConsumerMixin
+from .ws_codec import FramedConsumerMixin
+from .ws_events import ClientEventsMixin
 
 User = get_user_model()
 
 
-class TaskConsumer(AsyncJsonWebsocketConsumer):
+class TaskConsumer(ClientEventsMixin, RateLimitedConsumerMixin, FramedConsumerMixin, AsyncJsonWebsocketConsumer):
     """
     مستهلك WebSocket للمهام
     يسمح بالتحديثات اللحظية للمهام في المشروع
@@ -36,6 +41,15 @@ class TaskConsumer(AsyncJsonWebsocketConsumer):
         )
         
         await self.accept()
+        
+        # تسجيل تواجد المستخدم في لوحة المشروع وإرسال قائمة المتواجدين الحالية
+        self.present = True
+        tracker.join(self.group_name, self.scope['user'])
+        await self.send_json({
+            'type': 'presence_state',
+            'project_id': tracker.project_id(self.group_name),
+            'users': await tracker.members(self.group_name)
+        })
     
     async def disconnect(self, close_code):
         """
@@ -46,50 +60,72 @@ class TaskConsumer(AsyncJsonWebsocketConsumer):
                 self.group_name,
                 self.channel_name
             )
+        if getattr(self, 'present', False):
+            tracker.leave(self.group_name, self.scope['user'])
+            self.present = False
     
     async def receive_json(self, content):
         """
         استقبال رسالة من WebSocket
         """
+        if not await self.allow_message():
+            return
         message_type = content.get('type')
+        tracker.heartbeat([self.group_name], self.scope['user'])
         
-        if message_type == 'task_update':
-            # إعادة إرسال تحديث المهمة إلى المجموعة
-            await self.channel_layer.group_send(
-                self.group_name,
-                {
-                    'type': 'task_update',
-                    'task': content.get('task')
-                }
+        if message_type == 'ping':
+            await self.send_json({
+                'type': 'pong',
+                'timestamp': content.get('timestamp')
+            })
+        else:
+            # أحداث العميل العابرة (الكتابة والسحب)؛ تحديثات المهام نفسها تصدر من الخادم فقط
+            await self.relay_client_event(
+                content, self.group_name, self.scope['user'],
+                project_id=tracker.project_id(self.group_name)
             )
     
     async def task_update(self, event):
         """
         إرسال تحديث المهمة إلى WebSocket
         """
-        await self.send_json({
-            'type': 'task_update',
-            'task': event['task']
-        })
+        await self.send_event(event)
     
     async def task_delete(self, event):
         """
         إرسال حذف المهمة إلى WebSocket
         """
-        await self.send_json({
-            'type': 'task_delete',
-            'task_id': event['task_id']
-        })
+        await self.send_event(event)
+    
+    async def checklist_item_update(self, event):
+        """
+        إرسال تغيير عنصر في قائمة تحقق مهمة مع عدادات تقدمها
+        """
+        await self.send_event(event)
+    
+    async def checklist_item_delete(self, event):
+        """
+        إرسال حذف عنصر من قائمة تحقق مهمة مع عدادات تقدمها
+        """
+        await self.send_event(event)
     
-    @database_sync_to_async
-    def can_access_project(self, project_id, user):
+    async def presence_update(self, event):
+        """
+        إرسال فروقات التواجد (من انضم ومن غادر) في لوحة المشروع
+        """
+        await self.send_event(event)
+    
+    async def can_access_project(self, project_id, user):
         """
         التحقق من أن المستخدم يمكنه الوصول إلى المشروع
+        بمقارنة معرف مؤسسة المشروع من خريطة الوصول بمعرف مؤسسة المستخدم؛ عند الإصابة لا يوجد استعلام
         """
-        from projects.models import Project
-        
         try:
-            project = Project.objects.get(id=project_id)
-            return project.organization == user.organization
-        except Project.DoesNotExist:
+            project_id = int(project_id)
+        except (TypeError, ValueError):
             return False
+        
+        org_id = peek_project_org_id(project_id)
+        if org_id is NOT_CACHED:
+            org_id = (await database_sync_to_async(get_project_org_ids)([project_id])).get(project_id)
+        return can_access_org(user, org_id)
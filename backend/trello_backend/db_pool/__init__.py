@@ -0,0 +1,4 @@
+"""
+محرك PostgreSQL مع تجمع اتصالات داخل كل عملية
+يُفعّل عبر DB_POOL=True في الإعدادات (ENGINE = 'trello_backend.db_pool')
+"""
@@ -0,0 +1,133 @@
+"""
+محرك PostgreSQL (psycopg2) مع تجمع اتصالات محدود الحجم لكل عملية
+- Django يفتح اتصالاً جديداً عند أول استعلام في كل خيط ويغلقه في نهاية الطلب،
+  وكذلك database_sync_to_async في المستهلكين قبل وبعد كل استدعاء
+- هنا يُستعار الاتصال من التجمع بدلاً من فتحه، ويُعاد إليه بدلاً من إغلاقه
+- حجم التجمع يجب أن يساوي عدد خيوط المنفذ (ASGI_THREADS) أو خيوط العامل حتى لا ينتظر أي خيط
+"""
+import os
+import threading
+import time
+
+from django.db.backends.postgresql import base
+from django.utils.asyncio import async_unsafe
+from psycopg2 import extensions
+from psycopg2.pool import PoolError, ThreadedConnectionPool
+
+Database = base.Database
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+class ConnectionPool:
+    """
+    تجمع اتصالات آمن للخيوط
+    عند امتلائه ينتظر الطلب حتى timeout بدلاً من رفع خطأ فوراً
+    الاتصالات الخاملة لأكثر من check_after ثانية يُتحقق منها قبل إعادة استخدامها
+    min_size اتصالات تُفتح عند إنشاء التجمع والباقي عند الحاجة، ويُحتفظ بحتى max_idle منها خاملة
+    """
+
+    def __init__(self, conn_params, min_size=1, max_size=10, timeout=10, check_after=30, max_idle=None):
+        self._pool = ThreadedConnectionPool(min_size, max_size, **conn_params)
+        # ThreadedConnectionPool يستخدم minconn للفتح المسبق ثم كحد للاتصالات الخاملة (ويغلق الزائد عنها)،
+        # فيُرفع بعد الإنشاء حتى لا تُغلق الاتصالات المفتوحة عند الحاجة فور إعادتها
+        self._pool.minconn = max(min_size, max_size if max_idle is None else max_idle)
+        self._slots = threading.BoundedSemaphore(max_size)
+        self.max_size = max_size
+        self._returned_at = {}
+        self.timeout = timeout
+        self.check_after = check_after
+
+    @staticmethod
+    def _is_broken(connection):
+        return connection.closed or connection.info.transaction_status == extensions.TRANSACTION_STATUS_UNKNOWN
+
+    def _is_usable(self, connection):
+        if self._is_broken(connection):
+            return False
+        returned_at = self._returned_at.pop(id(connection), None)
+        if returned_at is None or time.monotonic() - returned_at < self.check_after:
+            return True
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT 1')
+            return True
+        except Database.Error:
+            return False
+
+    def getconn(self):
+        if not self._slots.acquire(timeout=self.timeout):
+            raise PoolError(f'لا يوجد اتصال متاح في التجمع خلال {self.timeout} ثانية')
+        try:
+            # بعد انقطاع قاعدة البيانات قد تكون كل الاتصالات الخاملة تالفة؛ تُستبعد واحداً تلو الآخر
+            # حتى يُفتح اتصال جديد، والعدد محدود بحجم التجمع
+            for _ in range(self.max_size + 1):
+                connection = self._pool.getconn()
+                if self._is_usable(connection):
+                    return connection
+                self._pool.putconn(connection, close=True)
+            raise PoolError('تعذر الحصول على اتصال صالح من التجمع')
+        except Exception:
+            self._slots.release()
+            raise
+
+    def putconn(self, connection):
+        try:
+            # التجمع نفسه يتراجع عن أي معاملة مفتوحة قبل حفظ الاتصال
+            self._pool.putconn(connection, close=self._is_broken(connection))
+            if not connection.closed:
+                self._returned_at[id(connection)] = time.monotonic()
+        finally:
+            self._slots.release()
+
+    def closeall(self):
+        self._pool.closeall()
+
+
+def get_pool(alias, conn_params, options):
+    """
+    تجمع واحد لكل (قاعدة بيانات، عملية)؛ العمليات المتفرعة (fork) تنشئ تجمعها الخاص
+    """
+    key = (alias, os.getpid())
+    pool = _pools.get(key)
+    if pool is None:
+        with _pools_lock:
+            pool = _pools.get(key)
+            if pool is None:
+                pool = _pools[key] = ConnectionPool(conn_params, **options)
+    return pool
+
+
+class PooledDatabase:
+    """
+    نفس وحدة psycopg2، لكن connect() تستعير اتصالاً من التجمع
+    """
+
+    def __init__(self, pool):
+        self.pool = pool
+
+    def connect(self, **conn_params):
+        return self.pool.getconn()
+
+    def __getattr__(self, name):
+        return getattr(Database, name)
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+
+    def get_pool(self, conn_params=None):
+        if conn_params is None:
+            conn_params = self.get_connection_params()
+        return get_pool(self.alias, conn_params, self.settings_dict.get('POOL') or {})
+
+    @async_unsafe
+    def get_new_connection(self, conn_params):
+        self.Database = PooledDatabase(self.get_pool(conn_params))
+        return super().get_new_connection(conn_params)
+
+    @async_unsafe
+    def _close(self):
+        if self.connection is not None:
+            with self.wrap_database_errors:
+                self.get_pool().putconn(self.connection)
@@ -0,0 +1,131 @@
+"""
+توجيه الاستعلامات بين قاعدة البيانات الرئيسية والنسخ المقروءة (Read Replicas)
+- الكتابة دائماً على الرئيسية، والقراءة على إحدى النسخ
+- القراءة تعود للرئيسية داخل المعاملات، وفي طلبات الكتابة نفسها،
+  ولفترة قصيرة بعد أي كتابة من نفس العميل (ملف تعريف ارتباط أو ترويسة) لضمان قراءة ما كتبه
+"""
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core import signing
+from django.db import DEFAULT_DB_ALIAS, connections
+
+PIN_COOKIE_NAME = 'db_primary_pin'
+PIN_HEADER_NAME = 'X-DB-Primary-Pin'
+PIN_SIGNING_SALT = 'db_router.primary_pin'
+
+_pinned = ContextVar('db_primary_pinned', default=False)
+
+
+def replica_aliases():
+    return getattr(settings, 'DATABASE_REPLICAS', [])
+
+
+def is_pinned():
+    return _pinned.get()
+
+
+@contextmanager
+def use_primary():
+    """
+    توجيه كل القراءات داخل الكتلة إلى قاعدة البيانات الرئيسية
+    """
+    token = _pinned.set(True)
+    try:
+        yield
+    finally:
+        _pinned.reset(token)
+
+
+class ReplicaRouter:
+    """
+    موجه Django: القراءة من النسخ المقروءة والكتابة والترحيلات على الرئيسية
+    """
+
+    def db_for_read(self, model, **hints):
+        replicas = replica_aliases()
+        if not replicas or _pinned.get() or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        instance = hints.get('instance')
+        if instance is not None and instance._state.db:
+            # العلاقات المحملة من كائن يتبع قاعدة البيانات التي جاء منها
+            return instance._state.db
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, *replica_aliases()}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
+
+
+class PrimaryPinMiddleware:
+    """
+    تثبيت الطلب على قاعدة البيانات الرئيسية:
+    - طلبات الكتابة (POST/PUT/PATCH/DELETE) نفسها
+    - وطلبات القراءة التالية من نفس العميل خلال DATABASE_PRIMARY_PIN_SECONDS
+    بعد كل كتابة يُرسل وقت انتهاء التثبيت موقعاً في ملف تعريف ارتباط وفي ترويسة يعيدها العميل؛
+    القيمة غير الموقعة تُتجاهل، ولا يتجاوز التثبيت DATABASE_PRIMARY_PIN_SECONDS من الآن
+    """
+    safe_methods = ('GET', 'HEAD', 'OPTIONS')
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    @staticmethod
+    def _pinned_until(request):
+        value = request.headers.get(PIN_HEADER_NAME) or request.COOKIES.get(PIN_COOKIE_NAME)
+        if not value:
+            return 0
+        try:
+            until = float(signing.Signer(salt=PIN_SIGNING_SALT).unsign(value))
+        except (signing.BadSignature, ValueError):
+            return 0
+        return min(until, time.time() + getattr(settings, 'DATABASE_PRIMARY_PIN_SECONDS', 5))
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not replica_aliases():
+            return self.get_response(request)
+
+        is_write = request.method not in self.safe_methods
+        token = _pinned.set(is_write or self._pinned_until(request) > time.time())
+        try:
+            response = self.get_response(request)
+        finally:
+            _pinned.reset(token)
+        return self.process_response(request, response)
+
+    async def __acall__(self, request):
+        if not replica_aliases():
+            return await self.get_response(request)
+
+        token = _pinned.set(request.method not in self.safe_methods or self._pinned_until(request) > time.time())
+        try:
+            response = await self.get_response(request)
+        finally:
+            _pinned.reset(token)
+        return self.process_response(request, response)
+
+    def process_response(self, request, response):
+        if request.method not in self.safe_methods:
+            seconds = getattr(settings, 'DATABASE_PRIMARY_PIN_SECONDS', 5)
+            until = signing.Signer(salt=PIN_SIGNING_SALT).sign(f'{time.time() + seconds:.0f}')
+            response[PIN_HEADER_NAME] = until
+            response.set_cookie(PIN_COOKIE_NAME, until, max_age=seconds, httponly=True, samesite='Lax')
+        return response
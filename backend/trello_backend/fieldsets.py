@@ -0,0 +1,104 @@
+"""
+اختيار الحقول في استجابات القراءة (Sparse Fieldsets)
+- ?fields=id,title,status يعيد هذه الحقول فقط
+- ?include=assignee_detail,project يحدد أي الحقول الثقيلة (كتل *_detail والحقول المحسوبة) تُضاف؛
+  include فارغ يستبعدها كلها، ويمكن كتابة project بدلاً من project_detail
+- بدون أي منهما تبقى الاستجابة كاملة كما هي
+- العلاقات التي تُجلب مع الاستعلام (select_related) والمجموعات المسبقة (prefetch_related)
+  تُشتق من الحقول المطلوبة فقط
+"""
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.serializers import ListSerializer
+
+FIELDS_PARAM = 'fields'
+INCLUDE_PARAM = 'include'
+
+
+def _names(value):
+    return {name.strip() for name in value.split(',') if name.strip()}
+
+
+def _query_params(request):
+    # طلب DRF أو طلب Django العادي (العروض غير المتزامنة)
+    return getattr(request, 'query_params', None) or request.GET
+
+
+class SparseFieldsetMixin:
+    """
+    يُضاف إلى ModelSerializer، ويُطبق على المحول الأعلى في الاستجابة فقط (وليس على المحولات المتداخلة)
+    Meta.expandable_fields: الحقول الثقيلة التي يتحكم بها include
+    Meta.related_fields: {الحقل: العلاقات التي يحتاجها} لاشتقاق select_related
+    Meta.prefetch_fields: {الحقل: علاقات متعددة} لاشتقاق prefetch_related (استعلام واحد لكل علاقة في الصفحة)
+    """
+
+    @classmethod
+    def selected_fields(cls, request):
+        """
+        أسماء الحقول المطلوبة، أو None إذا لم يحدد العميل fields ولا include
+        """
+        if request is None or request.method not in SAFE_METHODS:
+            return None
+        params = _query_params(request)
+        if FIELDS_PARAM not in params and INCLUDE_PARAM not in params:
+            return None
+
+        available = list(cls.Meta.fields)
+        expandable = set(getattr(cls.Meta, 'expandable_fields', ()))
+
+        if FIELDS_PARAM in params:
+            selected = _names(params[FIELDS_PARAM]) & set(available)
+        else:
+            selected = set(available) - expandable
+
+        if INCLUDE_PARAM in params:
+            for name in _names(params[INCLUDE_PARAM]):
+                if name in expandable:
+                    selected.add(name)
+                elif f'{name}_detail' in expandable:
+                    selected.add(f'{name}_detail')
+        return selected
+
+    @classmethod
+    def _relations_for(cls, meta_attr, request=None):
+        field_map = getattr(cls.Meta, meta_attr, {})
+        selected = cls.selected_fields(request)
+        relations = []
+        for field, field_relations in field_map.items():
+            if selected is None or field in selected:
+                relations.extend(relation for relation in field_relations if relation not in relations)
+        return tuple(relations)
+
+    @classmethod
+    def select_related_for(cls, request=None):
+        """
+        العلاقات التي يجب جلبها مع الاستعلام للحقول المطلوبة
+        """
+        return cls._relations_for('related_fields', request)
+
+    @classmethod
+    def prefetch_related_for(cls, request=None):
+        return cls._relations_for('prefetch_fields', request)
+
+    @classmethod
+    def prepare_queryset(cls, queryset, request=None):
+        relations = cls.select_related_for(request)
+        # select_related() بدون وسائط يجلب كل العلاقات، لذلك لا يُستدعى عند عدم الحاجة لأي علاقة
+        if relations:
+            queryset = queryset.select_related(*relations)
+        prefetches = cls.prefetch_related_for(request)
+        return queryset.prefetch_related(*prefetches) if prefetches else queryset
+
+    def _is_root(self):
+        parent = self.parent
+        if isinstance(parent, ListSerializer):
+            parent = parent.parent
+        return parent is None
+
+    def get_fields(self):
+        fields = super().get_fields()
+        if not self._is_root():
+            return fields
+        selected = self.selected_fields(self.context.get('request'))
+        if selected is None:
+            return fields
+        return {name: field for name, field in fields.items() if name in selected}
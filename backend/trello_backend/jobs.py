@@ -0,0 +1,11 @@
+"""
+معالجات المهام الخلفية الخاصة بالبث (انظر تطبيق jobs)
+"""
+from jobs.queue import job
+
+from .broadcast import publish
+
+
+@job('broadcast.publish', max_attempts=3)
+def publish_event(groups, event):
+    publish(groups, event, raise_errors=True)
@@ -0,0 +1,111 @@
+"""
+ترميز JSON موحد لواجهة REST واتصالات WebSocket
+- يستخدم orjson عند توفره (أسرع عدة مرات من json القياسية)، وإلا json القياسية
+- الاختيار عبر JSON_CODEC في الإعدادات: 'auto' (افتراضي) أو 'orjson' أو 'json'
+- المخرجات مضغوطة وبترميز UTF-8 دون تهريب الحروف العربية
+- يدعم التواريخ وDecimal وUUID والنصوص المترجمة الكسولة (gettext_lazy) بنفس تمثيل DRF
+"""
+import datetime
+import decimal
+import json
+import uuid
+
+from django.conf import settings
+from django.utils.functional import Promise
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+
+def default(obj):
+    """
+    تحويل الأنواع غير المدعومة مباشرة (نفس قواعد rest_framework.utils.encoders.JSONEncoder)
+    """
+    if isinstance(obj, Promise):
+        return str(obj)
+    if isinstance(obj, datetime.datetime):
+        representation = obj.isoformat()
+        if representation.endswith('+00:00'):
+            representation = representation[:-6] + 'Z'
+        return representation
+    if isinstance(obj, (datetime.date, datetime.time)):
+        return obj.isoformat()
+    if isinstance(obj, datetime.timedelta):
+        return str(obj.total_seconds())
+    if isinstance(obj, decimal.Decimal):
+        # حقول DecimalField في المحولات تُرجع نصوصاً مسبقاً؛ القيم الخام تُرمز كأعداد
+        return float(obj)
+    if isinstance(obj, uuid.UUID):
+        return str(obj)
+    if isinstance(obj, bytes):
+        return obj.decode()
+    if hasattr(obj, 'tolist'):
+        return obj.tolist()
+    if hasattr(obj, '__getitem__') and hasattr(obj, 'keys'):
+        return dict(obj)
+    if hasattr(obj, '__iter__'):
+        return list(obj)
+    raise TypeError(f'Object of type {type(obj).__name__} is not JSON serializable')
+
+
+def backend():
+    choice = getattr(settings, 'JSON_CODEC', 'auto')
+    if choice == 'json' or orjson is None:
+        return 'json'
+    return 'orjson'
+
+
+def _reject_constant(value):
+    raise ValueError(f'Out of range float values are not JSON compliant: {value}')
+
+
+if orjson is not None:
+    # التواريخ تُمرر إلى default حتى يطابق تمثيلها DRF تماماً؛ والمفاتيح غير النصية تُحول إلى نصوص
+    ORJSON_OPTIONS = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+
+
+def dumps(obj):
+    """
+    ترميز إلى bytes بصيغة UTF-8
+    """
+    if backend() == 'orjson':
+        try:
+            return orjson.dumps(obj, default=default, option=ORJSON_OPTIONS)
+        except orjson.JSONEncodeError:
+            # أعداد صحيحة أكبر من 64 بت وحالات نادرة أخرى
+            pass
+    return json.dumps(obj, default=default, ensure_ascii=False, separators=(',', ':'), allow_nan=False).encode('utf-8')
+
+
+def dumps_str(obj):
+    """
+    ترميز إلى نص (لإطارات WebSocket النصية)
+    """
+    return dumps(obj).decode('utf-8')
+
+
+def loads(data):
+    """
+    فك ترميز bytes أو نص؛ القيم NaN وInfinity مرفوضة مثل DRF
+    """
+    if backend() == 'orjson':
+        return orjson.loads(data)
+    if isinstance(data, (bytes, bytearray)):
+        data = data.decode('utf-8')
+    return json.loads(data, parse_constant=_reject_constant)
+
+
+class CodecJsonConsumerMixin:
+    """
+    استخدام نفس المرمّز في مستهلكات AsyncJsonWebsocketConsumer
+    """
+
+    @classmethod
+    async def decode_json(cls, text_data):
+        return loads(text_data)
+
+    @classmethod
+    async def encode_json(cls, content):
+        return dumps_str(content)
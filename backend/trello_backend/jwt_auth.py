@@ -0,0 +1,240 @@
+"""
+مصادقة JWT لاتصالات WebSocket
+يتم فك الرمز مرة واحدة لكل اتصال، مع تخزين التواقيع التي تم التحقق منها طوال مدة صلاحيتها
+وجلب المستخدم من ذاكرة تخزين مؤقت مشتركة لتجنب ضغط جدول المستخدمين عند إعادة الاتصال الجماعي
+"""
+import asyncio
+import hashlib
+import time
+from collections import OrderedDict
+from urllib.parse import parse_qs
+
+from channels.db import database_sync_to_async
+from channels.middleware import BaseMiddleware
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from organizations.models import Organization
+
+User = get_user_model()
+
+PRINCIPAL_CACHE_PREFIX = 'ws_principal'
+
+# حقول المستخدم المحفوظة في الذاكرة المشتركة (بدون كلمة المرور)
+PRINCIPAL_FIELDS = (
+    'id', 'username', 'email', 'first_name', 'last_name', 'is_active', 'is_staff', 'is_superuser',
+    'is_admin', 'is_system_owner', 'organization_id', 'date_joined', 'last_login',
+)
+PRINCIPAL_ORGANIZATION_FIELDS = ('id', 'name', 'slug', 'created_at')
+
+
+def principal_cache_key(user_id):
+    """
+    مفتاح المستخدم في ذاكرة التخزين المؤقت المشتركة
+    """
+    return f'{PRINCIPAL_CACHE_PREFIX}:{user_id}'
+
+
+class VerifiedTokenCache:
+    """
+    ذاكرة محدودة (LRU) للرموز التي تم التحقق من توقيعها
+    تحفظ معرف المستخدم ووقت انتهاء الرمز فقط، وتُحذف المدخلات تلقائياً عند انتهاء الصلاحية
+    """
+
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self._entries = OrderedDict()
+
+    @staticmethod
+    def _digest(token):
+        return hashlib.sha256(token.encode('utf-8')).digest()
+
+    def get(self, token):
+        key = self._digest(token)
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        user_id, expires_at = entry
+        if expires_at <= time.time():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return user_id
+
+    def set(self, token, user_id, expires_at):
+        key = self._digest(token)
+        self._entries[key] = (user_id, expires_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        self._entries.clear()
+
+
+verified_tokens = VerifiedTokenCache(getattr(settings, 'WS_TOKEN_CACHE_SIZE', 10000))
+
+# طلبات جلب المستخدم الجارية حالياً (لكل مستخدم طلب واحد فقط في كل عملية)
+_pending_principals = {}
+
+
+def get_token_from_scope(scope):
+    """
+    استخراج رمز الوصول من معلمات الاستعلام أو من ترويسة Authorization
+    """
+    query_string = scope.get('query_string', b'').decode('utf-8')
+    token = parse_qs(query_string).get('token', [None])[0]
+    if token:
+        return token
+
+    for name, value in scope.get('headers', []):
+        if name == b'authorization':
+            parts = value.decode('latin-1').split()
+            if len(parts) == 2 and parts[0] in api_settings.AUTH_HEADER_TYPES:
+                return parts[1]
+    return None
+
+
+def get_token_from_request(request):
+    """
+    استخراج رمز الوصول من ترويسة Authorization لطلب HTTP (العروض غير المتزامنة)
+    """
+    parts = request.headers.get('Authorization', '').split()
+    if len(parts) == 2 and parts[0] in api_settings.AUTH_HEADER_TYPES:
+        return parts[1]
+    return None
+
+
+def verify_token(token):
+    """
+    التحقق من الرمز وإرجاع معرف المستخدم، أو None إذا كان الرمز غير صالح
+    يتم التحقق من التوقيع مرة واحدة فقط طوال مدة صلاحية الرمز
+    """
+    user_id = verified_tokens.get(token)
+    if user_id is not None:
+        return user_id
+
+    try:
+        access_token = AccessToken(token)
+    except TokenError:
+        return None
+
+    user_id = access_token.get(api_settings.USER_ID_CLAIM)
+    if user_id is None:
+        return None
+
+    verified_tokens.set(token, user_id, access_token['exp'])
+    return user_id
+
+
+def _principal_data(user):
+    """
+    الحقول التي يحتاجها المستهلكون فقط، لتخزينها بدلاً من كائن المستخدم كاملاً
+    """
+    data = {name: getattr(user, name) for name in PRINCIPAL_FIELDS}
+    organization = user.organization
+    data['organization'] = (
+        {name: getattr(organization, name) for name in PRINCIPAL_ORGANIZATION_FIELDS}
+        if organization is not None else None
+    )
+    return data
+
+
+def _build_principal(data):
+    """
+    إعادة بناء المستخدم (ومؤسسته) من الحقول المخزنة دون استعلام
+    الحقول غير المخزنة تبقى مؤجلة وتُجلب من قاعدة البيانات عند الحاجة إليها فقط
+    """
+    data = dict(data)
+    organization = data.pop('organization')
+    names = [field.attname for field in User._meta.concrete_fields if field.attname in data]
+    user = User.from_db(None, names, [data[name] for name in names])
+    if organization is not None:
+        user.organization = Organization.from_db(
+            None, PRINCIPAL_ORGANIZATION_FIELDS, [organization[name] for name in PRINCIPAL_ORGANIZATION_FIELDS]
+        )
+    return user
+
+
+@database_sync_to_async
+def _load_principal(user_id):
+    """
+    جلب المستخدم من قاعدة البيانات مع مؤسسته وحفظ حقوله في الذاكرة المشتركة
+    """
+    try:
+        data = _principal_data(User.objects.select_related('organization').get(id=user_id))
+    except User.DoesNotExist:
+        data = None
+
+    cache.set(
+        principal_cache_key(user_id),
+        data if data is not None else False,
+        getattr(settings, 'WS_PRINCIPAL_CACHE_TIMEOUT', 300)
+    )
+    return data
+
+
+async def get_principal(user_id):
+    """
+    الحصول على المستخدم من الذاكرة المشتركة، أو من قاعدة البيانات عند عدم وجوده
+    الطلبات المتزامنة لنفس المستخدم تنتظر استعلاماً واحداً بدلاً من تكرار الاستعلام
+    """
+    principal = await database_sync_to_async(cache.get)(principal_cache_key(user_id))
+    if principal is None:
+        pending = _pending_principals.get(user_id)
+        if pending is None:
+            pending = asyncio.ensure_future(_load_principal(user_id))
+            _pending_principals[user_id] = pending
+            pending.add_done_callback(lambda _: _pending_principals.pop(user_id, None))
+        principal = await asyncio.shield(pending)
+
+    if not principal or not principal['is_active']:
+        return None
+    return _build_principal(principal)
+
+
+async def get_user_for_token(token):
+    """
+    إرجاع المستخدم المرتبط بالرمز أو AnonymousUser
+    """
+    user_id = verify_token(token)
+    if user_id is None:
+        return AnonymousUser()
+    user = await get_principal(user_id)
+    return user if user is not None else AnonymousUser()
+
+
+def invalidate_principal(user_id):
+    """
+    حذف المستخدم من الذاكرة المشتركة بعد تعديله أو حذفه
+    """
+    cache.delete(principal_cache_key(user_id))
+
+
+def invalidate_organization_principals(organization_id):
+    """
+    حذف مستخدمي المؤسسة من الذاكرة المشتركة بعد تعديل المؤسسة (الاسم أو المعرف النصي) أو حذفها
+    """
+    user_ids = User.objects.filter(organization_id=organization_id).values_list('id', flat=True)
+    cache.delete_many([principal_cache_key(user_id) for user_id in user_ids])
+
+
+class JWTAuthMiddleware(BaseMiddleware):
+    """
+    وسيط ASGI يضيف المستخدم المصادق عليه عبر JWT إلى scope['user']
+    """
+
+    async def __call__(self, scope, receive, send):
+        scope = dict(scope)
+        token = get_token_from_scope(scope)
+        scope['user'] = await get_user_for_token(token) if token else AnonymousUser()
+        return await super().__call__(scope, receive, send)
+
+
+def JWTAuthMiddlewareStack(inner):
+    return JWTAuthMiddleware(inner)
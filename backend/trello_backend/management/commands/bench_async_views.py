@@ -0,0 +1,106 @@
+import asyncio
+import time
+
+from asgiref.sync import ThreadSensitiveContext, sync_to_async
+from django.core.management.base import BaseCommand, CommandError
+from django.test import RequestFactory
+from rest_framework_simplejwt.tokens import AccessToken
+
+from projects.views import ProjectListAsyncView, ProjectTasksAsyncView, ProjectViewSet
+from tasks.views import TaskDetailAsyncView, TaskListAsyncView, TaskViewSet
+from users.models import User
+from users.views import CurrentUserAsyncView, current_user
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)]
+
+
+class Command(BaseCommand):
+    help = 'مقارنة زمن الاستجابة (p50/p99) لعروض القراءة المتزامنة وغير المتزامنة عند مستويات تزامن مختلفة'
+
+    endpoints = {
+        'tasks': ('/api/tasks/', TaskViewSet.as_view({'get': 'list'}), TaskListAsyncView.as_view(), {}),
+        'task': ('/api/tasks/{pk}/', TaskViewSet.as_view({'get': 'retrieve'}), TaskDetailAsyncView.as_view(), {'pk': None}),
+        'projects': ('/api/projects/', ProjectViewSet.as_view({'get': 'list'}), ProjectListAsyncView.as_view(), {}),
+        'project-tasks': ('/api/projects/{pk}/tasks/', ProjectViewSet.as_view({'get': 'tasks'}), ProjectTasksAsyncView.as_view(), {'pk': None}),
+        'me': ('/api/users/me/', current_user, CurrentUserAsyncView.as_view(), {}),
+    }
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', help='اسم المستخدم (افتراضياً أول مستخدم له مؤسسة)')
+        parser.add_argument('--endpoint', choices=sorted(self.endpoints), default='tasks')
+        parser.add_argument('--pk', help='معرف المهمة أو المشروع للمسارات التفصيلية')
+        parser.add_argument('--concurrency', default='1,8,32,128', help='مستويات التزامن مفصولة بفواصل')
+        parser.add_argument('--requests', type=int, default=400, help='عدد الطلبات لكل مستوى')
+
+    async def call_sync(self, view, request, kwargs):
+        # نفس ما يفعله ASGIHandler مع العروض المتزامنة: خيط لكل طلب ثم تحويل الاستجابة
+        async with ThreadSensitiveContext():
+            response = await sync_to_async(view, thread_sensitive=True)(request, **kwargs)
+            if hasattr(response, 'render'):
+                await sync_to_async(response.render, thread_sensitive=True)()
+        return response
+
+    async def call_async(self, view, request, kwargs):
+        async with ThreadSensitiveContext():
+            return await view(request, **kwargs)
+
+    async def run_level(self, call, view, make_request, kwargs, concurrency, total):
+        semaphore = asyncio.Semaphore(concurrency)
+        latencies = []
+        statuses = set()
+
+        async def one():
+            async with semaphore:
+                started = time.perf_counter()
+                response = await call(view, make_request(), kwargs)
+                latencies.append(time.perf_counter() - started)
+                statuses.add(response.status_code)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(total)))
+        return time.perf_counter() - started, latencies, statuses
+
+    async def benchmark(self, endpoint, make_request, kwargs, levels, total):
+        _, sync_view, async_view, _ = self.endpoints[endpoint]
+        # تسخين: تعبئة ذاكرة المستخدمين والاتصالات
+        await self.call_async(async_view, make_request(), kwargs)
+        await self.call_sync(sync_view, make_request(), kwargs)
+
+        for concurrency in levels:
+            for label, call, view in (('متزامن', self.call_sync, sync_view), ('غير متزامن', self.call_async, async_view)):
+                elapsed, latencies, statuses = await self.run_level(call, view, make_request, kwargs, concurrency, total)
+                self.stdout.write(
+                    f'التزامن={concurrency:<4} {label:<10} '
+                    f'p50={percentile(latencies, 0.5) * 1000:.1f}ms p99={percentile(latencies, 0.99) * 1000:.1f}ms '
+                    f'{total / elapsed:.0f} طلب/ثانية الحالات={sorted(statuses)}'
+                )
+
+    def handle(self, *args, **options):
+        users = User.objects.select_related('organization').filter(organization__isnull=False)
+        if options['user']:
+            users = users.filter(username=options['user'])
+        user = users.first()
+        if user is None:
+            raise CommandError('لا يوجد مستخدم مناسب للقياس')
+
+        endpoint = options['endpoint']
+        path, _, _, kwargs = self.endpoints[endpoint]
+        kwargs = dict(kwargs)
+        if 'pk' in kwargs:
+            if not options['pk']:
+                raise CommandError('يجب تحديد --pk لهذا المسار')
+            kwargs['pk'] = options['pk']
+            path = path.format(pk=options['pk'])
+
+        token = str(AccessToken.for_user(user))
+        factory = RequestFactory()
+
+        def make_request():
+            return factory.get(path, HTTP_AUTHORIZATION=f'Bearer {token}')
+
+        levels = [int(level) for level in options['concurrency'].split(',') if level.strip()]
+        self.stdout.write(f'المسار: {path}، المستخدم: {user.username}، الطلبات لكل مستوى: {options["requests"]}')
+        asyncio.run(self.benchmark(endpoint, make_request, kwargs, levels, options['requests']))
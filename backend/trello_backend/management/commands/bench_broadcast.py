@@ -0,0 +1,69 @@
+import copy
+import time
+import uuid
+
+from django.core.management.base import BaseCommand
+
+from tasks.models import Task
+from tasks.serializers import TaskSerializer, TASK_SERIALIZER_RELATED
+from trello_backend import ws_codec
+
+from .bench_json_codec import SAMPLE_TASK
+
+
+class Command(BaseCommand):
+    help = 'قياس زمن المعالج لكل بث حسب حجم المجموعة: ترميز لكل اتصال مقابل الترميز مرة واحدة عند النشر'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--group-sizes', default='10,100,500,1000', help='أحجام المجموعات مفصولة بفواصل')
+        parser.add_argument('--broadcasts', type=int, default=20, help='عدد الأحداث المبثوثة لكل قياس')
+        parser.add_argument('--msgpack-share', type=float, default=0.2, help='نسبة الاتصالات التي تستخدم MessagePack')
+
+    def sample_event(self):
+        task = Task.objects.select_related(*TASK_SERIALIZER_RELATED).first()
+        data = dict(TaskSerializer(task).data) if task is not None else SAMPLE_TASK
+        return {'type': 'task_update', 'task': data}
+
+    @staticmethod
+    def run(event, group_size, broadcasts, msgpack_share, prepared):
+        """
+        بث الأحداث واستهلاكها كما يفعل المستهلكون، ويُعاد زمن المعالج لكل بث
+        نقل الرسالة لكل اتصال يُحاكى بنسخة عميقة كما تفعل طبقة القنوات في الذاكرة
+        (طبقة Redis تسلسل الرسالة لكل قناة بتكلفة مشابهة)
+        """
+        msgpack_count = int(group_size * msgpack_share)
+        encodings = [ws_codec.MSGPACK if index < msgpack_count else ws_codec.JSON for index in range(group_size)]
+
+        started = time.process_time()
+        for _ in range(broadcasts):
+            message = dict(event, event_id=uuid.uuid4().hex)
+            if prepared:
+                message = ws_codec.prepare_event(message)
+            for encoding in encodings:
+                received = copy.deepcopy(message)
+                if prepared:
+                    ws_codec.frames.encode_event(received, encoding)
+                else:
+                    ws_codec.encode(ws_codec.event_message(received), encoding)
+        return (time.process_time() - started) / broadcasts
+
+    def handle(self, *args, **options):
+        event = self.sample_event()
+        sizes = [int(size) for size in options['group_sizes'].split(',') if size.strip()]
+        self.stdout.write(
+            f"الترميزات المجهزة عند النشر: {','.join(ws_codec.publish_encodings())}، "
+            f"نسبة MessagePack: {options['msgpack_share']:.0%}"
+        )
+
+        for size in sizes:
+            results = {}
+            for label, prepared in (('ترميز لكل اتصال', False), ('ترميز مرة واحدة', True)):
+                ws_codec.frames.clear()
+                results[label] = self.run(event, size, options['broadcasts'], options['msgpack_share'], prepared)
+            per_socket = results['ترميز لكل اتصال']
+            once = results['ترميز مرة واحدة']
+            self.stdout.write(
+                f'المجموعة {size}: ترميز لكل اتصال {per_socket * 1000:.2f}ms/بث، '
+                f'ترميز مرة واحدة {once * 1000:.2f}ms/بث '
+                f'({per_socket / once if once else 0:.1f}x)'
+            )
@@ -0,0 +1,87 @@
+import copy
+import time
+import zlib
+
+from django.core.management.base import BaseCommand
+
+from tasks.models import Task
+from tasks.serializers import TaskSerializer, TASK_SERIALIZER_RELATED
+from trello_backend import compression, json_codec
+
+from .bench_json_codec import SAMPLE_TASK
+
+
+class Command(BaseCommand):
+    help = 'قياس حجم ووقت ضغط قوائم المهام (gzip/brotli) وأثرها على زمن الاستجابة حسب سرعة الشبكة'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--items', type=int, default=100, help='عدد المهام في الاستجابة')
+        parser.add_argument('--repeat', type=int, default=5, help='عدد مرات التكرار (يُعرض أفضل زمن)')
+        parser.add_argument('--bandwidth', default='1,10,100', help='سرعات الشبكة بالميغابت/ثانية مفصولة بفواصل')
+
+    def template(self):
+        task = Task.objects.select_related(*TASK_SERIALIZER_RELATED).first()
+        if task is None:
+            return copy.deepcopy(SAMPLE_TASK)
+        return dict(TaskSerializer(task).data)
+
+    def variants(self):
+        yield 'identity', lambda data: data
+        for level in (1, 6, 9):
+            yield f'gzip-{level}', lambda data, level=level: self.gzip(data, level)
+        if compression.brotli is None:
+            self.stdout.write(self.style.WARNING('مكتبة brotli غير مثبتة، يُقاس gzip فقط'))
+            return
+        for quality in (1, 5, 11):
+            yield f'br-{quality}', lambda data, quality=quality: compression.brotli.compress(data, quality=quality)
+
+    @staticmethod
+    def gzip(data, level):
+        compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+        return compressor.compress(data) + compressor.flush()
+
+    @staticmethod
+    def best(function, repeat):
+        timings = []
+        result = None
+        for _ in range(repeat):
+            started = time.process_time()
+            result = function()
+            timings.append(time.process_time() - started)
+        return min(timings), result
+
+    def handle(self, *args, **options):
+        template = self.template()
+        payload = []
+        for index in range(options['items']):
+            item = dict(template)
+            item['id'] = index + 1
+            item['title'] = f"{template['title']} #{index + 1}"
+            payload.append(item)
+        body = json_codec.dumps(payload)
+        bandwidths = [float(value) for value in options['bandwidth'].split(',') if value.strip()]
+
+        self.stdout.write(f'عدد المهام: {len(payload)}، الحجم قبل الضغط: {len(body) / 1024:.1f}KB')
+        header = ' | '.join(f'{bandwidth:g}Mbps' for bandwidth in bandwidths)
+        self.stdout.write(f'الترميز: الحجم، النسبة، زمن المعالج | زمن الاستجابة التقديري ({header})')
+
+        for label, function in self.variants():
+            elapsed, compressed = self.best(lambda: function(body), options['repeat'])
+            # زمن الاستجابة التقديري = زمن الضغط + زمن نقل الناتج
+            latencies = ' | '.join(
+                f'{(elapsed + len(compressed) * 8 / (bandwidth * 1_000_000)) * 1000:.1f}ms'
+                for bandwidth in bandwidths
+            )
+            self.stdout.write(
+                f'{label}: {len(compressed) / 1024:.1f}KB، {len(compressed) / len(body):.0%}، '
+                f'{elapsed * 1000:.2f}ms | {latencies}'
+            )
+
+        # الضغط المتدفق يُفرغ الضاغط على فترات، فيُقاس أثر ذلك على الحجم
+        chunks = [json_codec.dumps(item) for item in payload]
+        encoding = compression.choose_encoding('br, gzip')
+        elapsed, streamed = self.best(lambda: b''.join(compression.compress_stream(chunks, encoding)), options['repeat'])
+        self.stdout.write(
+            f'متدفق ({encoding}، جزء لكل مهمة): {len(streamed) / 1024:.1f}KB، '
+            f'{len(streamed) / len(body):.0%}، {elapsed * 1000:.2f}ms'
+        )
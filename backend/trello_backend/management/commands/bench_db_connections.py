@@ -0,0 +1,91 @@
+import threading
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connections
+from django.db.backends.signals import connection_created
+
+
+class Command(BaseCommand):
+    help = 'قياس تكلفة فتح اتصالات قاعدة البيانات تحت حمل متزامن (بدون اتصالات دائمة، مع اتصالات دائمة أو تجمع)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, default=16, help='عدد الخيوط المتزامنة')
+        parser.add_argument('--requests', type=int, default=2000, help='إجمالي عدد الطلبات المحاكاة')
+        parser.add_argument('--database', default='default', help='اسم قاعدة البيانات في DATABASES')
+        parser.add_argument('--max-age', type=int, default=600, help='قيمة CONN_MAX_AGE في وضع الاتصالات الدائمة')
+
+    def run(self, alias, concurrency, total, conn_max_age):
+        """
+        كل خيط يحاكي طلبات متتالية: استعلام واحد ثم نهاية الطلب (close_old_connections) كما يفعل Django
+        """
+        settings_dict = connections.settings[alias]
+        original_max_age = settings_dict['CONN_MAX_AGE']
+        settings_dict['CONN_MAX_AGE'] = conn_max_age
+
+        opened = [0]
+        lock = threading.Lock()
+
+        def count_connection(sender, connection, **kwargs):
+            if connection.alias == alias:
+                with lock:
+                    opened[0] += 1
+
+        def worker(count):
+            try:
+                for _ in range(count):
+                    with connections[alias].cursor() as cursor:
+                        cursor.execute('SELECT 1')
+                        cursor.fetchone()
+                    close_old_connections()
+            finally:
+                connections[alias].close()
+
+        connection_created.connect(count_connection, weak=False)
+        try:
+            share, extra = divmod(total, concurrency)
+            threads = [
+                threading.Thread(target=worker, args=(share + (1 if index < extra else 0),))
+                for index in range(concurrency)
+            ]
+            started = time.perf_counter()
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            elapsed = time.perf_counter() - started
+        finally:
+            connection_created.disconnect(count_connection)
+            settings_dict['CONN_MAX_AGE'] = original_max_age
+
+        return elapsed, opened[0]
+
+    def handle(self, *args, **options):
+        alias = options['database']
+        concurrency = max(options['concurrency'], 1)
+        total = max(options['requests'], concurrency)
+        pooled = 'POOL' in connections.settings[alias]
+
+        self.stdout.write(
+            f"قاعدة البيانات: {connections[alias].vendor} ({connections.settings[alias]['ENGINE']})، "
+            f"الخيوط: {concurrency}، الطلبات: {total}"
+        )
+        if pooled:
+            self.stdout.write('تجمع الاتصالات مفعل: الوضع الأول يستعير الاتصالات من التجمع بدلاً من فتحها')
+
+        modes = [
+            ('تجمع الاتصالات' if pooled else 'بدون اتصالات دائمة', 0),
+            ('اتصالات دائمة', options['max_age']),
+        ]
+        results = []
+        for label, conn_max_age in modes:
+            elapsed, opened = self.run(alias, concurrency, total, conn_max_age)
+            results.append(elapsed)
+            self.stdout.write(
+                f'{label} (CONN_MAX_AGE={conn_max_age}): {elapsed:.3f} ثانية، '
+                f'{total / elapsed:.0f} طلب/ثانية، {elapsed / total * 1000:.3f} مللي ثانية لكل طلب، '
+                f'اتصالات جديدة: {opened}'
+            )
+
+        if results[1]:
+            self.stdout.write(self.style.SUCCESS(f'نسبة التسريع مع الاتصالات الدائمة: {results[0] / results[1]:.2f}x'))
@@ -0,0 +1,86 @@
+import copy
+import io
+import time
+
+from django.core.management.base import BaseCommand
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from tasks.models import Task
+from tasks.serializers import TaskSerializer, TASK_SERIALIZER_RELATED
+from trello_backend import json_codec
+from trello_backend.renderers import FastJSONParser, FastJSONRenderer
+
+# نموذج بنفس شكل مخرجات TaskSerializer عند عدم وجود مهام في قاعدة البيانات
+SAMPLE_ORGANIZATION = {'id': 1, 'name': 'مؤسسة تجريبية', 'slug': 'demo', 'created_at': '2025-01-01T09:00:00Z'}
+SAMPLE_USER = {
+    'id': 1, 'username': 'ahmed', 'email': 'ahmed@example.com', 'is_admin': False, 'is_system_owner': False,
+    'organization': 1, 'organization_detail': SAMPLE_ORGANIZATION,
+    'date_joined': '2025-01-01T09:00:00Z', 'last_login': '2025-02-01T10:30:00Z',
+}
+SAMPLE_TASK = {
+    'id': 1, 'title': 'مراجعة تصميم لوحة المشروع', 'description': 'تحديث الأعمدة وإضافة فلاتر البحث حسب الحالة',
+    'status': 'in_progress', 'project': 1,
+    'project_detail': {
+        'id': 1, 'title': 'تطبيق إدارة المهام', 'description': 'مشروع داخلي', 'owner': 1, 'owner_detail': SAMPLE_USER,
+        'organization': 1, 'organization_detail': SAMPLE_ORGANIZATION,
+        'created_at': '2025-01-01T09:00:00Z', 'updated_at': '2025-02-01T10:30:00Z',
+        'tasks_count': 120, 'completion_percentage': 42,
+    },
+    'assignee': 1, 'assignee_detail': SAMPLE_USER,
+    'organization': 1, 'organization_detail': SAMPLE_ORGANIZATION,
+    'comment_count': 3, 'created_at': '2025-01-03T11:00:00Z', 'updated_at': '2025-02-01T10:30:00Z',
+}
+
+
+class Command(BaseCommand):
+    help = 'قياس زمن ترميز وفك ترميز قوائم مهام بشكل TaskSerializer بالمرمّز القياسي والسريع'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--items', type=int, default=10000, help='عدد المهام في الحمولة')
+        parser.add_argument('--repeat', type=int, default=5, help='عدد مرات التكرار (يُعرض أفضل زمن)')
+
+    def template(self):
+        task = Task.objects.select_related(*TASK_SERIALIZER_RELATED).first()
+        if task is None:
+            return copy.deepcopy(SAMPLE_TASK)
+        return dict(TaskSerializer(task).data)
+
+    @staticmethod
+    def best(function, repeat):
+        timings = []
+        result = None
+        for _ in range(repeat):
+            started = time.perf_counter()
+            result = function()
+            timings.append(time.perf_counter() - started)
+        return min(timings), result
+
+    def handle(self, *args, **options):
+        template = self.template()
+        payload = []
+        for index in range(options['items']):
+            item = dict(template)
+            item['id'] = index + 1
+            item['title'] = f"{template['title']} #{index + 1}"
+            payload.append(item)
+
+        repeat = options['repeat']
+        self.stdout.write(f'عدد المهام: {len(payload)}، المرمّز السريع: {json_codec.backend()}')
+
+        results = {}
+        for label, renderer in (('JSONRenderer (stdlib)', JSONRenderer()), ('FastJSONRenderer', FastJSONRenderer())):
+            elapsed, body = self.best(lambda: renderer.render(payload), repeat)
+            results[label] = (elapsed, body)
+            self.stdout.write(f'ترميز {label}: {elapsed * 1000:.1f}ms، الحجم {len(body) / 1024:.0f}KB')
+
+        body = results['FastJSONRenderer'][1]
+        for label, parser in (('JSONParser (stdlib)', JSONParser()), ('FastJSONParser', FastJSONParser())):
+            elapsed, parsed = self.best(lambda: parser.parse(io.BytesIO(body), parser_context={}), repeat)
+            self.stdout.write(f'فك ترميز {label}: {elapsed * 1000:.1f}ms')
+
+        standard = results['JSONRenderer (stdlib)'][0]
+        fast = results['FastJSONRenderer'][0]
+        if parsed != payload:
+            self.stdout.write(self.style.ERROR('البيانات بعد فك الترميز لا تطابق الأصل'))
+        self.stdout.write(self.style.SUCCESS(f'تسريع الترميز: {standard / fast:.1f}x'))
@@ -2,15 +2,20 @@ import json
 from channels.generic.websocket import AsyncJsonWebsocketConsumer
 from channels.db import database_sync_to_async
 from django.contrib.auth import get_user_model
+from .access import NOT_CACHED, can_access_org, get_org_ids_for_slugs, peek_slug_org_id
+from .throttling import RateLimitedConsumerMixin
+from .ws_codec import FramedConsumerMixin
+from .ws_events import ClientEventsMixin
 
 User = get_user_model()
 
 
-class OrganizationConsumer(AsyncJsonWebsocketConsumer):
+class OrganizationConsumer(ClientEventsMixin, RateLimitedConsumerMixin, FramedConsumerMixin, AsyncJsonWebsocketConsumer):
     """
     مستهلك WebSocket للمؤسسات
     يسمح بالتحديثات اللحظية للمهام والمشاريع داخل المؤسسة
     كل مؤسسة لها غرفة (Room) خاصة بها
+    تحديثات المهام والمشاريع تصدر من الخادم فقط، والعميل يرسل أحداثاً عابرة (ws_events) فقط
     """
     
     async def connect(self):
@@ -58,90 +63,65 @@ class OrganizationConsumer(AsyncJsonWebsocketConsumer):
         """
         استقبال رسالة من WebSocket
         """
-        message_type = content.get('type')
-        
-        if message_type == 'task_update':
-            # إعادة إرسال تحديث المهمة إلى المجموعة
-            await self.channel_layer.group_send(
-                self.group_name,
-                {
-                    'type': 'task_update',
-                    'task': content.get('task')
-                }
-            )
-        elif message_type == 'project_update':
-            # إعادة إرسال تحديث المشروع إلى المجموعة
-            await self.channel_layer.group_send(
-                self.group_name,
-                {
-                    'type': 'project_update',
-                    'project': content.get('project')
-                }
-            )
+        if not await self.allow_message():
+            return
+        # أحداث العميل العابرة (الكتابة والسحب) بعد التحقق منها
+        await self.relay_client_event(content, self.group_name, self.scope['user'])
     
     async def task_update(self, event):
         """
         إرسال تحديث المهمة إلى WebSocket
         """
-        await self.send_json({
-            'type': 'task_update',
-            'task': event['task']
-        })
+        await self.send_event(event)
     
     async def task_create(self, event):
         """
         إرسال إشعار إنشاء مهمة جديدة إلى WebSocket
         """
-        await self.send_json({
-            'type': 'task_create',
-            'task': event['task']
-        })
+        await self.send_event(event)
     
     async def task_delete(self, event):
         """
         إرسال حذف المهمة إلى WebSocket
         """
-        await self.send_json({
-            'type': 'task_delete',
-            'task_id': event['task_id']
-        })
+        await self.send_event(event)
+    
+    async def checklist_item_update(self, event):
+        """
+        إرسال تغيير عنصر في قائمة تحقق مهمة مع عدادات تقدمها
+        """
+        await self.send_event(event)
+    
+    async def checklist_item_delete(self, event):
+        """
+        إرسال حذف عنصر من قائمة تحقق مهمة مع عدادات تقدمها
+        """
+        await self.send_event(event)
     
     async def project_update(self, event):
         """
         إرسال تحديث المشروع إلى WebSocket
         """
-        await self.send_json({
-            'type': 'project_update',
-            'project': event['project']
-        })
+        await self.send_event(event)
     
     async def project_create(self, event):
         """
         إرسال إشعار إنشاء مشروع جديد إلى WebSocket
         """
-        await self.send_json({
-            'type': 'project_create',
-            'project': event['project']
-        })
+        await self.send_event(event)
     
     async def project_delete(self, event):
         """
         إرسال حذف المشروع إلى WebSocket
         """
-        await self.send_json({
-            'type': 'project_delete',
-            'project_id': event['project_id']
-        })
+        await self.send_event(event)
     
-    @database_sync_to_async
-    def can_access_organization(self, organization_slug, user):
+    async def can_access_organization(self, organization_slug, user):
         """
         التحقق من أن المستخدم ينتمي إلى المؤسسة
+        بمقارنة المعرفات من خريطة الوصول؛ عند الإصابة لا يوجد استعلام
         """
-        from organizations.models import Organization
-        
-        try:
-            organization = Organization.objects.get(slug=organization_slug)
-            return organization == user.organization
-        except Organization.DoesNotExist:
-            return False
+        org_id = peek_slug_org_id(organization_slug)
+        if org_id is NOT_CACHED:
+            org_id = (await database_sync_to_async(get_org_ids_for_slugs)([organization_slug])).get(organization_slug)
+        return can_access_org(user, org_id)
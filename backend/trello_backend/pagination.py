@@ -0,0 +1,12 @@
+from rest_framework.pagination import CursorPagination
+
+
+class NewestFirstCursorPagination(CursorPagination):
+    """
+    ترقيم بالمؤشر من الأحدث إلى الأقدم
+    ثابت الأداء مهما كان عمق الصفحة، ويستخدم لتحميل العناصر الأقدم تدريجياً
+    """
+    ordering = ('-created_at', '-id')
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
@@ -0,0 +1,237 @@
+"""
+تتبع المستخدمين المتواجدين في لوحة كل مشروع (Presence)
+- نبضات الاتصال (ping) تُجمع محلياً في كل عملية ولا تُرسل لكل نبضة
+- كل فترة قصيرة تُدمج النبضات المحلية في مخزن مشترك وتُحسب الفروقات (انضم/غادر)
+- تُبث الفروقات فقط إلى مجموعة المشروع، مع حد أقصى لمعدل البث لكل مجموعة
+- السجل المشترك يحفظ وقت انتهاء لكل عامل، فمغادرة المستخدم على عامل لا تزيله
+  ما دام متصلاً على عامل آخر
+"""
+import asyncio
+import os
+import time
+import uuid
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+
+from .broadcast import apublish
+
+PRESENCE_CACHE_PREFIX = 'presence'
+
+
+def _ttl():
+    return getattr(settings, 'PRESENCE_TTL', 60)
+
+
+_worker = (None, None)
+
+
+def worker_id():
+    """
+    معرف عشوائي للعملية الحالية، يُولد من جديد بعد fork
+    """
+    global _worker
+    pid = os.getpid()
+    if _worker[0] != pid:
+        _worker = (pid, uuid.uuid4().hex[:12])
+    return _worker[1]
+
+
+def _active(members, now):
+    return [
+        {'id': user_id, 'username': value[0]}
+        for user_id, value in sorted(members.items()) if any(expires_at > now for expires_at in value[1].values())
+    ]
+
+
+def _merge(record, worker, updates, removals, now):
+    """
+    دمج النبضات المحلية لعامل واحد في سجل المجموعة وحساب الفروقات منذ آخر بث
+    السجل بصيغة مختصرة: {'m': {user_id: [اسم المستخدم, {معرف العامل: وقت الانتهاء}]}, 's': [آخر قائمة تم بثها]}
+    الإزالة تحذف اتصالات هذا العامل فقط، والمستخدم يبقى ما دام له عامل لم تنته صلاحيته
+    """
+    members = record.get('m', {})
+    for user_id, (expires_at, username) in updates.items():
+        value = members.setdefault(user_id, [username, {}])
+        value[0] = username
+        value[1][worker] = expires_at
+    for user_id in removals:
+        if user_id in members:
+            members[user_id][1].pop(worker, None)
+    members = {
+        user_id: [username, {w: expires_at for w, expires_at in workers.items() if expires_at > now}]
+        for user_id, (username, workers) in members.items()
+    }
+    members = {user_id: value for user_id, value in members.items() if value[1]}
+
+    previous = set(record.get('s', []))
+    current = set(members)
+    joined = [{'id': user_id, 'username': members[user_id][0]} for user_id in sorted(current - previous)]
+    left = sorted(previous - current)
+    return {'m': members, 's': sorted(current)}, joined, left
+
+
+class LocalPresenceBackend:
+    """
+    مخزن داخل العملية (مناسب لعامل ASGI واحد أو للتطوير)
+    """
+
+    def __init__(self):
+        self._records = {}
+
+    def sync(self, group_name, worker, updates, removals, now):
+        record, joined, left = _merge(self._records.get(group_name, {}), worker, updates, removals, now)
+        if record['m']:
+            self._records[group_name] = record
+        else:
+            self._records.pop(group_name, None)
+        return joined, left
+
+    def members(self, group_name, now):
+        return _active(self._records.get(group_name, {}).get('m', {}), now)
+
+
+class CachePresenceBackend:
+    """
+    مخزن مشترك عبر ذاكرة Django المؤقتة (Redis) ليعمل مع عدة عمال ASGI
+    التحديث قراءة-تعديل-كتابة؛ فقدان تحديث نادر يُصحح تلقائياً مع النبضة التالية
+    """
+
+    @staticmethod
+    def _key(group_name):
+        return f'{PRESENCE_CACHE_PREFIX}:{group_name}'
+
+    def sync(self, group_name, worker, updates, removals, now):
+        key = self._key(group_name)
+        record, joined, left = _merge(cache.get(key) or {}, worker, updates, removals, now)
+        if record['m']:
+            cache.set(key, record, _ttl())
+        else:
+            cache.delete(key)
+        return joined, left
+
+    def members(self, group_name, now):
+        return _active((cache.get(self._key(group_name)) or {}).get('m', {}), now)
+
+
+class PresenceTracker:
+    """
+    يجمع نبضات الاتصالات المحلية ويبث فروقات التواجد بشكل دوري
+    """
+
+    def __init__(self, backend):
+        self.backend = backend
+        # {group_name: {user_id: [عدد الاتصالات, آخر نبضة, اسم المستخدم]}}
+        self._local = {}
+        # المستخدمون الذين غادروا محلياً ولم يُزالوا من المخزن بعد
+        self._removed = {}
+        # المستخدمون المتصلون محلياً الذين توقفت نبضاتهم؛ يبقى عدد اتصالاتهم ويعودون مع النبضة التالية
+        self._stale = {}
+        # المجموعات التي تغير أعضاؤها محلياً، ووقت آخر مزامنة لكل مجموعة
+        self._dirty = set()
+        self._synced_at = {}
+        self._task = None
+
+    @staticmethod
+    def project_id(group_name):
+        return int(group_name.split('_', 1)[1])
+
+    def join(self, group_name, user):
+        entry = self._local.setdefault(group_name, {}).get(user.id)
+        if entry is None:
+            entry = self._local[group_name][user.id] = [0, 0, user.username]
+        entry[0] += 1
+        entry[1] = time.time()
+        self._removed.get(group_name, set()).discard(user.id)
+        self._dirty.add(group_name)
+        self._ensure_running()
+
+    def heartbeat(self, group_names, user):
+        now = time.time()
+        for group_name in group_names:
+            entry = self._local.get(group_name, {}).get(user.id)
+            if entry is not None:
+                if entry[1] + _ttl() <= now:
+                    self._dirty.add(group_name)
+                entry[1] = now
+
+    def leave(self, group_name, user):
+        users = self._local.get(group_name, {})
+        entry = users.get(user.id)
+        if entry is None:
+            return
+        entry[0] -= 1
+        if entry[0] <= 0:
+            del users[user.id]
+            self._stale.get(group_name, set()).discard(user.id)
+            self._removed.setdefault(group_name, set()).add(user.id)
+            self._dirty.add(group_name)
+
+    async def members(self, group_name):
+        return await sync_to_async(self.backend.members)(group_name, time.time())
+
+    def _ensure_running(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def _run(self):
+        interval = getattr(settings, 'PRESENCE_BROADCAST_INTERVAL', 2)
+        while self._local or self._removed:
+            await asyncio.sleep(interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                print(f"WARNING: خطأ في تحديث التواجد: {str(e)}")
+
+    async def flush(self):
+        """
+        دفع النبضات المحلية إلى المخزن وبث الفروقات
+        تُزامن كل مجموعة عند تغير أعضائها محلياً، أو كل ثلث مدة الصلاحية لتجديد النبضات
+        """
+        now = time.time()
+        ttl = _ttl()
+        for group_name in list(set(self._local) | set(self._removed)):
+            users = self._local.get(group_name, {})
+            # الاتصالات المحلية التي توقفت نبضاتها لا تُرسل، لكن تبقى محلياً حتى تغادر أو تعود نبضاتها
+            stale = {user_id for user_id, entry in users.items() if entry[1] + ttl <= now}
+            if stale - self._stale.get(group_name, set()):
+                self._dirty.add(group_name)
+            if stale:
+                self._stale[group_name] = stale
+            else:
+                self._stale.pop(group_name, None)
+
+            if group_name not in self._dirty and now - self._synced_at.get(group_name, 0) < ttl / 3:
+                continue
+
+            updates = {
+                user_id: (int(entry[1] + ttl), entry[2]) for user_id, entry in users.items() if user_id not in stale
+            }
+            removals = self._removed.pop(group_name, set()) | stale
+            if not users:
+                self._local.pop(group_name, None)
+                self._synced_at.pop(group_name, None)
+            else:
+                self._synced_at[group_name] = now
+
+            joined, left = await sync_to_async(self.backend.sync)(group_name, worker_id(), updates, removals, now)
+            self._dirty.discard(group_name)
+
+            if joined or left:
+                await apublish([group_name], {
+                    'type': 'presence_update',
+                    'project_id': self.project_id(group_name),
+                    'joined': joined,
+                    'left': left,
+                })
+
+
+def get_backend():
+    backend = getattr(settings, 'PRESENCE_BACKEND', 'local')
+    if backend == 'cache':
+        return CachePresenceBackend()
+    return LocalPresenceBackend()
+
+
+tracker = PresenceTracker(get_backend())
@@ -0,0 +1,39 @@
+"""
+محوّل ومحلل JSON لواجهة REST باستخدام المرمّز المشترك (json_codec)
+"""
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from . import json_codec
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    مثل JSONRenderer لكن بالمرمّز الأسرع؛ طلبات المسافات البادئة (indent) تُعالج بالمحوّل الأصلي
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if self.get_indent(accepted_media_type, renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+        # نفس تهريب DRF للفواصل التي تكسر JavaScript عند تضمين JSON في الصفحات
+        return json_codec.dumps(data).replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+
+
+class FastJSONParser(JSONParser):
+    """
+    مثل JSONParser لكن بالمرمّز الأسرع
+    """
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', 'utf-8')
+        try:
+            data = stream.read() if stream is not None else b''
+            if encoding.lower().replace('-', '') != 'utf8':
+                data = data.decode(encoding)
+            return json_codec.loads(data)
+        except ValueError as exc:
+            raise ParseError(f'JSON parse error - {str(exc)}')
@@ -1,8 +1,12 @@
 from django.urls import re_path
 from . import consumers
 from . import organization_consumer
+from . import ws_consumers
 
 websocket_urlpatterns = [
+    # مسار WebSocket العام للمستخدم (تستخدمه الواجهة الأمامية)
+    re_path(r'^ws/$', ws_consumers.AuthWebsocketConsumer.as_asgi()),
+
     # مسار WebSocket للمشاريع
     re_path(r'ws/projects/(?P<project_id>\w+)/$', consumers.TaskConsumer.as_asgi()),
     
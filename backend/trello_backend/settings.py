@@ -2,7 +2,7 @@ import os
 from pathlib import Path
 import dj_database_url
 from dotenv import load_dotenv
-from decouple import config
+from decouple import config, Csv
 import dj_database_url
 
 load_dotenv()  # لتحميل متغيرات .env
@@ -63,6 +63,10 @@ INSTALLED_APPS = [
     'users.apps.UsersConfig',
     'projects',
     'tasks',
+    'activity',
+    'jobs',
+    'attachments',
+    'trello_backend',
 ]
 
 MIDDLEWARE = [
@@ -75,6 +79,7 @@ MIDDLEWARE = [
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'projects.middleware.ProjectErrorMiddleware',  # وسيط معالجة الأخطاء الخاص بنا
+    'activity.middleware.ActivityBatchMiddleware',  # كتابة أحداث النشاط دفعة واحدة لكل طلب
     
 ]
 
@@ -114,12 +119,144 @@ TEMPLATES = [
 # }
 
 
+# إعادة استخدام اتصالات قاعدة البيانات
+# مدة إبقاء الاتصال مفتوحاً بين الطلبات (بالثواني)، 0 لإغلاقه بعد كل طلب
+# ملاحظة: خادم ASGI يشغّل كل طلب في خيط جديد، لذلك asgi.py يجعل القيمة الافتراضية 0 ويُفضّل تفعيل DB_POOL
+DB_CONN_MAX_AGE = config('DB_CONN_MAX_AGE', default=60, cast=int)
+# التحقق من صلاحية الاتصال المحفوظ قبل إعادة استخدامه في طلب جديد
+DB_CONN_HEALTH_CHECKS = config('DB_CONN_HEALTH_CHECKS', default=True, cast=bool)
+# تجمع اتصالات داخل كل عملية (PostgreSQL فقط)
+DB_POOL = config('DB_POOL', default=False, cast=bool)
+# الحد الأقصى للتجمع؛ افتراضياً بعدد خيوط منفذ ASGI (نفس القيمة الافتراضية في asgiref)
+DB_POOL_MAX_SIZE = config(
+    'DB_POOL_MAX_SIZE',
+    default=config('ASGI_THREADS', default=min(32, (os.cpu_count() or 1) + 4), cast=int),
+    cast=int
+)
+# عدد الاتصالات التي تُفتح عند إنشاء التجمع (الباقي يُفتح عند الحاجة)
+DB_POOL_MIN_SIZE = config('DB_POOL_MIN_SIZE', default=2, cast=int)
+# عدد الاتصالات الخاملة المحتفظ بها (الزائد عنها يُغلق عند إعادته)؛ افتراضياً حجم التجمع كاملاً
+DB_POOL_MAX_IDLE = config('DB_POOL_MAX_IDLE', default=DB_POOL_MAX_SIZE, cast=int)
+# مدة انتظار اتصال متاح عند امتلاء التجمع (بالثواني)
+DB_POOL_TIMEOUT = config('DB_POOL_TIMEOUT', default=10, cast=float)
+
 DATABASES = {
     'default': dj_database_url.config(
-        default=os.environ.get('DATABASE_URL')
+        default=os.environ.get('DATABASE_URL'),
+        conn_max_age=DB_CONN_MAX_AGE,
+        conn_health_checks=DB_CONN_HEALTH_CHECKS,
     )
 }
 
+
+# النسخ المقروءة (Read Replicas): روابط مفصولة بفواصل، القراءة توزع عليها والكتابة على الرئيسية
+# للتجربة محلياً: DATABASE_REPLICA_URLS=sqlite:////path/to/replica.sqlite3 (نسخة من ملف القاعدة الرئيسية)
+DATABASE_REPLICA_URLS = config('DATABASE_REPLICA_URLS', default='', cast=lambda value: [url.strip() for url in value.split(',') if url.strip()])
+# مدة توجيه قراءات العميل إلى القاعدة الرئيسية بعد آخر كتابة له (بالثواني)
+DATABASE_PRIMARY_PIN_SECONDS = config('DATABASE_PRIMARY_PIN_SECONDS', default=5, cast=int)
+
+DATABASE_REPLICAS = []
+for index, replica_url in enumerate(DATABASE_REPLICA_URLS, start=1):
+    alias = f'replica_{index}'
+    DATABASES[alias] = dj_database_url.parse(
+        replica_url,
+        conn_max_age=DB_CONN_MAX_AGE,
+        conn_health_checks=DB_CONN_HEALTH_CHECKS,
+        test_options={'MIRROR': 'default'},
+    )
+    DATABASE_REPLICAS.append(alias)
+
+if DATABASE_REPLICAS:
+    DATABASE_ROUTERS = ['trello_backend.db_router.ReplicaRouter']
+    MIDDLEWARE.insert(1, 'trello_backend.db_router.PrimaryPinMiddleware')
+
+if DB_POOL:
+    # التجمع يتولى إعادة استخدام الاتصالات، وDjango "يغلق" الاتصال بإعادته إلى التجمع بعد كل طلب
+    for database in DATABASES.values():
+        if database['ENGINE'] == 'django.db.backends.postgresql':
+            database.update({
+                'ENGINE': 'trello_backend.db_pool',
+                'CONN_MAX_AGE': 0,
+                'POOL': {
+                    'min_size': min(DB_POOL_MIN_SIZE, DB_POOL_MAX_SIZE),
+                    'max_size': DB_POOL_MAX_SIZE,
+                    'max_idle': DB_POOL_MAX_IDLE,
+                    'timeout': DB_POOL_TIMEOUT,
+                },
+            })
+
+# خدمة مسارات القراءة الأكثر استخداماً (المهام، المشاريع، المستخدم الحالي) بعروض غير متزامنة
+ASYNC_READ_VIEWS = config('ASYNC_READ_VIEWS', default=True, cast=bool)
+
+# أرشفة المهام المنجزة (أمر archive_done_tasks): عدد الأيام منذ آخر تعديل قبل الأرشفة
+TASK_ARCHIVE_AFTER_DAYS = config('TASK_ARCHIVE_AFTER_DAYS', default=30, cast=int)
+# ?due=soon في قوائم المهام: المهام التي يحين موعدها خلال هذا العدد من الساعات
+TASK_DUE_SOON_HOURS = config('TASK_DUE_SOON_HOURS', default=24, cast=int)
+
+# مجدول التذكيرات (أمر run_reminders): وقت التذكير قبل موعد الاستحقاق (بالدقائق)
+TASK_REMINDER_LEAD_MINUTES = config('TASK_REMINDER_LEAD_MINUTES', default=60, cast=int)
+# طول نافذة المواعيد القادمة المحملة في الذاكرة (بالثواني)، ويجب أن تكون أطول من فترة إعادة التحميل
+TASK_REMINDER_WINDOW_SECONDS = config('TASK_REMINDER_WINDOW_SECONDS', default=300, cast=int)
+# الفاصل بين إعادة تحميل النافذة (بالثواني)، وهو أقصى تأخير لتذكير موعد أُضيف أو عُدل للتو
+TASK_REMINDER_REFRESH_SECONDS = config('TASK_REMINDER_REFRESH_SECONDS', default=30, cast=int)
+# التذكيرات الفائتة أثناء توقف المجدول تُرسل عند عودته إذا لم يمض على وقتها أكثر من هذه المدة (بالدقائق)
+TASK_REMINDER_GRACE_MINUTES = config('TASK_REMINDER_GRACE_MINUTES', default=60, cast=int)
+
+# طابور المهام الخلفية (تطبيق jobs) للآثار الجانبية مثل بث WebSocket
+# معطل افتراضياً: المهام تُنفذ بعد نجاح المعاملة داخل الطلب نفسه
+# عند تفعيله تُحفظ في قاعدة البيانات وينفذها manage.py run_workers (سطر worker في Procfile)
+JOBS_ENABLED = config('JOBS_ENABLED', default=False, cast=bool)
+# عدد عمليات العمال في run_workers
+JOBS_CONCURRENCY = config('JOBS_CONCURRENCY', default=2, cast=int)
+# مدة انتظار العامل (بالثواني) قبل البحث عن مهام جديدة عند فراغ الطابور
+JOBS_POLL_INTERVAL = config('JOBS_POLL_INTERVAL', default=1.0, cast=float)
+# عدد المحاولات قبل اعتبار المهمة فاشلة، والتأخير الأساسي والأقصى بين المحاولات (بالثواني، يتضاعف مع كل محاولة)
+JOBS_MAX_ATTEMPTS = config('JOBS_MAX_ATTEMPTS', default=5, cast=int)
+JOBS_RETRY_BACKOFF = config('JOBS_RETRY_BACKOFF', default=2, cast=float)
+JOBS_RETRY_MAX_DELAY = config('JOBS_RETRY_MAX_DELAY', default=600, cast=float)
+# المهمة الجارية لأطول من هذه المدة (بالثواني) تُعتبر عالقة وتُعاد للانتظار
+JOBS_LOCK_TIMEOUT = config('JOBS_LOCK_TIMEOUT', default=300, cast=int)
+# مدة الاحتفاظ بالمهام المنتهية (بالساعات) قبل حذفها
+JOBS_KEEP_FINISHED_HOURS = config('JOBS_KEEP_FINISHED_HOURS', default=24, cast=int)
+
+# سجل النشاط (تطبيق activity): جداول مقسمة حسب الشهر
+# عدد الأحداث المجمعة في الطلب الواحد قبل كتابتها مبكراً
+ACTIVITY_BATCH_SIZE = config('ACTIVITY_BATCH_SIZE', default=500, cast=int)
+# عدد الأشهر المحتفظ بها (بما فيها الشهر الحالي)؛ الأقدم تُحذف أقسامها بأمر maintain_activity_partitions
+ACTIVITY_RETENTION_MONTHS = config('ACTIVITY_RETENTION_MONTHS', default=12, cast=int)
+# عدد الأشهر القادمة التي تُنشأ أقسامها مسبقاً
+ACTIVITY_PARTITIONS_AHEAD = config('ACTIVITY_PARTITIONS_AHEAD', default=2, cast=int)
+
+# ضغط الاستجابات (brotli عند تثبيت مكتبته، وإلا gzip) حسب ترويسة Accept-Encoding
+# يمكن إيقافه عند تولي الخادم الوسيط (nginx) للضغط
+COMPRESSION_ENABLED = config('COMPRESSION_ENABLED', default=True, cast=bool)
+# أقل حجم للاستجابة (بالبايت) قبل ضغطها؛ الاستجابات الصغيرة لا تستفيد بقدر تكلفة الضغط
+COMPRESSION_MIN_SIZE = config('COMPRESSION_MIN_SIZE', default=1024, cast=int)
+# الترميزات المسموحة بترتيب التفضيل عند تساوي قبول العميل لها
+COMPRESSION_ENCODINGS = config('COMPRESSION_ENCODINGS', default='br,gzip', cast=Csv())
+COMPRESSION_GZIP_LEVEL = config('COMPRESSION_GZIP_LEVEL', default=6, cast=int)
+COMPRESSION_BROTLI_QUALITY = config('COMPRESSION_BROTLI_QUALITY', default=5, cast=int)
+
+if COMPRESSION_ENABLED:
+    # بعد SecurityMiddleware مباشرة حتى يُضغط المحتوى النهائي للاستجابة
+    MIDDLEWARE.insert(1, 'trello_backend.compression.CompressionMiddleware')
+
+# مرفقات المهام (تطبيق attachments)
+# صنف المخزن؛ المخزن المحلي يحفظ الملفات تحت ATTACHMENTS_ROOT
+ATTACHMENTS_STORAGE = config('ATTACHMENTS_STORAGE', default='attachments.storage.LocalAttachmentStorage')
+ATTACHMENTS_ROOT = config('ATTACHMENTS_ROOT', default=os.path.join(BASE_DIR, 'media', 'attachments'))
+# الحد الأقصى لحجم المرفق ولحجم الجزء في كل طلب رفع (بالبايت)
+ATTACHMENTS_MAX_SIZE = config('ATTACHMENTS_MAX_SIZE', default=100 * 1024 * 1024, cast=int)
+ATTACHMENTS_MAX_CHUNK_SIZE = config('ATTACHMENTS_MAX_CHUNK_SIZE', default=8 * 1024 * 1024, cast=int)
+# حجم الكتلة عند الكتابة إلى المخزن والقراءة منه أثناء التنزيل (بالبايت)
+ATTACHMENTS_STREAM_BLOCK_SIZE = config('ATTACHMENTS_STREAM_BLOCK_SIZE', default=64 * 1024, cast=int)
+# تسليم التنزيل للخادم الوسيط: فارغ (يرسله Django)، x-accel-redirect (nginx)، أو x-sendfile (Apache/lighttpd)
+ATTACHMENTS_SENDFILE = config('ATTACHMENTS_SENDFILE', default='')
+# المسار الداخلي في nginx (location internal) الذي يشير إلى ATTACHMENTS_ROOT
+ATTACHMENTS_ACCEL_PREFIX = config('ATTACHMENTS_ACCEL_PREFIX', default='/protected-attachments/')
+# الرفعات غير المكتملة تُحذف بعد هذه المدة (أمر purge_stale_uploads)
+ATTACHMENTS_UPLOAD_EXPIRE_HOURS = config('ATTACHMENTS_UPLOAD_EXPIRE_HOURS', default=24, cast=int)
+
 # Default primary key field type
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
@@ -142,8 +279,44 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
     ),
+    'DEFAULT_RENDERER_CLASSES': (
+        'trello_backend.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
+    'DEFAULT_PARSER_CLASSES': (
+        'trello_backend.renderers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ),
+    # حدود الطلبات بدلو الرموز لكل مستخدم ومؤسسة وفئة مسار (trello_backend/throttling.py)
+    'DEFAULT_THROTTLE_CLASSES': (
+        'trello_backend.throttling.TokenBucketThrottle',
+    ),
+}
+
+# حدود الطلبات: 'N/فترة' (s/min/hour/day) تعني دلواً سعته N يُملأ بمعدل N لكل فترة، وقيمة فارغة تلغي الحد
+# الفئات: read للقراءة، write للكتابة، bulk للعمليات المجمعة الثقيلة، search لطلبات البحث
+THROTTLE_ENABLED = config('THROTTLE_ENABLED', default=True, cast=bool)
+# عدد الخوادم الوسيطة الموثوقة أمام التطبيق؛ 0 يعني تجاهل X-Forwarded-For واستخدام REMOTE_ADDR لحد الزوار
+THROTTLE_NUM_PROXIES = config('THROTTLE_NUM_PROXIES', default=0, cast=int)
+THROTTLE_RATES = {
+    'anon': config('THROTTLE_ANON', default='30/min'),
+    'user:read': config('THROTTLE_USER_READ', default='300/min'),
+    'user:write': config('THROTTLE_USER_WRITE', default='60/min'),
+    'user:bulk': config('THROTTLE_USER_BULK', default='10/min'),
+    'user:search': config('THROTTLE_USER_SEARCH', default='60/min'),
+    'org:read': config('THROTTLE_ORG_READ', default='3000/min'),
+    'org:write': config('THROTTLE_ORG_WRITE', default='600/min'),
+    'org:bulk': config('THROTTLE_ORG_BULK', default='60/min'),
+    'org:search': config('THROTTLE_ORG_SEARCH', default='600/min'),
+    # رسائل العميل عبر WebSocket لكل اتصال، وأحداث العميل العابرة التي تُبث لباقي أعضاء المجموعة (الكتابة والسحب)
+    'ws': config('THROTTLE_WS', default='10/s'),
+    'ws:broadcast': config('THROTTLE_WS_BROADCAST', default='5/s'),
 }
 
+# مرمّز JSON للواجهة البرمجية وWebSocket: 'auto' (orjson إن وجد) أو 'orjson' أو 'json'
+JSON_CODEC = config('JSON_CODEC', default='auto')
+
 # JWT settings
 from datetime import timedelta
 
@@ -208,6 +381,13 @@ CORS_ALLOW_HEADERS = [
     'access-control-allow-origin',
     'access-control-allow-headers',
     'access-control-allow-methods',
+    'x-db-primary-pin',
+]
+
+# ترويسات الاستجابة التي يمكن للواجهة الأمامية قراءتها
+CORS_EXPOSE_HEADERS = [
+    'x-db-primary-pin',
+    'retry-after',
 ]
 
 # Channels settings
@@ -218,4 +398,60 @@ CHANNEL_LAYERS = {
     },
 }
 
-
+# ذاكرة التخزين المؤقت المشتركة (Redis عند تحديد REDIS_URL، وإلا ذاكرة محلية للتطوير)
+REDIS_URL = config('REDIS_URL', default='')
+
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+# مصادقة WebSocket عبر JWT
+# عدد الرموز التي تم التحقق من توقيعها والمحفوظة في ذاكرة كل عملية
+WS_TOKEN_CACHE_SIZE = config('WS_TOKEN_CACHE_SIZE', default=10000, cast=int)
+# مدة بقاء بيانات المستخدم في الذاكرة المشتركة (بالثواني)
+WS_PRINCIPAL_CACHE_TIMEOUT = config('WS_PRINCIPAL_CACHE_TIMEOUT', default=300, cast=int)
+
+# اشتراكات WebSocket المتعددة عبر اتصال واحد
+# الحد الأقصى لعدد المجموعات (مشاريع ومؤسسات) لكل اتصال
+WS_MAX_SUBSCRIPTIONS = config('WS_MAX_SUBSCRIPTIONS', default=100, cast=int)
+# مدة بقاء خريطة (المشروع -> المؤسسة) في الذاكرة المشتركة (بالثواني)
+ACCESS_MAP_CACHE_TIMEOUT = config('ACCESS_MAP_CACHE_TIMEOUT', default=600, cast=int)
+# مدة بقاء عناوين المشاريع المستخدمة في صندوق "مهامي" (بالثواني)؛ تعديل المشروع يحذف عنوانه فوراً
+INBOX_PROJECT_TITLE_CACHE_TIMEOUT = config('INBOX_PROJECT_TITLE_CACHE_TIMEOUT', default=3600, cast=int)
+# مدة بقاء أعداد التصنيفات لكل مشروع (بالثواني)؛ تغيير تصنيفات المهام يحذفها فوراً
+LABEL_COUNTS_CACHE_TIMEOUT = config('LABEL_COUNTS_CACHE_TIMEOUT', default=600, cast=int)
+# نسخة محلية من الخريطة داخل كل عملية (LRU): عدد المدخلات ومدة بقائها (بالثواني)
+# الحفظ والحذف يحذفان المدخل فوراً في نفس العملية، وباقي العمليات تتحدث بعد انتهاء المدة
+ACCESS_MAP_LOCAL_SIZE = config('ACCESS_MAP_LOCAL_SIZE', default=10000, cast=int)
+ACCESS_MAP_LOCAL_TIMEOUT = config('ACCESS_MAP_LOCAL_TIMEOUT', default=60, cast=int)
+
+# ترميز رسائل WebSocket (JSON أو MessagePack حسب اختيار العميل)
+# عدد الإطارات المرمزة المحفوظة لإعادة استخدامها عند بث نفس الحدث لعدة اتصالات
+WS_FRAME_CACHE_SIZE = config('WS_FRAME_CACHE_SIZE', default=512, cast=int)
+# الترميزات التي تُجهز إطاراتها مرة واحدة عند نشر الحدث (مفصولة بفواصل)
+# الترميزات غير المذكورة تُرمز عند أول اتصال يحتاجها في كل عملية؛ تُضاف msgpack عندما يستخدمها أغلب العملاء
+WS_PUBLISH_ENCODINGS = config('WS_PUBLISH_ENCODINGS', default='json', cast=Csv())
+# ضغط رسائل WebSocket (permessage-deflate) عند عرض العميل له؛ يُفعّل في Daphne من asgi.py
+WS_PERMESSAGE_DEFLATE = config('WS_PERMESSAGE_DEFLATE', default=True, cast=bool)
+# الحد الأقصى لحجم رسالة العميل عبر WebSocket (بالبايت)؛ الأكبر تُرفض قبل فك ترميزها
+WS_MAX_MESSAGE_BYTES = config('WS_MAX_MESSAGE_BYTES', default=4096, cast=int)
+# إغلاق اتصال WebSocket بعد هذا العدد من الرسائل المرفوضة المتتالية لتجاوز الحد (THROTTLE_RATES['ws'])
+WS_RATE_LIMIT_CLOSE_AFTER = config('WS_RATE_LIMIT_CLOSE_AFTER', default=100, cast=int)
+
+# تتبع تواجد المستخدمين في لوحات المشاريع
+# 'cache' لمشاركة التواجد بين عدة عمال ASGI عبر Redis، و'local' لعامل واحد
+PRESENCE_BACKEND = config('PRESENCE_BACKEND', default='cache' if REDIS_URL else 'local')
+# مدة صلاحية آخر نبضة للمستخدم (بالثواني)
+PRESENCE_TTL = config('PRESENCE_TTL', default=60, cast=int)
+# أقل فترة بين رسائل فروقات التواجد لكل مشروع (بالثواني)
+PRESENCE_BROADCAST_INTERVAL = config('PRESENCE_BROADCAST_INTERVAL', default=2, cast=float)
@@ -0,0 +1,293 @@
+import importlib.util
+import json
+import time
+from unittest import mock, skipUnless
+
+from channels.testing import WebsocketCommunicator
+from django.core import signing
+from django.core.cache import cache, caches
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+
+from jobs.models import Job
+from organizations.models import Organization
+from trello_backend import broadcast, db_router, jwt_auth, presence, throttling, ws_codec, ws_consumers
+from users.models import User
+
+REDIS_CACHES = {'default': {'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': 'redis://localhost:6379/0'}}
+
+
+class FakeRedisClient:
+    """
+    عميل Redis وهمي يسجل استدعاءات سكربت دلو الرموز
+    """
+
+    def __init__(self):
+        self.calls = []
+
+    def register_script(self, source):
+        def script(keys, args, client):
+            self.calls.append((keys, args))
+            return b'0'
+        return script
+
+
+class TokenBucketRedisTests(SimpleTestCase):
+
+    def setUp(self):
+        throttling._script = None
+        self.addCleanup(setattr, throttling, '_script', None)
+
+    @override_settings(CACHES=REDIS_CACHES)
+    def test_redis_backend_uses_atomic_script(self):
+        client = FakeRedisClient()
+        backend = caches['default']
+        # خلفية Redis تنشئ عميلها عند أول استخدام؛ يُستبدل هنا دون الاتصال بخادم
+        backend.__dict__['_cache'] = mock.Mock(get_client=mock.Mock(return_value=client))
+        with mock.patch.object(throttling.cache, 'get') as cache_get:
+            wait = throttling.take('user:1:read', 10, 1.0)
+        self.assertEqual(wait, 0.0)
+        self.assertEqual(len(client.calls), 1)
+        self.assertEqual(client.calls[0][1], [10, 1.0, 1])
+        cache_get.assert_not_called()
+
+    def test_local_backend_falls_back(self):
+        self.assertIsNone(throttling._redis_client('key'))
+        self.assertEqual(throttling.take('user:2:read', 1, 1 / 60), 0.0)
+        self.assertGreater(throttling.take('user:2:read', 1, 1 / 60), 0)
+
+
+class ClientIpTests(SimpleTestCase):
+
+    def request(self, forwarded):
+        return RequestFactory().get('/', HTTP_X_FORWARDED_FOR=forwarded, REMOTE_ADDR='10.0.0.1')
+
+    @override_settings(THROTTLE_NUM_PROXIES=0)
+    def test_forwarded_header_ignored_without_proxies(self):
+        self.assertEqual(throttling.client_ip(self.request('1.2.3.4')), '10.0.0.1')
+
+    @override_settings(THROTTLE_NUM_PROXIES=1)
+    def test_forwarded_address_added_by_trusted_proxy(self):
+        # العنوان الأول يكتبه العميل، والأخير أضافه الخادم الوسيط
+        self.assertEqual(throttling.client_ip(self.request('1.2.3.4, 5.6.7.8')), '5.6.7.8')
+
+
+class PresenceTests(SimpleTestCase):
+    """
+    عاملان (متتبعان) يتشاركان مخزناً واحداً
+    """
+    group = 'project_1'
+
+    def setUp(self):
+        self.backend = presence.LocalPresenceBackend()
+        self.events = []
+        patcher = mock.patch.object(presence, 'apublish', side_effect=self.record_event)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    async def record_event(self, groups, event):
+        self.events.append(event)
+
+    def tracker(self, worker):
+        tracker = presence.PresenceTracker(self.backend)
+        tracker._ensure_running = lambda: None
+        return tracker, worker
+
+    async def flush(self, tracker_worker):
+        tracker, worker = tracker_worker
+        with mock.patch.object(presence, 'worker_id', return_value=worker):
+            await tracker.flush()
+
+    async def test_leave_on_one_worker_keeps_user_connected_elsewhere(self):
+        user = mock.Mock(id=7, username='sara')
+        a, b = self.tracker('a'), self.tracker('b')
+        a[0].join(self.group, user)
+        b[0].join(self.group, user)
+        await self.flush(a)
+        await self.flush(b)
+        a[0].leave(self.group, user)
+        await self.flush(a)
+        self.assertEqual([event['left'] for event in self.events], [[]])
+        self.assertEqual(await b[0].members(self.group), [{'id': 7, 'username': 'sara'}])
+
+    async def test_stale_connection_returns_on_heartbeat(self):
+        user = mock.Mock(id=7, username='sara')
+        a = self.tracker('a')
+        a[0].join(self.group, user)
+        await self.flush(a)
+        a[0]._local[self.group][user.id][1] -= presence._ttl()
+        await self.flush(a)
+        self.assertEqual(self.events[-1]['left'], [7])
+        a[0].heartbeat([self.group], user)
+        await self.flush(a)
+        self.assertEqual(self.events[-1]['joined'], [{'id': 7, 'username': 'sara'}])
+
+
+class PrimaryPinTests(SimpleTestCase):
+
+    def pinned_until(self, value):
+        return db_router.PrimaryPinMiddleware._pinned_until(
+            RequestFactory().get('/', **{'HTTP_X_DB_PRIMARY_PIN': value})
+        )
+
+    def test_unsigned_value_is_ignored(self):
+        self.assertEqual(self.pinned_until(str(time.time() + 10 ** 9)), 0)
+
+    @override_settings(DATABASE_PRIMARY_PIN_SECONDS=5)
+    def test_signed_value_is_capped(self):
+        value = signing.Signer(salt=db_router.PIN_SIGNING_SALT).sign(str(time.time() + 10 ** 9))
+        self.assertLessEqual(self.pinned_until(value), time.time() + 5)
+
+    @override_settings(DATABASE_REPLICAS=['replica_1'], DATABASE_PRIMARY_PIN_SECONDS=5)
+    def test_response_pin_routes_next_read_to_primary(self):
+        routed = []
+
+        def view(request):
+            routed.append(db_router.ReplicaRouter().db_for_read(Job))
+            return HttpResponse()
+
+        middleware = db_router.PrimaryPinMiddleware(view)
+        pin = middleware(RequestFactory().post('/api/tasks/'))[db_router.PIN_HEADER_NAME]
+        # الواجهة الأمامية تقرأ وقت الانتهاء من الجزء الأول من القيمة وتعيدها كما هي
+        self.assertGreater(float(pin.split(':')[0]), time.time())
+        middleware(RequestFactory().get('/api/tasks/', HTTP_X_DB_PRIMARY_PIN=pin))
+        middleware(RequestFactory().get('/api/tasks/'))
+        self.assertEqual(routed, ['default', 'default', 'replica_1'])
+
+
+class PublishLaterTests(TestCase):
+
+    @override_settings(JOBS_ENABLED=True)
+    def test_event_id_is_fixed_before_enqueue(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            broadcast.publish_later(['project_1'], {'type': 'task_update', 'task': {'id': 1}})
+        event = Job.objects.get(name='broadcast.publish').payload['event']
+        self.assertTrue(event['event_id'])
+
+        # إعادة المحاولة ترسل الحدث بنفس المعرف
+        sent = []
+        layer = mock.Mock(group_send=mock.AsyncMock(side_effect=lambda group, message: sent.append(message['event_id'])))
+        with mock.patch.object(broadcast, 'get_channel_layer', return_value=layer):
+            broadcast.publish(['project_1'], event)
+            broadcast.publish(['project_1'], event)
+        self.assertEqual(sent, [event['event_id']] * 2)
+
+
+class WebsocketMessageTests(SimpleTestCase):
+
+    async def connect(self):
+        communicator = WebsocketCommunicator(ws_consumers.AuthWebsocketConsumer.as_asgi(), '/ws/')
+        communicator.scope['user'] = mock.Mock(id=1, username='sara', is_anonymous=False)
+        connected, _ = await communicator.connect()
+        self.assertTrue(connected)
+        self.assertEqual((await communicator.receive_json_from())['type'], 'connection_established')
+        return communicator
+
+    async def assert_still_open(self, communicator):
+        await communicator.send_json_to({'type': 'ping', 'timestamp': 1})
+        self.assertEqual(await communicator.receive_json_from(), {'type': 'pong', 'timestamp': 1})
+
+    async def test_subscribe_with_non_list_targets(self):
+        communicator = await self.connect()
+        for content in ({'project_ids': 5}, {'project_ids': '12'}, {'organization_slugs': 'org'}):
+            await communicator.send_json_to(dict(content, type='subscribe'))
+            reply = await communicator.receive_json_from()
+            self.assertEqual((reply['type'], reply['code']), ('error', 'invalid_event'))
+        await self.assert_still_open(communicator)
+        await communicator.disconnect()
+
+    async def test_malformed_messages(self):
+        communicator = await self.connect()
+        for frame in ({'text_data': '{not json'}, {'text_data': '[1, 2]'}, {'bytes_data': b'\xc1'}, {'bytes_data': b'\x92\x01'}):
+            await communicator.send_to(**frame)
+            reply = await communicator.receive_json_from()
+            self.assertEqual((reply['type'], reply['code']), ('error', 'invalid_message'))
+        await self.assert_still_open(communicator)
+        await communicator.disconnect()
+
+
+class FrameEncodingTests(SimpleTestCase):
+
+    def test_msgpack_frame_encoded_on_demand(self):
+        event = ws_codec.prepare_event({'type': 'task_update', 'event_id': 'e1', 'task': {'id': 1}})
+        self.assertEqual(list(event['frames']), ['json'])
+        frame = ws_codec.FrameCache(8).encode_event(event, ws_codec.MSGPACK)
+        self.assertEqual(ws_codec.decode(frame, ws_codec.MSGPACK), {'type': 'task_update', 'task': {'id': 1}})
+
+
+class FakeConnectionPool:
+    """
+    بديل ThreadedConnectionPool: الاتصالات الخاملة في قائمة، والاتصال الجديد سليم
+    """
+
+    def __init__(self, minconn, maxconn, **conn_params):
+        self.minconn = minconn
+        self.idle = []
+        self.discarded = []
+
+    def getconn(self):
+        if self.idle:
+            return self.idle.pop()
+        return mock.Mock(closed=0, info=mock.Mock(transaction_status=0))
+
+    def putconn(self, connection, close=False):
+        (self.discarded if close else self.idle).append(connection)
+
+
+@skipUnless(importlib.util.find_spec('psycopg2'), 'يتطلب psycopg2')
+class ConnectionPoolTests(SimpleTestCase):
+
+    def pool(self, **options):
+        from trello_backend.db_pool import base
+        with mock.patch.object(base, 'ThreadedConnectionPool', FakeConnectionPool):
+            return base.ConnectionPool({}, **options)
+
+    def test_idle_limit_is_separate_from_min_size(self):
+        pool = self.pool(min_size=2, max_size=10)
+        self.assertEqual(pool._pool.minconn, 10)
+
+    def test_skips_every_broken_idle_connection(self):
+        pool = self.pool(min_size=1, max_size=3)
+        stale = [mock.Mock(closed=1), mock.Mock(closed=1)]
+        pool._pool.idle.extend(stale)
+        connection = pool.getconn()
+        self.assertEqual(connection.closed, 0)
+        self.assertEqual(pool._pool.discarded, stale[::-1])
+
+
+class PrincipalCacheTests(TestCase):
+
+    def setUp(self):
+        self.organization = Organization.objects.create(name='Acme', slug='acme')
+        self.user = User.objects.create_user('sara', 'sara@example.com', 'secret', organization=self.organization)
+        cache.delete(jwt_auth.principal_cache_key(self.user.id))
+
+    async def test_cache_holds_fields_without_password(self):
+        principal = await jwt_auth.get_principal(self.user.id)
+        cached = cache.get(jwt_auth.principal_cache_key(self.user.id))
+        self.assertIsInstance(cached, dict)
+        self.assertNotIn('password', cached)
+        self.assertEqual((principal.id, principal.organization_id), (self.user.id, self.organization.id))
+        self.assertEqual(principal.organization.slug, 'acme')
+        self.assertFalse(principal._state.adding)
+
+    async def test_organization_change_invalidates_principal(self):
+        await jwt_auth.get_principal(self.user.id)
+        self.organization.slug = 'acme-co'
+        # التحديث المباشر لا يطلق الإشارات فتبقى النسخة المخزنة كما هي
+        await Organization.objects.filter(id=self.organization.id).aupdate(slug='acme-co')
+        self.assertEqual((await jwt_auth.get_principal(self.user.id)).organization.slug, 'acme')
+        # الحفظ عبر النموذج يطلق الإشارة التي تحذف النسخة المخزنة
+        await self.organization.asave()
+        self.assertEqual((await jwt_auth.get_principal(self.user.id)).organization.slug, 'acme-co')
+
+    def test_current_user_view_serializes_cached_principal(self):
+        from asgiref.sync import async_to_sync
+        from rest_framework_simplejwt.tokens import AccessToken
+        from users.views import CurrentUserAsyncView
+        token = str(AccessToken.for_user(self.user))
+        request = RequestFactory().get('/api/users/me/', HTTP_AUTHORIZATION=f'Bearer {token}')
+        response = async_to_sync(CurrentUserAsyncView.as_view())(request)
+        self.assertEqual(response.status_code, 200)
+        self.assertIsInstance(cache.get(jwt_auth.principal_cache_key(self.user.id)), dict)
+        self.assertEqual(json.loads(response.content)['organization_detail']['slug'], 'acme')
@@ -0,0 +1,223 @@
+"""
+تحديد معدل الطلبات بخوارزمية دلو الرموز (Token Bucket)
+- لكل مفتاح دلو سعته N رمزاً يُملأ بمعدل N لكل فترة، وكل طلب يستهلك رمزاً:
+  تُقبل الدفعات القصيرة حتى السعة ويُحد المعدل المستمر
+- الحدود لكل مستخدم ولكل مؤسسة ولكل فئة مسار: read / write / bulk / search (THROTTLE_RATES)
+- حالة الدلاء مشتركة بين العمليات في ذاكرة التخزين المؤقت: مع Redis بسكربت Lua ذري،
+  ومع غيره بقراءة وكتابة عادية (الذاكرة المحلية تعني حدوداً لكل عملية على حدة)
+- الطلب المرفوض يعاد بحالة 429 مع ترويسة Retry-After
+- رسائل WebSocket تُحد لكل اتصال بدلو في ذاكرة المستهلك نفسه (RateLimitedConsumerMixin)
+"""
+import math
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.throttling import BaseThrottle
+
+PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+# الحالة: {tokens, ts}؛ وقت Redis نفسه يُستخدم حتى لا يؤثر اختلاف ساعات الخوادم
+TAKE_SCRIPT = """
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local tokens = tonumber(state[1]) or capacity
+local ts = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+local wait = 0
+if tokens >= cost then
+    tokens = tokens - cost
+else
+    wait = (cost - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 1)
+return tostring(wait)
+"""
+
+_script = None
+_lock = threading.Lock()
+
+
+def parse_rate(rate):
+    """
+    '120/min' -> (السعة 120، معدل الملء بالرموز في الثانية)؛ None يلغي الحد
+    """
+    if not rate:
+        return None
+    count, _, period = rate.partition('/')
+    seconds = PERIODS[period.strip()[0]]
+    capacity = int(count)
+    return capacity, capacity / seconds
+
+
+def refill(tokens, ts, now, capacity, rate, cost=1):
+    """
+    حساب حالة الدلو بعد الملء ومحاولة استهلاك cost؛ يعيد (الرموز، مدة الانتظار أو 0)
+    """
+    tokens = min(capacity, tokens + max(0.0, now - ts) * rate)
+    if tokens >= cost:
+        return tokens - cost, 0.0
+    return tokens, (cost - tokens) / rate
+
+
+def _redis_client(key):
+    from django.core.cache.backends.redis import RedisCache
+    # cache وكيل (ConnectionProxy) للخلفية الفعلية، فيُفحص نوع الخلفية من caches
+    backend = caches['default']
+    if not isinstance(backend, RedisCache):
+        return None
+    return backend._cache.get_client(key, write=True)
+
+
+def take(key, capacity, rate, cost=1):
+    """
+    استهلاك cost من دلو المفتاح؛ يعيد 0 عند القبول أو مدة الانتظار بالثواني عند الرفض
+    """
+    global _script
+    cache_key = cache.make_and_validate_key(f'throttle:{key}')
+    client = _redis_client(cache_key)
+    if client is not None:
+        if _script is None:
+            _script = client.register_script(TAKE_SCRIPT)
+        return float(_script(keys=[cache_key], args=[capacity, rate, cost], client=client))
+
+    timeout = math.ceil(capacity / rate) + 1
+    with _lock:
+        now = time.time()
+        tokens, ts = cache.get(f'throttle:{key}') or (capacity, now)
+        tokens, wait = refill(tokens, ts, now, capacity, rate, cost)
+        cache.set(f'throttle:{key}', (tokens, now), timeout)
+    return wait
+
+
+def endpoint_scope(request, view=None):
+    """
+    فئة المسار: throttle_scope المعرف في العرض، وإلا search لطلبات القراءة مع ?search،
+    وread لباقي القراءة وwrite للكتابة
+    """
+    scope = getattr(view, 'throttle_scope', None)
+    if scope:
+        return scope
+    if request.method in SAFE_METHODS:
+        return 'search' if request.GET.get('search') else 'read'
+    return 'write'
+
+
+def client_ip(request):
+    """
+    عنوان العميل لدلو الطلبات غير المصادقة
+    X-Forwarded-For يكتبه العميل نفسه، فلا يُعتمد إلا خلف THROTTLE_NUM_PROXIES خادماً وسيطاً موثوقاً،
+    ويُؤخذ العنوان الذي أضافه أبعدها (وليس أول عنوان في الترويسة)
+    """
+    num_proxies = getattr(settings, 'THROTTLE_NUM_PROXIES', 0)
+    forwarded = request.META.get('HTTP_X_FORWARDED_FOR')
+    if num_proxies and forwarded:
+        addresses = [address.strip() for address in forwarded.split(',') if address.strip()]
+        if addresses:
+            return addresses[-min(num_proxies, len(addresses))]
+    return request.META.get('REMOTE_ADDR', '')
+
+
+def check_request(request, user, scope):
+    """
+    التحقق من حدود المستخدم ثم مؤسسته لفئة المسار؛ يعيد None عند القبول أو مدة الانتظار
+    دلو المؤسسة لا يُستهلك إذا رُفض الطلب بحد المستخدم
+    """
+    if not getattr(settings, 'THROTTLE_ENABLED', True):
+        return None
+    rates = getattr(settings, 'THROTTLE_RATES', {})
+
+    if user is None or not user.is_authenticated:
+        buckets = [(f'anon:{client_ip(request)}', rates.get('anon'))]
+    else:
+        buckets = [(f'user:{user.id}:{scope}', rates.get(f'user:{scope}'))]
+        if user.organization_id:
+            buckets.append((f'org:{user.organization_id}:{scope}', rates.get(f'org:{scope}')))
+
+    for key, rate in buckets:
+        parsed = parse_rate(rate)
+        if parsed is None:
+            continue
+        try:
+            wait = take(key, *parsed)
+        except Exception as e:
+            # تعطل ذاكرة التخزين المؤقت لا يوقف الخدمة
+            print(f"WARNING: خطأ في التحقق من حد الطلبات: {str(e)}")
+            return None
+        if wait:
+            return wait
+    return None
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """
+    حد الطلبات لعروض DRF (المستخدم والمؤسسة وفئة المسار)
+    """
+
+    def allow_request(self, request, view):
+        self.retry_after = check_request(request, request.user, endpoint_scope(request, view))
+        return self.retry_after is None
+
+    def wait(self):
+        # DRF يكتب Retry-After كعدد صحيح مقرباً للأسفل، فيُقرب هنا للأعلى
+        return math.ceil(self.retry_after) if self.retry_after else None
+
+
+class ConnectionRateLimiter:
+    """
+    دلو رموز محلي لاتصال واحد (لا يحتاج قفلاً لأن رسائل المستهلك تُعالج بالتتابع)
+    """
+
+    def __init__(self, rate):
+        self.capacity, self.rate = parse_rate(rate)
+        self.tokens = self.capacity
+        self.ts = time.monotonic()
+
+    def take(self, cost=1):
+        now = time.monotonic()
+        self.tokens, wait = refill(self.tokens, self.ts, now, self.capacity, self.rate, cost)
+        self.ts = now
+        return wait
+
+
+class RateLimitedConsumerMixin:
+    """
+    حد رسائل العميل لكل اتصال WebSocket
+    receive_json يستدعي allow_message() قبل معالجة الرسالة؛ الرسائل الزائدة تُهمل مع إشعار العميل مرة واحدة،
+    ويُغلق الاتصال إذا استمر العميل في الإرسال بعد WS_RATE_LIMIT_CLOSE_AFTER رسالة مرفوضة متتالية
+    """
+    # رمز إغلاق WebSocket عند تجاوز الحد باستمرار (مجال الرموز الخاصة بالتطبيق 4000-4999)
+    RATE_LIMIT_CLOSE_CODE = 4008
+
+    async def allow_message(self, scope='ws'):
+        rate = getattr(settings, 'THROTTLE_RATES', {}).get(scope)
+        if not getattr(settings, 'THROTTLE_ENABLED', True) or not rate:
+            return True
+
+        limiters = self.__dict__.setdefault('_rate_limiters', {})
+        rejected = self.__dict__.setdefault('_rejected_messages', {})
+        if scope not in limiters:
+            limiters[scope] = ConnectionRateLimiter(rate)
+        wait = limiters[scope].take()
+        if not wait:
+            rejected[scope] = 0
+            return True
+
+        rejected[scope] = rejected.get(scope, 0) + 1
+        if rejected[scope] == 1:
+            await self.send_json({
+                'type': 'error',
+                'code': 'rate_limited',
+                'message': 'تم تجاوز الحد المسموح من الرسائل',
+                'retry_after': math.ceil(wait),
+            })
+        elif rejected[scope] >= getattr(settings, 'WS_RATE_LIMIT_CLOSE_AFTER', 100):
+            await self.close(code=self.RATE_LIMIT_CLOSE_CODE)
+        return False
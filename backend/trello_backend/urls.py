@@ -20,9 +20,12 @@ from django.http import JsonResponse
 from rest_framework.routers import DefaultRouter
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 from organizations.views import OrganizationViewSet, PublicOrganizationsView
-from users.views import UserViewSet, SignupView, current_user
-from projects.views import ProjectViewSet
-from tasks.views import TaskViewSet, TaskCommentViewSet
+from django.conf import settings
+from users.views import UserViewSet, SignupView, current_user, CurrentUserAsyncView
+from projects.views import ProjectViewSet, ProjectListAsyncView, ProjectTasksAsyncView
+from tasks.views import TaskViewSet, TaskCommentViewSet, TaskListAsyncView, TaskDetailAsyncView, InboxViewSet, LabelViewSet, ChecklistItemViewSet
+from activity.views import ActivityFeedViewSet
+from attachments.views import AttachmentViewSet
 
 # إنشاء موجه API
 router = DefaultRouter()
@@ -31,6 +34,11 @@ router.register(r'users', UserViewSet, basename='user')
 router.register(r'projects', ProjectViewSet, basename='project')
 router.register(r'tasks', TaskViewSet, basename='task')
 router.register(r'comments', TaskCommentViewSet, basename='comment')
+router.register(r'activity', ActivityFeedViewSet, basename='activity')
+router.register(r'inbox', InboxViewSet, basename='inbox')
+router.register(r'labels', LabelViewSet, basename='label')
+router.register(r'checklist-items', ChecklistItemViewSet, basename='checklist-item')
+router.register(r'attachments', AttachmentViewSet, basename='attachment')
 
 # صفحة ترحيب بسيطة
 def welcome(request):
@@ -54,9 +62,20 @@ urlpatterns = [
     path('api/login/', TokenObtainPairView.as_view(), name='token_obtain_pair'),
     path('api/token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
     path('api/signup/', SignupView.as_view(), name='signup'),
-    path('api/users/me/', current_user, name='current_user'),
+    path('api/users/me/', CurrentUserAsyncView.as_view() if settings.ASYNC_READ_VIEWS else current_user, name='current_user'),
     path('api/public/organizations/', PublicOrganizationsView.as_view(), name='public_organizations'),
-    
+]
+
+if settings.ASYNC_READ_VIEWS:
+    # مسارات القراءة غير المتزامنة تسبق مسارات الموجه؛ باقي الطرق تُحوّل منها إلى عروض DRF
+    urlpatterns += [
+        path('api/tasks/', TaskListAsyncView.as_view(), name='task-list-async'),
+        path('api/tasks/<str:pk>/', TaskDetailAsyncView.as_view(), name='task-detail-async'),
+        path('api/projects/', ProjectListAsyncView.as_view(), name='project-list-async'),
+        path('api/projects/<str:pk>/tasks/', ProjectTasksAsyncView.as_view(), name='project-tasks-async'),
+    ]
+
+urlpatterns += [
     # وجهات API للموارد
     path('api/', include(router.urls)),
 ]
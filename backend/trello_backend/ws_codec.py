@@ -0,0 +1,177 @@
+"""
+ترميز رسائل WebSocket: إطارات JSON نصية أو MessagePack ثنائية
+- العميل يختار الترميز عبر البروتوكول الفرعي (Sec-WebSocket-Protocol: msgpack)
+  أو معلمة الاستعلام ?encoding=msgpack؛ الافتراضي JSON
+- نفس مخطط الأحداث في الترميزين
+- الأحداث المبثوثة تُرمز مرة واحدة عند النشر (prepare_event) وتنتقل الإطارات الجاهزة
+  عبر طبقة القنوات، فيكتبها كل مستهلك كما هي دون إعادة ترميز
+- الأحداث بدون إطارات جاهزة تحمل event_id، وتُرمز مرة واحدة لكل ترميز في كل عملية
+"""
+from collections import OrderedDict
+from urllib.parse import parse_qs
+
+import msgpack
+from django.conf import settings
+
+from . import json_codec
+from .json_codec import CodecJsonConsumerMixin
+
+JSON = 'json'
+MSGPACK = 'msgpack'
+ENCODINGS = (JSON, MSGPACK)
+
+# مفاتيح داخلية في أحداث طبقة القنوات لا تُرسل إلى العميل
+# sender: قناة الاتصال الذي أرسل حدث العميل (ws_events) حتى لا يُعاد إليه
+INTERNAL_EVENT_KEYS = ('event_id', 'frames', 'sender')
+
+
+def publish_encodings():
+    """
+    الترميزات التي تُجهز إطاراتها عند النشر
+    """
+    return [encoding for encoding in getattr(settings, 'WS_PUBLISH_ENCODINGS', [JSON]) if encoding in ENCODINGS]
+
+
+def negotiate(scope):
+    """
+    تحديد ترميز الاتصال والبروتوكول الفرعي الذي يُقبل به
+    """
+    for subprotocol in scope.get('subprotocols') or []:
+        if subprotocol in ENCODINGS:
+            return subprotocol, subprotocol
+
+    query = parse_qs(scope.get('query_string', b'').decode('utf-8'))
+    encoding = query.get('encoding', [JSON])[0]
+    return (encoding if encoding in ENCODINGS else JSON), None
+
+
+def encode(content, encoding):
+    """
+    ترميز رسالة: نص لـ JSON وbytes لـ MessagePack
+    """
+    if encoding == MSGPACK:
+        return msgpack.packb(content, default=json_codec.default, use_bin_type=True)
+    return json_codec.dumps_str(content)
+
+
+def decode(data, encoding):
+    if encoding == MSGPACK:
+        return msgpack.unpackb(data, raw=False)
+    return json_codec.loads(data)
+
+
+def event_message(event):
+    """
+    رسالة العميل هي الحدث نفسه بدون المفاتيح الداخلية
+    """
+    return {key: value for key, value in event.items() if key not in INTERNAL_EVENT_KEYS}
+
+
+def prepare_event(event):
+    """
+    ترميز الحدث مرة واحدة لكل ترميز؛ الحدث الناتج يحمل الإطارات فقط بدلاً من البيانات
+    """
+    message = event_message(event)
+    prepared = {
+        'type': event['type'],
+        'event_id': event.get('event_id'),
+        'frames': {encoding: encode(message, encoding) for encoding in publish_encodings()},
+    }
+    if 'sender' in event:
+        prepared['sender'] = event['sender']
+    return prepared
+
+
+class FrameCache:
+    """
+    ذاكرة محدودة للإطارات المرمزة: {(event_id, الترميز): الإطار}
+    """
+
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self._frames = OrderedDict()
+
+    @staticmethod
+    def _message(event):
+        prepared = event.get('frames')
+        if prepared:
+            # ترميز غير مجهز عند النشر: فك أحد الإطارات المتوفرة
+            source_encoding, frame = next(iter(prepared.items()))
+            return decode(frame, source_encoding)
+        return event_message(event)
+
+    def encode_event(self, event, encoding):
+        prepared = event.get('frames')
+        if prepared and encoding in prepared:
+            return prepared[encoding]
+
+        event_id = event.get('event_id')
+        if event_id is None:
+            return encode(self._message(event), encoding)
+
+        key = (event_id, encoding)
+        frame = self._frames.get(key)
+        if frame is None:
+            frame = self._frames[key] = encode(self._message(event), encoding)
+            while len(self._frames) > self.max_size:
+                self._frames.popitem(last=False)
+        return frame
+
+    def clear(self):
+        self._frames.clear()
+
+
+frames = FrameCache(getattr(settings, 'WS_FRAME_CACHE_SIZE', 512))
+
+
+class FramedConsumerMixin(CodecJsonConsumerMixin):
+    """
+    مستهلك يدعم الترميزين؛ يُستخدم مع AsyncJsonWebsocketConsumer
+    الأحداث المبثوثة تُرسل عبر send_event لإعادة استخدام الإطار المرمز
+    """
+    encoding = JSON
+    subprotocol = None
+
+    async def websocket_connect(self, message):
+        self.encoding, self.subprotocol = negotiate(self.scope)
+        await super().websocket_connect(message)
+
+    async def accept(self, subprotocol=None):
+        await super().accept(subprotocol or self.subprotocol)
+
+    async def receive(self, text_data=None, bytes_data=None, **kwargs):
+        # الرسائل الكبيرة تُرفض قبل فك ترميزها
+        size = len(bytes_data) if bytes_data is not None else len((text_data or '').encode('utf-8'))
+        if size > getattr(settings, 'WS_MAX_MESSAGE_BYTES', 4096):
+            await self.send_json({'type': 'error', 'code': 'message_too_large', 'message': 'حجم الرسالة أكبر من المسموح'})
+            return
+        try:
+            if bytes_data is not None:
+                # الإطارات الثنائية دائماً MessagePack
+                content = decode(bytes_data, MSGPACK)
+            elif text_data:
+                content = await self.decode_json(text_data)
+            else:
+                content = None
+        except (ValueError, TypeError, msgpack.UnpackException):
+            content = None
+        # الرسالة التالفة أو التي ليست كائناً تُرفض دون إغلاق الاتصال
+        if not isinstance(content, dict):
+            await self.send_json({'type': 'error', 'code': 'invalid_message', 'message': 'رسالة غير صالحة'})
+            return
+        await self.receive_json(content, **kwargs)
+
+    async def send_frame(self, frame, close=False):
+        if isinstance(frame, bytes):
+            await self.send(bytes_data=frame, close=close)
+        else:
+            await self.send(text_data=frame, close=close)
+
+    async def send_json(self, content, close=False):
+        await self.send_frame(encode(content, self.encoding), close=close)
+
+    async def send_event(self, event):
+        """
+        إرسال حدث مبثوث كما هو إلى العميل
+        """
+        await self.send_frame(frames.encode_event(event, self.encoding))
@@ -1,14 +1,19 @@
 import json
 from channels.generic.websocket import AsyncJsonWebsocketConsumer
 from channels.db import database_sync_to_async
+from django.conf import settings
 from django.contrib.auth import get_user_model
-from rest_framework_simplejwt.tokens import AccessToken
-from rest_framework_simplejwt.exceptions import TokenError, InvalidToken
+from .access import get_project_org_ids, get_org_ids_for_slugs, can_access_org
+from .broadcast import user_group
+from .presence import tracker
+from .throttling import RateLimitedConsumerMixin
+from .ws_codec import FramedConsumerMixin
+from .ws_events import CLIENT_EVENTS, ClientEventsMixin
 
 User = get_user_model()
 
 
-class AuthWebsocketConsumer(AsyncJsonWebsocketConsumer):
+class AuthWebsocketConsumer(ClientEventsMixin, RateLimitedConsumerMixin, FramedConsumerMixin, AsyncJsonWebsocketConsumer):
     """
     مستهلك WebSocket عام مع دعم المصادقة
     يستخدم للاتصالات العامة وإرسال التحديثات للمستخدم
@@ -17,168 +22,325 @@ class AuthWebsocketConsumer(AsyncJsonWebsocketConsumer):
     async def connect(self):
         """
         إنشاء اتصال WebSocket والتحقق من المصادقة
+        يتم التحقق من الرمز مسبقاً بواسطة JWTAuthMiddleware
         """
-        # الحصول على رمز المصادقة من معلمات الاستعلام
-        query_string = self.scope.get('query_string', b'').decode('utf-8')
-        query_params = dict(param.split('=') for param in query_string.split('&') if '=' in param)
-        token = query_params.get('token', None)
+        self.user = self.scope.get('user')
+        self.subscriptions = set()
         
-        # التحقق من وجود الرمز
-        if not token:
-            print("لا يوجد رمز مصادقة")
+        # التحقق من المصادقة
+        if self.user is None or self.user.is_anonymous:
             await self.close(code=4001)
             return
         
-        # التحقق من صحة الرمز والحصول على المستخدم
-        try:
-            access_token = AccessToken(token)
-            user_id = access_token['user_id']
-            self.user = await self.get_user(user_id)
-            
-            if not self.user:
-                print(f"المستخدم غير موجود: {user_id}")
-                await self.close(code=4002)
-                return
-                
-            print(f"تم المصادقة للمستخدم: {self.user.username}")
-            
-            # إنشاء اسم المجموعة الخاصة بالمستخدم
-            self.user_group = f'user_{self.user.id}'
-            
-            # الانضمام إلى مجموعة المستخدم
-            await self.channel_layer.group_add(
-                self.user_group,
-                self.channel_name
-            )
-            
-            # قبول الاتصال
-            await self.accept()
-            
-            # إرسال رسالة ترحيب
-            await self.send_json({
-                'type': 'connection_established',
-                'message': 'تم الاتصال بنجاح',
-                'user': {
-                    'id': self.user.id,
-                    'username': self.user.username,
-                }
-            })
-            
-        except (TokenError, InvalidToken) as e:
-            print(f"خطأ في المصادقة: {str(e)}")
-            await self.close(code=4003)
-        except Exception as e:
-            print(f"خطأ غير متوقع: {str(e)}")
-            await self.close(code=4000)
+        # إنشاء اسم المجموعة الخاصة بالمستخدم
+        self.user_group = user_group(self.user.id)
+        
+        # الانضمام إلى مجموعة المستخدم
+        await self.channel_layer.group_add(
+            self.user_group,
+            self.channel_name
+        )
+        
+        # قبول الاتصال
+        await self.accept()
+        
+        # إرسال رسالة ترحيب
+        await self.send_json({
+            'type': 'connection_established',
+            'message': 'تم الاتصال بنجاح',
+            'user': {
+                'id': self.user.id,
+                'username': self.user.username,
+            }
+        })
     
     async def disconnect(self, close_code):
         """
-        قطع الاتصال من مجموعة WebSocket
+        قطع الاتصال من مجموعة WebSocket ومن جميع الاشتراكات
         """
         if hasattr(self, 'user_group'):
             await self.channel_layer.group_discard(
                 self.user_group,
                 self.channel_name
             )
+        
+        for group_name in getattr(self, 'subscriptions', set()):
+            await self.channel_layer.group_discard(
+                group_name,
+                self.channel_name
+            )
+            if group_name.startswith('project_'):
+                tracker.leave(group_name, self.user)
+        self.subscriptions = set()
     
     async def receive_json(self, content):
         """
         استقبال رسالة من WebSocket
         """
+        if not await self.allow_message():
+            return
         message_type = content.get('type')
         
         if message_type == 'ping':
+            # النبضة تُجدد تواجد المستخدم في جميع لوحات المشاريع المشترك بها
+            tracker.heartbeat(self.subscriptions, self.user)
             await self.send_json({
                 'type': 'pong',
                 'timestamp': content.get('timestamp')
             })
         elif message_type == 'subscribe':
-            # الاشتراك في تحديثات مشروع
-            project_id = content.get('project_id')
-            if project_id:
-                project_group = f'project_{project_id}'
-                await self.channel_layer.group_add(
-                    project_group,
-                    self.channel_name
-                )
-                await self.send_json({
-                    'type': 'subscribed',
-                    'project_id': project_id
-                })
+            await self.subscribe(content)
         elif message_type == 'unsubscribe':
-            # إلغاء الاشتراك من تحديثات مشروع
-            project_id = content.get('project_id')
-            if project_id:
-                project_group = f'project_{project_id}'
-                await self.channel_layer.group_discard(
-                    project_group,
-                    self.channel_name
-                )
-                await self.send_json({
-                    'type': 'unsubscribed',
-                    'project_id': project_id
-                })
+            await self.unsubscribe(content)
+        elif message_type in CLIENT_EVENTS:
+            await self.relay_project_event(content)
+    
+    async def relay_project_event(self, content):
+        """
+        بث حدث عابر إلى مشروع مشترك فيه هذا الاتصال
+        """
+        project_id = content.get('project_id')
+        group_name = f'project_{project_id}'
+        if not isinstance(project_id, int) or group_name not in self.subscriptions:
+            await self.send_json({
+                'type': 'error',
+                'code': 'invalid_event',
+                'message': 'يجب الاشتراك في المشروع قبل إرسال الأحداث إليه'
+            })
+            return
+        await self.relay_client_event(content, group_name, self.user, project_id=project_id)
+    
+    @staticmethod
+    def parse_targets(content):
+        """
+        استخراج المشاريع والمؤسسات المطلوبة من الرسالة
+        يدعم الصيغة القديمة (project_id) والصيغة المجمعة (project_ids, organization_slugs)
+        يعيد None إذا لم تكن القوائم المجمعة قوائم
+        """
+        project_ids = content.get('project_ids') or []
+        organization_slugs = content.get('organization_slugs') or []
+        if not isinstance(project_ids, (list, tuple)) or not isinstance(organization_slugs, (list, tuple)):
+            return None
+        
+        project_ids = list(project_ids)
+        if content.get('project_id'):
+            project_ids.append(content['project_id'])
+        
+        organization_slugs = list(organization_slugs)
+        if content.get('organization_slug'):
+            organization_slugs.append(content['organization_slug'])
+        
+        valid_project_ids = []
+        for project_id in project_ids:
+            try:
+                valid_project_ids.append(int(project_id))
+            except (TypeError, ValueError):
+                continue
+        
+        valid_slugs = [slug for slug in organization_slugs if isinstance(slug, str) and slug]
+        return list(dict.fromkeys(valid_project_ids)), list(dict.fromkeys(valid_slugs))
+    
+    async def parse_targets_or_reply(self, content):
+        targets = self.parse_targets(content)
+        if targets is None:
+            await self.send_json({
+                'type': 'error',
+                'code': 'invalid_event',
+                'message': 'project_ids وorganization_slugs يجب أن تكون قوائم'
+            })
+        return targets
+    
+    async def subscribe(self, content):
+        """
+        الاشتراك في تحديثات مجموعة من المشاريع والمؤسسات بعد التحقق من الصلاحيات دفعة واحدة
+        """
+        targets = await self.parse_targets_or_reply(content)
+        if targets is None:
+            return
+        project_ids, organization_slugs = targets
+        allowed_projects, allowed_slugs = await self.check_access(project_ids, organization_slugs)
+        
+        subscriptions = self.subscriptions
+        max_subscriptions = getattr(settings, 'WS_MAX_SUBSCRIPTIONS', 100)
+        
+        subscribed_projects = []
+        subscribed_slugs = []
+        limit_reached = False
+        targets = [(f'project_{pid}', subscribed_projects, pid) for pid in allowed_projects]
+        targets += [(f'org_{slug}', subscribed_slugs, slug) for slug in allowed_slugs]
+        
+        for group_name, accepted, target in targets:
+            if group_name not in subscriptions:
+                if len(subscriptions) >= max_subscriptions:
+                    limit_reached = True
+                    continue
+                await self.channel_layer.group_add(group_name, self.channel_name)
+                subscriptions.add(group_name)
+                if group_name.startswith('project_'):
+                    tracker.join(group_name, self.user)
+            accepted.append(target)
+        
+        response = {
+            'type': 'subscribed',
+            'project_ids': subscribed_projects,
+            'organization_slugs': subscribed_slugs,
+            'denied_project_ids': [pid for pid in project_ids if pid not in allowed_projects],
+            'denied_organization_slugs': [slug for slug in organization_slugs if slug not in allowed_slugs],
+        }
+        if content.get('project_id') and subscribed_projects:
+            response['project_id'] = content['project_id']
+        if limit_reached:
+            response['error'] = 'تم الوصول إلى الحد الأقصى للاشتراكات'
+        await self.send_json(response)
+        
+        # إرسال قائمة المتواجدين الحالية لكل مشروع تم الاشتراك فيه
+        for project_id in subscribed_projects:
+            await self.send_json({
+                'type': 'presence_state',
+                'project_id': project_id,
+                'users': await tracker.members(f'project_{project_id}')
+            })
+    
+    async def unsubscribe(self, content):
+        """
+        إلغاء الاشتراك من تحديثات مجموعة من المشاريع والمؤسسات
+        """
+        targets = await self.parse_targets_or_reply(content)
+        if targets is None:
+            return
+        project_ids, organization_slugs = targets
+        subscriptions = self.subscriptions
+        
+        group_names = [f'project_{pid}' for pid in project_ids]
+        group_names += [f'org_{slug}' for slug in organization_slugs]
+        for group_name in group_names:
+            if group_name in subscriptions:
+                await self.channel_layer.group_discard(group_name, self.channel_name)
+                subscriptions.discard(group_name)
+                if group_name.startswith('project_'):
+                    tracker.leave(group_name, self.user)
+        
+        response = {
+            'type': 'unsubscribed',
+            'project_ids': project_ids,
+            'organization_slugs': organization_slugs,
+        }
+        if content.get('project_id'):
+            response['project_id'] = content['project_id']
+        await self.send_json(response)
+    
+    @database_sync_to_async
+    def check_access(self, project_ids, organization_slugs):
+        """
+        التحقق من صلاحية الوصول لعدة مشاريع ومؤسسات باستخدام خريطة الوصول المخزنة مؤقتاً
+        """
+        project_orgs = get_project_org_ids(project_ids)
+        slug_orgs = get_org_ids_for_slugs(organization_slugs)
+        
+        allowed_projects = [
+            pid for pid in project_ids
+            if pid in project_orgs and can_access_org(self.user, project_orgs[pid])
+        ]
+        allowed_slugs = [
+            slug for slug in organization_slugs
+            if slug in slug_orgs and can_access_org(self.user, slug_orgs[slug])
+        ]
+        return allowed_projects, allowed_slugs
     
     async def project_update(self, event):
         """
         إرسال تحديث المشروع إلى WebSocket
         """
-        await self.send_json({
-            'type': 'project_update',
-            'project': event['project']
-        })
+        await self.send_event(event)
     
     async def project_created(self, event):
         """
         إرسال إشعار بإنشاء مشروع جديد
         """
-        await self.send_json({
-            'type': 'project_created',
-            'project': event['project']
-        })
+        await self.send_event(event)
     
     async def project_deleted(self, event):
         """
         إرسال إشعار بحذف مشروع
         """
-        await self.send_json({
-            'type': 'project_deleted',
-            'project_id': event['project_id']
-        })
+        await self.send_event(event)
     
     async def task_update(self, event):
         """
         إرسال تحديث المهمة إلى WebSocket
         """
-        await self.send_json({
-            'type': 'task_update',
-            'task': event['task']
-        })
+        await self.send_event(event)
     
     async def task_created(self, event):
         """
         إرسال إشعار بإنشاء مهمة جديدة
         """
-        await self.send_json({
-            'type': 'task_created',
-            'task': event['task']
-        })
+        await self.send_event(event)
     
     async def task_deleted(self, event):
         """
         إرسال إشعار بحذف مهمة
         """
-        await self.send_json({
-            'type': 'task_deleted',
-            'task_id': event['task_id']
-        })
+        await self.send_event(event)
     
-    @database_sync_to_async
-    def get_user(self, user_id):
+    # أسماء الأحداث التي ترسلها وجهات API إلى مجموعات المشاريع والمؤسسات
+    async def task_create(self, event):
         """
-        الحصول على المستخدم من قاعدة البيانات
+        إرسال إشعار إنشاء مهمة جديدة إلى WebSocket
         """
-        try:
-            return User.objects.get(id=user_id)
-        except User.DoesNotExist:
-            return None
+        await self.send_event(event)
+    
+    async def task_delete(self, event):
+        """
+        إرسال حذف المهمة إلى WebSocket
+        """
+        await self.send_event(event)
+    
+    async def checklist_item_update(self, event):
+        """
+        إرسال تغيير عنصر في قائمة تحقق مهمة مع عدادات تقدمها
+        """
+        await self.send_event(event)
+    
+    async def checklist_item_delete(self, event):
+        """
+        إرسال حذف عنصر من قائمة تحقق مهمة مع عدادات تقدمها
+        """
+        await self.send_event(event)
+    
+    async def project_create(self, event):
+        """
+        إرسال إشعار إنشاء مشروع جديد إلى WebSocket
+        """
+        await self.send_event(event)
+    
+    async def project_delete(self, event):
+        """
+        إرسال حذف المشروع إلى WebSocket
+        """
+        await self.send_event(event)
+    
+    async def presence_update(self, event):
+        """
+        إرسال فروقات التواجد (من انضم ومن غادر) في لوحة المشروع
+        """
+        await self.send_event(event)
+    
+    # أحداث صندوق "مهامي" (tasks.inbox) تصل إلى مجموعة المستخدم فقط
+    async def inbox_upsert(self, event):
+        """
+        إضافة مهمة مسندة للمستخدم إلى صندوقه أو تحديثها فيه
+        """
+        await self.send_event(event)
+    
+    async def inbox_remove(self, event):
+        """
+        إزالة مهمة من صندوق المستخدم (نُقلت لغيره أو أُرشفت أو حُذفت)
+        """
+        await self.send_event(event)
+    
+    async def task_reminder(self, event):
+        """
+        تذكير باقتراب موعد استحقاق مهمة مسندة للمستخدم (tasks.reminders)
+        """
+        await self.send_event(event)
@@ -0,0 +1,104 @@
+"""
+أحداث العميل العابرة عبر WebSocket (الكتابة والسحب أثناء التنفيذ)
+- أحداث المهام والمشاريع (task_*/project_*) يصدرها الخادم فقط بعد نجاح المعاملة؛
+  العميل لا يستطيع بث حالة لباقي أعضاء المجموعة
+- العميل يرسل أنواعاً محددة فقط (CLIENT_EVENTS)، ويُتحقق من كل حقل ونوعه وقيمه،
+  والحقول غير المعرفة تُحذف وهوية المرسل يضيفها الخادم
+- حجم الرسالة محدود قبل فك ترميزها (WS_MAX_MESSAGE_BYTES)، ومعدلها محدود لكل اتصال
+  (THROTTLE_RATES['ws:broadcast'])
+- الحدث لا يُخزن ولا يُعاد إرساله للمرسل نفسه
+"""
+from .broadcast import apublish
+
+TASK_STATUSES = ('todo', 'in_progress', 'done')
+
+# {النوع: {الحقل: (المتحقق، مطلوب)}}
+CLIENT_EVENTS = {
+    # المستخدم يكتب في عنوان المهمة أو وصفها أو تعليق عليها
+    'typing': {
+        'task_id': ('id', True),
+        'field': (('title', 'description', 'comment'), True),
+        'active': ('bool', False),
+    },
+    # المستخدم يسحب بطاقة مهمة (قبل إفلاتها وحفظ الحالة عبر API)
+    'drag': {
+        'task_id': ('id', True),
+        'status': (TASK_STATUSES, False),
+        'index': ('index', False),
+        'active': ('bool', False),
+    },
+}
+
+MAX_INDEX = 10000
+
+
+def _valid(value, rule):
+    if rule == 'id':
+        return isinstance(value, int) and not isinstance(value, bool) and value > 0
+    if rule == 'index':
+        return isinstance(value, int) and not isinstance(value, bool) and 0 <= value <= MAX_INDEX
+    if rule == 'bool':
+        return isinstance(value, bool)
+    return value in rule
+
+
+def validate_client_event(content):
+    """
+    يعيد (الحدث بالحقول المسموحة فقط، None) أو (None، سبب الرفض)
+    """
+    event_type = content.get('type')
+    schema = CLIENT_EVENTS.get(event_type)
+    if schema is None:
+        return None, f'نوع حدث غير مدعوم: {event_type}'
+
+    event = {'type': event_type}
+    for field, (rule, required) in schema.items():
+        if field not in content:
+            if required:
+                return None, f'الحقل {field} مطلوب'
+            continue
+        if not _valid(content[field], rule):
+            return None, f'قيمة غير صالحة للحقل {field}'
+        event[field] = content[field]
+    return event, None
+
+
+class ClientEventsMixin:
+    """
+    بث أحداث العميل العابرة بعد التحقق منها، واستقبالها في باقي اتصالات المجموعة
+    يُستخدم مع RateLimitedConsumerMixin وFramedConsumerMixin
+    """
+
+    async def relay_client_event(self, content, group_name, user, **extra):
+        """
+        التحقق من الحدث وحده ثم بثه إلى group_name مع هوية المرسل؛ يعيد True إذا تم البث
+        """
+        event, error = validate_client_event(content)
+        if event is None:
+            await self.send_json({'type': 'error', 'code': 'invalid_event', 'message': error})
+            return False
+        if not await self.allow_message('ws:broadcast'):
+            return False
+
+        event.update(extra)
+        event['user'] = {'id': user.id, 'username': user.username}
+        # sender مفتاح داخلي لا يصل للعملاء (ws_codec.INTERNAL_EVENT_KEYS)
+        event['sender'] = self.channel_name
+        await apublish([group_name], event)
+        return True
+
+    async def client_event(self, event):
+        if event.get('sender') != self.channel_name:
+            await self.send_event(event)
+
+    async def typing(self, event):
+        """
+        إرسال حدث كتابة مستخدم آخر
+        """
+        await self.client_event(event)
+
+    async def drag(self, event):
+        """
+        إرسال حدث سحب مستخدم آخر لبطاقة مهمة
+        """
+        await self.client_event(event)
@@ -1,16 +1,30 @@
 from rest_framework import serializers
 from .models import User
 from organizations.serializers import OrganizationSerializer
+from trello_backend.fieldsets import SparseFieldsetMixin
 from django.contrib.auth.password_validation import validate_password
 
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     organization_detail = OrganizationSerializer(source='organization', read_only=True)
     
     class Meta:
         model = User
         fields = ['id', 'username', 'email', 'is_admin', 'is_system_owner', 'organization', 'organization_detail', 'date_joined', 'last_login']
         read_only_fields = ['id', 'date_joined', 'last_login']
+        expandable_fields = ['organization_detail']
+        related_fields = {'organization_detail': ('organization',)}
+
+
+class UserSummarySerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    """
+    تمثيل مختصر للمستخدم (بدون بيانات المؤسسة) للقوائم الطويلة مثل التعليقات
+    """
+    
+    class Meta:
+        model = User
+        fields = ['id', 'username', 'first_name', 'last_name']
+        read_only_fields = fields
 
 
 class UserCreateSerializer(serializers.ModelSerializer):
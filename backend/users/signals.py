@@ -1,4 +1,4 @@
-from django.db.models.signals import pre_save
+from django.db.models.signals import pre_save, post_save, post_delete
 from django.dispatch import receiver
 from .models import User
 from organizations.models import Organization
@@ -18,3 +18,23 @@ def assign_default_organization(sender, instance, **kwargs):
         
         # تعيين المؤسسة الافتراضية للمستخدم
         instance.organization = default_org
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_websocket_principal(sender, instance, **kwargs):
+    """
+    حذف نسخة المستخدم المخزنة مؤقتاً لاتصالات WebSocket بعد تعديله أو حذفه
+    """
+    from trello_backend.jwt_auth import invalidate_principal
+    invalidate_principal(instance.pk)
+
+
+@receiver(post_save, sender=Organization)
+@receiver(post_delete, sender=Organization)
+def invalidate_organization_websocket_principals(sender, instance, **kwargs):
+    """
+    حذف نسخ مستخدمي المؤسسة المخزنة مؤقتاً بعد تعديل المؤسسة أو حذفها
+    """
+    from trello_backend.jwt_auth import invalidate_organization_principals
+    invalidate_organization_principals(instance.pk)
@@ -6,6 +6,7 @@ from rest_framework_simplejwt.tokens import RefreshToken
 from django.shortcuts import get_object_or_404
 from .models import User
 from .serializers import UserSerializer, UserCreateSerializer, UserUpdateSerializer
+from trello_backend.async_views import AsyncReadView, json_response, serialize
 from .permissions import IsSystemOwner, IsOrgAdmin, IsOrgAdminOrSystemOwner, IsSameOrganization, IsSystemOwnerOrSameOrganization, IsSystemOwnerOrSelf
 
 
@@ -107,7 +108,7 @@ class UserViewSet(viewsets.ModelViewSet):
             for user in all_users:
                 print(f"DEBUG: معلومات المستخدم - الاسم: {user.username}, المعرف: {user.id}, مشرف: {user.is_admin}, مالك النظام: {user.is_system_owner}")
             
-            return all_users
+            return UserSerializer.prepare_queryset(all_users, self.request)
         except Exception as e:
             print(f"ERROR: خطأ في جلب المستخدمين: {str(e)}")
             # في حالة الخطأ، نعيد قائمة فارغة
@@ -130,11 +131,11 @@ class UserViewSet(viewsets.ModelViewSet):
                 print(f"DEBUG: تم تعيين مؤسسة افتراضية للمستخدم: {request.user.username} - {default_org.name} (slug: {default_org.slug})")
             
             # جلب المستخدمين في نفس المؤسسة
-            org_users = User.objects.filter(organization=request.user.organization)
+            org_users = UserSerializer.prepare_queryset(User.objects.filter(organization=request.user.organization), request)
             print(f"DEBUG: تم جلب {org_users.count()} مستخدم من مؤسسة {request.user.organization.name}")
             
             # إرجاع البيانات
-            serializer = UserSerializer(org_users, many=True)
+            serializer = UserSerializer(org_users, many=True, context={'request': request})
             return Response(serializer.data)
         except Exception as e:
             print(f"ERROR: خطأ في جلب مستخدمي المؤسسة: {str(e)}")
@@ -248,8 +249,21 @@ def current_user(request):
             request.user.save()
             print(f"DEBUG: تم إنشاء مؤسسة افتراضية للمستخدم: {request.user.username}")
         
-        serializer = UserSerializer(request.user)
+        serializer = UserSerializer(request.user, context={'request': request})
         return Response(serializer.data)
     except Exception as e:
         print(f"ERROR: خطأ في جلب بيانات المستخدم الحالي: {str(e)}")
         return Response({"error": f"حدث خطأ أثناء جلب بيانات المستخدم: {str(e)}"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+class CurrentUserAsyncView(AsyncReadView):
+    """
+    بيانات المستخدم الحالي من ذاكرة المستخدمين المشتركة دون أي استعلام
+    """
+    fallback = current_user
+    
+    def needs_fallback(self, user):
+        return not user.organization_id
+    
+    async def get(self, request, user):
+        return json_response(await serialize(UserSerializer(user, context={'request': request})))
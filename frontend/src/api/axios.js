@@ -45,9 +45,31 @@ instance.interceptors.request.use(
   }
 );
 
+// بعد أي تعديل يرسل الخادم وقت انتهاء توجيه القراءات إلى قاعدة البيانات الرئيسية موقعاً ("<الوقت>:<التوقيع>")
+// نعيد القيمة كما هي مع الطلبات التالية حتى تظهر التعديلات فوراً رغم تأخر النسخ المقروءة
+const PRIMARY_PIN_HEADER = 'x-db-primary-pin';
+
+instance.interceptors.request.use(
+  (config) => {
+    const pin = sessionStorage.getItem(PRIMARY_PIN_HEADER);
+    const pinnedUntil = pin ? Number(pin.split(':')[0]) : 0;
+    if (pinnedUntil * 1000 > Date.now()) {
+      config.headers[PRIMARY_PIN_HEADER] = pin;
+    }
+    return config;
+  },
+  (error) => {
+    return Promise.reject(error);
+  }
+);
+
 // إضافة معترض للاستجابات للتعامل مع الأخطاء
 instance.interceptors.response.use(
   (response) => {
+    const pinnedUntil = response.headers[PRIMARY_PIN_HEADER];
+    if (pinnedUntil) {
+      sessionStorage.setItem(PRIMARY_PIN_HEADER, pinnedUntil);
+    }
     return response;
   },
   async (error) => {
@@ -229,6 +229,9 @@ const CommentForm = ({ taskId, onCommentAdded, editingComment, onCancelEdit }) =
 const TaskComments = ({ taskId }) => {
   const [comments, setComments] = useState([]);
   const [loading, setLoading] = useState(true);
+  // رابط الصفحة التالية (تعليقات أقدم) من الترقيم بالمؤشر
+  const [olderUrl, setOlderUrl] = useState(null);
+  const [loadingOlder, setLoadingOlder] = useState(false);
   const [editingComment, setEditingComment] = useState(null);
   const [notification, setNotification] = useState({ open: false, message: '', severity: 'success' });
   const { user } = useContext(AuthContext);
@@ -238,7 +241,9 @@ const TaskComments = ({ taskId }) => {
     try {
       setLoading(true);
       const response = await axios.get(`/api/comments/task/${taskId}/`);
-      setComments(response.data);
+      // الخادم يرجع الأحدث أولاً، ونعرض التعليقات من الأقدم إلى الأحدث
+      setComments([...response.data.results].reverse());
+      setOlderUrl(response.data.next);
     } catch (err) {
       console.error('خطأ في جلب التعليقات:', err);
       showNotification('فشل في جلب التعليقات', 'error');
@@ -247,6 +252,22 @@ const TaskComments = ({ taskId }) => {
     }
   };
   
+  // تحميل التعليقات الأقدم
+  const fetchOlderComments = async () => {
+    if (!olderUrl) return;
+    try {
+      setLoadingOlder(true);
+      const response = await axios.get(olderUrl);
+      setComments(prev => [...[...response.data.results].reverse(), ...prev]);
+      setOlderUrl(response.data.next);
+    } catch (err) {
+      console.error('خطأ في جلب التعليقات الأقدم:', err);
+      showNotification('فشل في جلب التعليقات الأقدم', 'error');
+    } finally {
+      setLoadingOlder(false);
+    }
+  };
+  
   // جلب التعليقات عند تحميل المكون أو تغيير المهمة
   useEffect(() => {
     if (taskId) {
@@ -325,6 +346,13 @@ const TaskComments = ({ taskId }) => {
       
       {/* قائمة التعليقات */}
       <Box sx={{ mt: 3 }}>
+        {!loading && olderUrl && (
+          <Box sx={{ display: 'flex', justifyContent: 'center', mb: 2 }}>
+            <Button size="small" onClick={fetchOlderComments} disabled={loadingOlder}>
+              {loadingOlder ? <CircularProgress size={20} /> : 'تحميل التعليقات الأقدم'}
+            </Button>
+          </Box>
+        )}
         {loading ? (
           <Box sx={{ display: 'flex', justifyContent: 'center', p: 3 }}>
             <CircularProgress />
@@ -83,7 +83,9 @@ const OrganizationsSection = ({ token }) => {
         // جلب المهام لكل مشروع
         for (const project of projectsResponse.data) {
           try {
+            // الإحصائيات تحتاج حالة المهمة فقط، فلا داعي لجلب كتل التفاصيل المتداخلة
             const tasksResponse = await axios.get(`/api/projects/${project.id}/tasks/`, {
+              params: { fields: 'id,status' },
               headers: {
                 Authorization: `Bearer ${token}`
               }
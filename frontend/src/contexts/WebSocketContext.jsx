@@ -14,6 +14,8 @@ export const WebSocketProvider = ({ children }) => {
   const wsRef = useRef(null);
   // استخدام useRef للاحتفاظ بمستمعي الأحداث
   const eventListeners = useRef({});
+  // مؤقت نبضات الاتصال (تستخدم لتتبع تواجد المستخدمين في لوحات المشاريع)
+  const heartbeatRef = useRef(null);
 
   // إنشاء اتصال WebSocket عند تسجيل دخول المستخدم
   useEffect(() => {
@@ -62,6 +64,14 @@ export const WebSocketProvider = ({ children }) => {
         console.log('تم الاتصال بـ WebSocket');
         setConnected(true);
         
+        // إرسال نبضة دورية لإبقاء التواجد محدثاً
+        clearInterval(heartbeatRef.current);
+        heartbeatRef.current = setInterval(() => {
+          if (ws.readyState === WebSocket.OPEN) {
+            ws.send(JSON.stringify({ type: 'ping', timestamp: Date.now() }));
+          }
+        }, 25000);
+        
         // إعادة الاشتراك في المشاريع المشترك بها سابقًا
         projectSubscriptions.forEach(projectId => {
           subscribeToProject(projectId);
@@ -95,6 +105,7 @@ export const WebSocketProvider = ({ children }) => {
       ws.onclose = (event) => {
         console.log('تم إغلاق اتصال WebSocket:', event.code, event.reason);
         setConnected(false);
+        clearInterval(heartbeatRef.current);
         
         // إعادة الاتصال تلقائيًا بعد فترة قصيرة إذا لم يكن الإغلاق متعمدًا
         if (event.code !== 1000) {
@@ -111,6 +122,7 @@ export const WebSocketProvider = ({ children }) => {
 
   // إغلاق اتصال WebSocket
   const disconnectWebSocket = () => {
+    clearInterval(heartbeatRef.current);
     if (wsRef.current) {
       wsRef.current.close();
       wsRef.current = null;